@@ -0,0 +1,42 @@
+"""V2.5 HNSW (cosine) ANN index on transcript chunk embeddings
+
+Revision ID: a3f1c9e27b40
+Revises: 298b25f25b72
+Create Date: 2026-10-19 10:12:31.418027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f1c9e27b40"
+down_revision: Union[str, None] = "298b25f25b72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# HNSW build params (pgvector defaults, spelled out so they are visible in the schema).
+# Query-time recall/latency is tuned per query via hnsw.ef_search (see kb_search.py).
+_HNSW_M = 16
+_HNSW_EF_CONSTRUCTION = 64
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block; it also keeps the
+    # table writable (embedding jobs) while the index builds.
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chunk_embeddings_hnsw_cosine
+            ON transcript_chunk_embeddings
+            USING hnsw (embedding vector_cosine_ops)
+            WITH (m = {_HNSW_M}, ef_construction = {_HNSW_EF_CONSTRUCTION})
+            """
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_chunk_embeddings_hnsw_cosine")
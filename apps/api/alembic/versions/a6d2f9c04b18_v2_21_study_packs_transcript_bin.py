@@ -0,0 +1,92 @@
+"""V2.21 study_packs.transcript_bin (compact columnar transcript) + backfill
+
+Revision ID: a6d2f9c04b18
+Revises: f5c1d8e3a742
+Create Date: 2026-10-19 14:40:09.271853
+
+"""
+import json
+import struct
+import zlib
+from typing import Any, Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a6d2f9c04b18"
+down_revision: Union[str, None] = "f5c1d8e3a742"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 200
+
+
+# Frozen copy of the V2.21 transcript_bin layout (zlib codec), so this
+# migration doesn't change when app.services.transcript_codec does:
+#   b"YLT1" | u8 codec=1 | zlib(u32 n | f32[n] start | f32[n] duration |
+#                               u32[n+1] text offsets | UTF-8 text blob)
+def _encode_segments(segments: List[Dict[str, Any]]) -> bytes:
+    starts, durs, texts = [], [], []
+    for seg in segments or []:
+        if "start_sec" in seg and "end_sec" in seg:
+            start = float(seg.get("start_sec") or 0.0)
+            dur = max(float(seg.get("end_sec") or start) - start, 0.0)
+        else:
+            start = float(seg.get("start") or 0.0)
+            dur = max(float(seg.get("duration") or 0.0), 0.0)
+        starts.append(start)
+        durs.append(dur)
+        texts.append(str(seg.get("text") or "").encode("utf-8"))
+
+    n = len(texts)
+    offsets = [0]
+    for b in texts:
+        offsets.append(offsets[-1] + len(b))
+    payload = b"".join(
+        [
+            struct.pack("<I", n),
+            struct.pack(f"<{n}f", *starts),
+            struct.pack(f"<{n}f", *durs),
+            struct.pack(f"<{n + 1}I", *offsets),
+            *texts,
+        ]
+    )
+    return b"YLT1" + bytes([1]) + zlib.compress(payload, 6)
+
+
+def upgrade() -> None:
+    op.add_column("study_packs", sa.Column("transcript_bin", sa.LargeBinary(), nullable=True))
+
+    # Rows with unparseable transcript_json are left NULL; readers fall back to JSON.
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, transcript_json FROM study_packs "
+                "WHERE id > :last_id AND transcript_json IS NOT NULL "
+                "ORDER BY id LIMIT :n"
+            ),
+            {"last_id": last_id, "n": _BATCH},
+        ).all()
+        if not rows:
+            break
+        for pack_id, raw in rows:
+            last_id = int(pack_id)
+            try:
+                segs = json.loads(raw)
+                if isinstance(segs, dict):
+                    segs = segs.get("segments") or []
+                blob = _encode_segments(segs)
+            except Exception:
+                continue
+            conn.execute(
+                sa.text("UPDATE study_packs SET transcript_bin = :b WHERE id = :id"),
+                {"b": blob, "id": last_id},
+            )
+
+
+def downgrade() -> None:
+    op.drop_column("study_packs", "transcript_bin")
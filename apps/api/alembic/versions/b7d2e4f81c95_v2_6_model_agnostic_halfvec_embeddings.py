@@ -0,0 +1,111 @@
+"""V2.6 model-agnostic embedding storage (untyped vector + halfvec)
+
+Revision ID: b7d2e4f81c95
+Revises: a3f1c9e27b40
+Create Date: 2026-10-19 11:02:47.553190
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e4f81c95"
+down_revision: Union[str, None] = "a3f1c9e27b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Snapshot of app.services.embedding_store.EMBED_MODEL_REGISTRY at the time of
+# this migration: every model we had embedded with was 384-dim and moves to halfvec.
+# Any other model resolves to YLC_EMBED_STORAGE (default halfvec) at read time
+# (embedding_store.resolve_model_spec), so its rows move too unless that is "vector".
+_HALFVEC_MODELS = (
+    "sentence-transformers/all-MiniLM-L6-v2",
+    "sentence-transformers/all-MiniLM-L12-v2",
+    "BAAI/bge-small-en-v1.5",
+)
+_HNSW = "WITH (m = 16, ef_construction = 64)"
+
+
+def _backfill_filter() -> str:
+    """Unlisted models stay float32 only when YLC_EMBED_STORAGE=vector."""
+    if (os.getenv("YLC_EMBED_STORAGE", "halfvec").strip().lower() or "halfvec") != "vector":
+        return ""
+    models = ", ".join(f"'{m}'" for m in _HALFVEC_MODELS)
+    return f"\n          AND model IN ({models})"
+
+
+def upgrade() -> None:
+    # halfvec needs pgvector >= 0.7
+    op.execute("ALTER EXTENSION vector UPDATE")
+
+    # The old index is on vector(384); it goes away with the typmod.
+    op.execute("DROP INDEX IF EXISTS idx_chunk_embeddings_hnsw_cosine")
+
+    op.execute("ALTER TABLE transcript_chunk_embeddings ALTER COLUMN embedding TYPE vector")
+    op.execute("ALTER TABLE transcript_chunk_embeddings ALTER COLUMN embedding DROP NOT NULL")
+    op.execute("ALTER TABLE transcript_chunk_embeddings ADD COLUMN embedding_half halfvec")
+
+    # Backfill: float32 -> float16 for every row whose model reads from halfvec.
+    # Pre-V2.6 rows are all vector(384), well inside halfvec's limits.
+    op.execute(
+        f"""
+        UPDATE transcript_chunk_embeddings
+        SET embedding_half = embedding::halfvec,
+            embedding = NULL
+        WHERE embedding IS NOT NULL{_backfill_filter()}
+        """
+    )
+
+    op.execute(
+        "ALTER TABLE transcript_chunk_embeddings ADD CONSTRAINT ck_chunk_embeddings_one_storage "
+        "CHECK (num_nonnulls(embedding, embedding_half) = 1)"
+    )
+
+    # Partial expression index per (storage, dim); see embedding_store.EmbedModelSpec.
+    # Indexes for other (storage, dim) pairs are created on first use by
+    # embedding_store.ensure_ann_index (called from the embed task).
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chunk_embeddings_hnsw_halfvec_384
+            ON transcript_chunk_embeddings
+            USING hnsw ((embedding_half::halfvec(384)) halfvec_cosine_ops)
+            {_HNSW}
+            WHERE dim = 384
+            """
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_chunk_embeddings_hnsw_halfvec_384")
+
+    op.execute("ALTER TABLE transcript_chunk_embeddings DROP CONSTRAINT IF EXISTS ck_chunk_embeddings_one_storage")
+
+    op.execute(
+        """
+        UPDATE transcript_chunk_embeddings
+        SET embedding = embedding_half::vector
+        WHERE embedding IS NULL AND embedding_half IS NOT NULL
+        """
+    )
+    # V2.0 schema only supports vector(384): non-384 embeddings cannot be kept.
+    op.execute("DELETE FROM transcript_chunk_embeddings WHERE dim <> 384")
+
+    op.execute("ALTER TABLE transcript_chunk_embeddings DROP COLUMN embedding_half")
+    op.execute("ALTER TABLE transcript_chunk_embeddings ALTER COLUMN embedding SET NOT NULL")
+    op.execute("ALTER TABLE transcript_chunk_embeddings ALTER COLUMN embedding TYPE vector(384)")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chunk_embeddings_hnsw_cosine
+            ON transcript_chunk_embeddings
+            USING hnsw (embedding vector_cosine_ops)
+            {_HNSW}
+            """
+        )
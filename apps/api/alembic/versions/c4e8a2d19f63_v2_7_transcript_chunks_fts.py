@@ -0,0 +1,43 @@
+"""V2.7 transcript_chunks generated tsvector + GIN index
+
+Revision ID: c4e8a2d19f63
+Revises: b7d2e4f81c95
+Create Date: 2026-10-19 11:48:05.127734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a2d19f63"
+down_revision: Union[str, None] = "b7d2e4f81c95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored generated column: computed once per insert (ingest), never at query time.
+    # Must stay in sync with app.models.transcript_chunk.FTS_CONFIG.
+    op.execute(
+        """
+        ALTER TABLE transcript_chunks
+        ADD COLUMN text_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', text)) STORED
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transcript_chunks_tsv
+            ON transcript_chunks USING gin (text_tsv)
+            """
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transcript_chunks_tsv")
+    op.execute("ALTER TABLE transcript_chunks DROP COLUMN IF EXISTS text_tsv")
@@ -0,0 +1,29 @@
+"""V2.9 study_packs.embedding_version (in-process vector index invalidation)
+
+Revision ID: d9b3f5a6e210
+Revises: c4e8a2d19f63
+Create Date: 2026-10-19 12:31:40.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d9b3f5a6e210"
+down_revision: Union[str, None] = "c4e8a2d19f63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "study_packs",
+        sa.Column("embedding_version", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("study_packs", "embedding_version")
@@ -0,0 +1,46 @@
+"""V2.17 optional pg_trgm GIN index for transcript chunk text search
+
+Revision ID: e2a7c4b9d513
+Revises: d9b3f5a6e210
+Create Date: 2026-10-19 13:22:51.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7c4b9d513"
+down_revision: Union[str, None] = "d9b3f5a6e210"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _trgm_available() -> bool:
+    return bool(
+        op.get_bind().execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    )
+
+
+def upgrade() -> None:
+    # Optional: without pg_trgm (contrib not installed) the chunk listing's
+    # ILIKE '%q%' filter keeps working, just without an index.
+    if not _trgm_available():
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transcript_chunks_text_trgm
+            ON transcript_chunks USING gin (text gin_trgm_ops)
+            """
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transcript_chunks_text_trgm")
+    # pg_trgm is left installed: other objects may depend on it.
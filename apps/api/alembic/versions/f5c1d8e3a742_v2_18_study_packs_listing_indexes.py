@@ -0,0 +1,63 @@
+"""V2.18 study_packs listing indexes (keyset order, filters, trigram search)
+
+Revision ID: f5c1d8e3a742
+Revises: e2a7c4b9d513
+Create Date: 2026-10-19 13:58:16.604213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f5c1d8e3a742"
+down_revision: Union[str, None] = "e2a7c4b9d513"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Snapshot of app.models.study_pack.STUDY_PACK_SEARCH_SQL: the listing filters on
+# exactly this expression so the planner can match the index.
+_SEARCH_SQL = (
+    "(coalesce(title, '') || chr(10) || coalesce(source_url, '') || chr(10) || "
+    "coalesce(source_id, '') || chr(10) || coalesce(playlist_title, '') || chr(10) || "
+    "coalesce(playlist_id, ''))"
+)
+
+_BTREE = [
+    ("idx_study_packs_created_id", "(created_at, id)"),
+    ("idx_study_packs_status_created_id", "(status, created_at, id)"),
+    ("idx_study_packs_source_type_created_id", "(source_type, created_at, id)"),
+]
+
+
+def _trgm_available() -> bool:
+    return bool(
+        op.get_bind().execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    )
+
+
+def upgrade() -> None:
+    trgm = _trgm_available()
+    if trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        for name, cols in _BTREE:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON study_packs {cols}")
+        if trgm:
+            op.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_study_packs_search_trgm
+                ON study_packs USING gin ({_SEARCH_SQL} gin_trgm_ops)
+                """
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_study_packs_search_trgm")
+        for name, _ in reversed(_BTREE):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
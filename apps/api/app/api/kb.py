@@ -0,0 +1,98 @@
+# apps/api/app/api/kb.py
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.services.kb_search import kb_search_library
+from app.services.youtube import with_timestamp
+
+router = APIRouter(prefix="/kb", tags=["kb"])
+
+
+# -----------------------
+# V2.10 — KB (Cross-pack retrieval)
+# -----------------------
+class KBLibrarySearchItemModel(BaseModel):
+    study_pack_id: int
+    study_pack_title: str | None = None
+    playlist_id: str | None = None
+    playlist_index: int | None = None
+    url: str
+
+    chunk_id: int
+    idx: int
+    start_sec: float
+    end_sec: float
+    text: str
+    score: float
+    distance: float
+
+    fused_score: float | None = None
+    sem_rank: int | None = None
+    lex_rank: int | None = None
+    lex_score: float | None = None
+
+
+class KBLibrarySearchResponse(BaseModel):
+    ok: bool
+    model: str
+    q: str
+    limit: int
+    hybrid: bool
+    fusion: str | None = None
+    playlist_id: str | None = None
+    pack_ids: list[int] | None = None
+    items: list[KBLibrarySearchItemModel]
+
+
+@router.get("/search", response_model=KBLibrarySearchResponse)
+def kb_library_search(
+    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=1),
+    playlist_id: str | None = Query(default=None),
+    pack_ids: list[int] | None = Query(default=None),  # ?pack_ids=1&pack_ids=2
+    model: str = Query(default="sentence-transformers/all-MiniLM-L6-v2"),
+    limit: int = Query(default=10, ge=1, le=50),
+    hybrid: bool = Query(default=True),
+    fusion: str | None = Query(default=None, pattern="^(rrf|boost)$"),
+    ef_search: int | None = Query(default=None, ge=1, le=1000),
+    iterative_scan: str | None = Query(default=None, pattern="^(off|strict_order|relaxed_order)$"),
+):
+    """
+    Search a playlist, an explicit set of packs, or (no filter) the whole library
+    with one query embedding and one SQL statement.
+    """
+    try:
+        items = kb_search_library(
+            db,
+            q=q,
+            pack_ids=pack_ids,
+            playlist_id=playlist_id,
+            limit=limit,
+            model=model,
+            hybrid=hybrid,
+            fusion=fusion,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"KB search failed: {e}")
+
+    return KBLibrarySearchResponse(
+        ok=True,
+        model=model,
+        q=q,
+        limit=limit,
+        hybrid=hybrid,
+        fusion=(fusion or settings.kb_fusion) if hybrid else None,
+        playlist_id=playlist_id,
+        pack_ids=pack_ids,
+        items=[
+            KBLibrarySearchItemModel(**x, url=with_timestamp(x.get("source_url") or "", x["start_sec"]))
+            for x in items
+        ],
+    )
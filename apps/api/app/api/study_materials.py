@@ -1,16 +1,16 @@
 from __future__ import annotations
 
-import json
-
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app.core.responses import FastJSONResponse, json_fragment
 from app.db.session import get_db
 from app.models.study_material import StudyMaterial
-from app.models.study_pack import StudyPack
+from app.services.http_cache import etag_matches, make_etag, materials_version, not_modified, set_etag
 from app.services.flashcards import get_flashcards_progress, mark_flashcard
 from app.services.jobs import create_job
+from app.services.study_packs import get_study_pack_light
 from app.services.quizzes import get_quiz_progress, mark_quiz_question
 from app.worker.generate_tasks import generate_study_materials
 from app.services.chapters import get_chapters_progress, mark_chapter
@@ -42,18 +42,9 @@ class ChapterMarkRequest(BaseModel):
 # -----------------------
 # Materials
 # -----------------------
-def _safe_json_loads(s: str | None):
-    if not s:
-        return None
-    try:
-        return json.loads(s)
-    except Exception:
-        return None
-
-
 @router.post("/{study_pack_id}/generate", response_model=GenerateStudyMaterialsResponse)
 def generate_for_study_pack(study_pack_id: int, db: Session = Depends(get_db)) -> GenerateStudyMaterialsResponse:
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
+    sp = get_study_pack_light(db, study_pack_id)
     if not sp:
         raise HTTPException(status_code=404, detail="Study pack not found")
     if sp.status != "ingested":
@@ -66,10 +57,14 @@ def generate_for_study_pack(study_pack_id: int, db: Session = Depends(get_db)) -
 
 
 @router.get("/{study_pack_id}/materials")
-def get_materials(study_pack_id: int, db: Session = Depends(get_db)):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
-    if not sp:
+def get_materials(study_pack_id: int, request: Request, db: Session = Depends(get_db)):
+    # V2.23 — conditional GET keyed on the pack + its materials' count/max(updated_at)
+    version = materials_version(db, study_pack_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Study pack not found")
+    etag = make_etag("materials", study_pack_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     rows = (
         db.query(StudyMaterial)
@@ -85,7 +80,8 @@ def get_materials(study_pack_id: int, db: Session = Depends(get_db)):
                 "id": r.id,
                 "kind": r.kind,
                 "status": r.status,
-                "content_json": _safe_json_loads(r.content_json),
+                # V2.24 — stored JSON text spliced in as-is (no loads/dumps round-trip)
+                "content_json": json_fragment(r.content_json),
                 "content_text": r.content_text,
                 "error": r.error,
                 "created_at": r.created_at.isoformat() if r.created_at else None,
@@ -93,7 +89,9 @@ def get_materials(study_pack_id: int, db: Session = Depends(get_db)):
             }
         )
 
-    return {"ok": True, "study_pack_id": study_pack_id, "materials": materials}
+    resp = FastJSONResponse({"ok": True, "study_pack_id": study_pack_id, "materials": materials})
+    set_etag(resp, etag)
+    return resp
 
 
 # -----------------------
@@ -1,61 +1,51 @@
 # apps/api/app/api/study_packs.py
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from sqlalchemy.orm import Session, defer, load_only
+from sqlalchemy import func, text, tuple_
 
 from app.models.transcript_chunk import TranscriptChunk
 from app.models.transcript_chunk_embedding import TranscriptChunkEmbedding
-from app.db.session import get_db
-from app.models.study_pack import StudyPack
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, dumps
+from app.db.session import get_async_sessionmaker, get_db
+from app.models.study_pack import STUDY_PACK_SEARCH_SQL, StudyPack
 from app.services.jobs import create_job
-from app.services.study_packs import create_study_pack
+from app.services.study_packs import (
+    create_study_pack,
+    get_study_pack_light,
+    get_study_pack_light_async,
+    light_pack_options,
+    study_pack_exists,
+)
 from app.services.youtube import (
     extract_youtube_video_id,
     extract_youtube_playlist_id,
     fetch_playlist_metadata,
     build_video_url,
+    with_timestamp,
 )
 from app.worker.ingest_tasks import ingest_youtube_captions, ingest_youtube_playlist
 from app.worker.embedding_tasks import embed_transcript_chunks  # Celery task
 
 # V2.2 Retrieval service
-from app.services.kb_search import kb_search_chunks
+from app.services.kb_search import kb_search_batch, kb_search_chunks
+from app.services.kb_cache import STATUS_BYPASS, get_kb_cache
+from app.services.http_cache import etag_matches, make_etag, not_modified, pack_version, set_etag
+from app.services.pagination import count_rows, decode_cursor, encode_cursor
+from app.services.transcript_segments import iter_segment_json, segments_in_window
 
 # V2.3+ Q&A service
-from app.services.kb_qa import ask_grounded
+from app.services.kb_qa import ask_grounded_async, ask_grounded_stream_async, prepare_ask_async
 
 router = APIRouter(prefix="/study-packs", tags=["study_packs"])
 
 
-# -----------------------
-# Helpers
-# -----------------------
-def _with_timestamp(url: str, sec: float) -> str:
-    """
-    Returns a YouTube URL with a timestamp parameter.
-    Works for:
-      - ...watch?v=...&list=...
-      - ...watch?v=...
-    Uses 't=' in seconds.
-    """
-    base = (url or "").strip()
-    if not base:
-        return base
-    try:
-        t = int(max(0.0, float(sec)))
-    except Exception:
-        t = 0
-
-    sep = "&" if "?" in base else "?"
-    # avoid duplicate t=
-    if "t=" in base:
-        return base
-    return f"{base}{sep}t={t}"
-
-
 # -----------------------
 # V1 — Study Packs Library
 # -----------------------
@@ -85,8 +75,20 @@ def list_study_packs(
     source_type: str | None = Query(default=None),
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    # V2.18 — keyset pagination on (created_at, id): pass `next_cursor` back as `cursor`
+    cursor: str | None = Query(default=None),
+    count: str = Query(default="exact", pattern="^(exact|estimate|none)$"),
 ):
-    query = db.query(StudyPack)
+    after = None
+    if cursor:
+        try:
+            key = decode_cursor("packs", cursor)
+            after = (datetime.fromisoformat(key["t"]), int(key["id"]))
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+    # V2.19 — listing returns ~13 small fields; never pull transcripts for 100 rows
+    query = db.query(StudyPack).options(*light_pack_options())
 
     if status:
         query = query.filter(StudyPack.status == status)
@@ -95,23 +97,27 @@ def list_study_packs(
         query = query.filter(StudyPack.source_type == source_type)
 
     if q and q.strip():
+        # V2.18 — one ILIKE over the combined expression (trigram GIN indexed)
+        # instead of five ORed ILIKEs that can only be answered by a seq scan.
         s = f"%{q.strip()}%"
-        query = query.filter(
-            or_(
-                StudyPack.title.ilike(s),
-                StudyPack.source_url.ilike(s),
-                StudyPack.source_id.ilike(s),
-                StudyPack.playlist_title.ilike(s),
-                StudyPack.playlist_id.ilike(s),
-            )
-        )
-
-    total = query.count()
-    rows = (
-        query.order_by(StudyPack.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+        query = query.filter(text(f"{STUDY_PACK_SEARCH_SQL} ILIKE :search_q").bindparams(search_q=s))
+
+    total = count_rows(db, query, count)
+
+    # (created_at DESC, id DESC) walks idx_study_packs_*_created_id backwards;
+    # id breaks created_at ties so keyset pages never skip or repeat rows.
+    page = query.order_by(StudyPack.created_at.desc(), StudyPack.id.desc())
+    if after is not None:
+        # row comparison: an index condition, unlike the equivalent OR/AND form
+        page = page.filter(tuple_(StudyPack.created_at, StudyPack.id) < tuple_(after[0], after[1]))
+    else:
+        page = page.offset(offset)
+    rows = page.limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = (
+        encode_cursor("packs", {"t": rows[-1].created_at.isoformat(), "id": int(rows[-1].id)}) if has_more else None
     )
 
     packs = []
@@ -134,7 +140,16 @@ def list_study_packs(
             }
         )
 
-    return {"ok": True, "total": total, "limit": limit, "offset": offset, "packs": packs}
+    return {
+        "ok": True,
+        "total": total,
+        "total_estimated": count == "estimate",
+        "limit": limit,
+        "offset": offset if after is None else None,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "packs": packs,
+    }
 
 
 @router.post("/from-youtube", response_model=StudyPackFromYoutubeResponse)
@@ -225,78 +240,223 @@ def create_from_youtube(
     )
 
 
+# V2.20 — GET /study-packs/{id}?fields=a,b,c | all
+# The default leaves out the heavy text columns: the pack page only needs
+# metadata on first paint, and the transcript has its own endpoints
+# (/transcript, /transcript/stream).
+_PACK_FIELDS = (
+    "id",
+    "source_type",
+    "source_url",
+    "title",
+    "status",
+    "source_id",
+    "language",
+    "meta_json",
+    "transcript_json",
+    "transcript_text",
+    "error",
+    "created_at",
+    "updated_at",
+    "playlist_id",
+    "playlist_title",
+    "playlist_index",
+)
+_PACK_HEAVY_FIELDS = {"meta_json", "transcript_json", "transcript_text"}
+_PACK_DEFAULT_FIELDS = tuple(f for f in _PACK_FIELDS if f not in _PACK_HEAVY_FIELDS)
+
+
+def _parse_pack_fields(fields: str | None) -> tuple[str, ...]:
+    if fields is None or not fields.strip():
+        return _PACK_DEFAULT_FIELDS
+    if fields.strip() == "all":
+        return _PACK_FIELDS
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = sorted(wanted - set(_PACK_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    wanted.add("id")
+    return tuple(f for f in _PACK_FIELDS if f in wanted)
+
+
 @router.get("/{study_pack_id}")
-def get_study_pack(study_pack_id: int, db: Session = Depends(get_db)):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
+def get_study_pack(
+    study_pack_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    fields: str | None = Query(default=None),
+):
+    wanted = _parse_pack_fields(fields)
+
+    # V2.23 — conditional GET: version from a PK lookup, 304 before loading columns
+    version = pack_version(db, study_pack_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Study pack not found")
+    etag = make_etag("pack", study_pack_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    sp = (
+        db.query(StudyPack)
+        .options(load_only(*[getattr(StudyPack, f) for f in wanted]))
+        .filter(StudyPack.id == study_pack_id)
+        .first()
+    )
     if not sp:
         raise HTTPException(status_code=404, detail="Study pack not found")
 
-    return {
-        "ok": True,
-        "study_pack": {
-            "id": sp.id,
-            "source_type": sp.source_type,
-            "source_url": sp.source_url,
-            "title": sp.title,
+    out = {}
+    for f in wanted:
+        v = getattr(sp, f)
+        out[f] = v.isoformat() if isinstance(v, datetime) else v
+
+    resp = FastJSONResponse({"ok": True, "study_pack": out})
+    set_etag(resp, etag)
+    return resp
+
+
+@router.get("/{study_pack_id}/transcript")
+def get_transcript(study_pack_id: int, request: Request, db: Session = Depends(get_db)):
+    version = pack_version(db, study_pack_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Study pack not found")
+    etag = make_etag("transcript", study_pack_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    sp = (
+        db.query(StudyPack)
+        .options(defer(StudyPack.meta_json), defer(StudyPack.transcript_bin))
+        .filter(StudyPack.id == study_pack_id)
+        .first()
+    )
+    if not sp:
+        raise HTTPException(status_code=404, detail="Study pack not found")
+
+    resp = FastJSONResponse(
+        {
+            "ok": True,
+            "study_pack_id": sp.id,
             "status": sp.status,
             "source_id": sp.source_id,
             "language": sp.language,
-            "meta_json": sp.meta_json,
-            "transcript_json": sp.transcript_json,
             "transcript_text": sp.transcript_text,
-            "error": sp.error,
-            "created_at": sp.created_at.isoformat() if sp.created_at else None,
+            "transcript_json": sp.transcript_json,
             "updated_at": sp.updated_at.isoformat() if sp.updated_at else None,
-            "playlist_id": sp.playlist_id,
-            "playlist_title": sp.playlist_title,
-            "playlist_index": sp.playlist_index,
-        },
-    }
+        }
+    )
+    set_etag(resp, etag)
+    return resp
 
 
-@router.get("/{study_pack_id}/transcript")
-def get_transcript(study_pack_id: int, db: Session = Depends(get_db)):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
-    if not sp:
+@router.get("/{study_pack_id}/transcript/stream")
+def stream_transcript_segments(study_pack_id: int, db: Session = Depends(get_db)):
+    """
+    V2.20 — Transcript segments as NDJSON (one JSON object per line, in order),
+    split by Postgres and streamed through a server-side cursor.
+    """
+    row = (
+        db.query(StudyPack.id, StudyPack.transcript_json.is_(None))
+        .filter(StudyPack.id == study_pack_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Study pack not found")
+    if row[1]:
+        raise HTTPException(status_code=404, detail="Transcript not available")
 
-    return {
-        "ok": True,
-        "study_pack_id": sp.id,
-        "status": sp.status,
-        "source_id": sp.source_id,
-        "language": sp.language,
-        "transcript_text": sp.transcript_text,
-        "transcript_json": sp.transcript_json,
-        "updated_at": sp.updated_at.isoformat() if sp.updated_at else None,
-    }
+    return StreamingResponse(
+        (seg + "\n" for seg in iter_segment_json(study_pack_id)),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/{study_pack_id}/transcript/segments")
+def get_transcript_window(
+    study_pack_id: int,
+    db: Session = Depends(get_db),
+    from_sec: float | None = Query(default=None, alias="from", ge=0.0),
+    to_sec: float | None = Query(default=None, alias="to", ge=0.0),
+    limit: int = Query(default=500, ge=1, le=settings.transcript_window_max_segments),
+):
+    """
+    V2.22 — Only the segments overlapping [from, to] seconds (either bound
+    optional). `i` is the segment's position in the full transcript.
+    """
+    if from_sec is not None and to_sec is not None and from_sec > to_sec:
+        raise HTTPException(status_code=400, detail="from must be <= to")
+
+    out = segments_in_window(db, study_pack_id, from_sec=from_sec, to_sec=to_sec, limit=limit)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Study pack not found")
+    if not out["available"]:
+        raise HTTPException(status_code=404, detail="Transcript not available")
+
+    return FastJSONResponse(
+        {
+            "ok": True,
+            "study_pack_id": study_pack_id,
+            "from": from_sec,
+            "to": to_sec,
+            "segment_count": out["segment_count"],
+            "total": out["total"],
+            "truncated": out["truncated"],
+            "segments": out["segments"],
+        }
+    )
 
 
 @router.get("/{study_pack_id}/transcript/chunks")
 def list_transcript_chunks(
     study_pack_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     q: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    # V2.17 — keyset pagination: pass `next_cursor` back as `cursor` (offset is then ignored)
+    cursor: str | None = Query(default=None),
+    count: str = Query(default="exact", pattern="^(exact|estimate|none)$"),
 ):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
-    if not sp:
+    after_idx = None
+    if cursor:
+        try:
+            key = decode_cursor("chunks", cursor)
+            if int(key["sp"]) != study_pack_id:
+                raise ValueError("Cursor belongs to another study pack")
+            after_idx = int(key["idx"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+    # Chunks are only rewritten together with an embedding_version bump.
+    version = pack_version(db, study_pack_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Study pack not found")
+    etag = make_etag("chunks", study_pack_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     query = db.query(TranscriptChunk).filter(TranscriptChunk.study_pack_id == study_pack_id)
 
     if q and q.strip():
+        # V2.17 — served by idx_transcript_chunks_text_trgm when pg_trgm is installed
         s = f"%{q.strip()}%"
         query = query.filter(TranscriptChunk.text.ilike(s))
 
-    total = query.count()
-    rows = (
-        query.order_by(TranscriptChunk.idx.asc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    total = count_rows(db, query, count)
+
+    # Keyset on uq_transcript_chunks_pack_idx: each page is an index range scan,
+    # however deep. One extra row tells whether there is a next page.
+    page = query.order_by(TranscriptChunk.idx.asc())
+    if after_idx is not None:
+        page = page.filter(TranscriptChunk.idx > after_idx)
+    else:
+        page = page.offset(offset)
+    rows = page.limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor("chunks", {"sp": study_pack_id, "idx": int(rows[-1].idx)}) if has_more else None
 
     items = []
     for r in rows:
@@ -312,14 +472,21 @@ def list_transcript_chunks(
             }
         )
 
-    return {
-        "ok": True,
-        "study_pack_id": study_pack_id,
-        "total": total,
-        "limit": limit,
-        "offset": offset,
-        "items": items,
-    }
+    resp = FastJSONResponse(
+        {
+            "ok": True,
+            "study_pack_id": study_pack_id,
+            "total": total,
+            "total_estimated": count == "estimate",
+            "limit": limit,
+            "offset": offset if after_idx is None else None,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "items": items,
+        }
+    )
+    set_etag(resp, etag)
+    return resp
 
 
 # -----------------------
@@ -343,8 +510,7 @@ def kb_embed(
     req: KBEmbedRequest | None = None,
     db: Session = Depends(get_db),
 ):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
-    if not sp:
+    if not study_pack_exists(db, study_pack_id):
         raise HTTPException(status_code=404, detail="Study pack not found")
 
     model = (req.model if req else None)
@@ -360,8 +526,7 @@ def kb_status(
     db: Session = Depends(get_db),
     model: str | None = Query(default=None),
 ):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
-    if not sp:
+    if not study_pack_exists(db, study_pack_id):
         raise HTTPException(status_code=404, detail="Study pack not found")
 
     q_chunks = db.query(func.count(TranscriptChunk.id)).filter(TranscriptChunk.study_pack_id == study_pack_id)
@@ -390,6 +555,20 @@ class KBSearchItemModel(BaseModel):
     score: float
     distance: float
 
+    # V2.8 — fusion debug info (rank within each candidate list; None = not in list)
+    fused_score: float | None = None
+    sem_rank: int | None = None
+    lex_rank: int | None = None
+    lex_score: float | None = None
+
+    # V2.13 — diversify=true: MMR score and merged span (idx..idx_end)
+    mmr_score: float | None = None
+    idx_end: int | None = None
+    chunk_ids: list[int] | None = None
+
+    # V2.14 — cross-encoder score (only when rerank=true and it ran in budget)
+    rerank_score: float | None = None
+
 
 class KBSearchResponse(BaseModel):
     ok: bool
@@ -398,33 +577,109 @@ class KBSearchResponse(BaseModel):
     q: str
     limit: int
     hybrid: bool
+    fusion: str | None = None
+    diversify: bool = False
+    rerank: bool = False
     items: list[KBSearchItemModel]
 
 
 @router.get("/{study_pack_id}/kb/search", response_model=KBSearchResponse)
 def kb_search(
     study_pack_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     q: str = Query(..., min_length=1),
     model: str = Query(default="sentence-transformers/all-MiniLM-L6-v2"),
     limit: int = Query(default=8, ge=1, le=25),
     hybrid: bool = Query(default=True),
+    # V2.5 — per-query ANN tuning (defaults come from settings)
+    ef_search: int | None = Query(default=None, ge=1, le=1000),
+    iterative_scan: str | None = Query(default=None, pattern="^(off|strict_order|relaxed_order)$"),
+    # V2.8 — hybrid fusion (defaults come from settings)
+    fusion: str | None = Query(default=None, pattern="^(rrf|boost)$"),
+    rrf_k: int | None = Query(default=None, ge=1, le=1000),
+    w_sem: float | None = Query(default=None, ge=0.0),
+    w_lex: float | None = Query(default=None, ge=0.0),
+    # V2.9 — auto | memory (in-process pack index) | pgvector
+    backend: str | None = Query(default=None, pattern="^(auto|memory|pgvector)$"),
+    # V2.12 — false skips the result cache (X-KB-Cache: bypass)
+    cache: bool = Query(default=True),
+    # V2.13 — MMR re-ranking + adjacent-hit merging; lambda: 1 = relevance only
+    diversify: bool = Query(default=False),
+    mmr_lambda: float | None = Query(default=None, alias="lambda", ge=0.0, le=1.0),
+    # V2.14 — cross-encoder re-rank of the top KB_RERANK_TOP_N candidates
+    rerank: bool = Query(default=False),
+    # V2.16 — only chunks overlapping [from_sec, to_sec] (either bound optional)
+    from_sec: float | None = Query(default=None, ge=0.0),
+    to_sec: float | None = Query(default=None, ge=0.0),
 ):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
+    if from_sec is not None and to_sec is not None and from_sec > to_sec:
+        raise HTTPException(status_code=400, detail="from_sec must be <= to_sec")
+
+    sp = get_study_pack_light(db, study_pack_id)
     if not sp:
         raise HTTPException(status_code=404, detail="Study pack not found")
 
-    try:
-        items = kb_search_chunks(
-            db=db,
-            study_pack_id=study_pack_id,
-            q=q,
-            model=model,
-            limit=limit,
-            hybrid=hybrid,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"KB search failed: {e}")
+    # V2.12 — the pack's content version is part of the key, so a re-ingest or
+    # re-embed (which bumps it in the same transaction) makes old entries unreachable.
+    version = int(sp.embedding_version or 0)
+    kb_cache = get_kb_cache()
+    cache_key = kb_cache.key(
+        "search",
+        study_pack_id,
+        version,
+        {
+            "q": q.strip(),
+            "model": model,
+            "limit": limit,
+            "hybrid": hybrid,
+            "ef_search": ef_search,
+            "iterative_scan": iterative_scan,
+            "fusion": fusion or settings.kb_fusion,
+            "rrf_k": rrf_k,
+            "w_sem": w_sem,
+            "w_lex": w_lex,
+            "backend": backend,
+            "diversify": diversify,
+            "lambda": mmr_lambda if mmr_lambda is not None else settings.kb_mmr_lambda,
+            "rerank": rerank,
+            "from_sec": from_sec,
+            "to_sec": to_sec,
+        },
+    )
+    items, cache_status = kb_cache.get(cache_key) if cache else (None, STATUS_BYPASS)
+
+    if items is None:
+        try:
+            items = kb_search_chunks(
+                db=db,
+                study_pack_id=study_pack_id,
+                q=q,
+                model=model,
+                limit=limit,
+                hybrid=hybrid,
+                ef_search=ef_search,
+                iterative_scan=iterative_scan,
+                fusion=fusion,
+                rrf_k=rrf_k,
+                w_sem=w_sem,
+                w_lex=w_lex,
+                backend=backend,
+                diversify=diversify,
+                mmr_lambda=mmr_lambda,
+                rerank=rerank,
+                from_sec=from_sec,
+                to_sec=to_sec,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"KB search failed: {e}")
+        # don't pin a budget-exceeded (un-reranked) fallback in the cache
+        reranked = any(x.get("rerank_score") is not None for x in items)
+        if cache and (reranked or not rerank or not items):
+            kb_cache.put(cache_key, items)
+
+    response.headers["X-KB-Cache"] = cache_status
+    response.headers["X-KB-Content-Version"] = str(version)
 
     return KBSearchResponse(
         ok=True,
@@ -433,15 +688,81 @@ def kb_search(
         q=q,
         limit=limit,
         hybrid=hybrid,
+        fusion=(fusion or settings.kb_fusion) if hybrid else None,
+        diversify=diversify,
+        rerank=rerank,
         items=[KBSearchItemModel(**x) for x in items],
     )
 
 
+# V2.11 — many queries, one embed batch + one SQL round-trip
+class KBBatchSearchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1, max_length=64)
+    model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    limit: int = Field(default=8, ge=1, le=25)
+    hybrid: bool = True
+    fusion: str | None = Field(default=None, pattern="^(rrf|boost)$")
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
+
+
+class KBBatchSearchResult(BaseModel):
+    q: str
+    items: list[KBSearchItemModel]
+
+
+class KBBatchSearchResponse(BaseModel):
+    ok: bool
+    study_pack_id: int
+    model: str
+    limit: int
+    hybrid: bool
+    fusion: str | None = None
+    results: list[KBBatchSearchResult]
+
+
+@router.post("/{study_pack_id}/kb/search:batch", response_model=KBBatchSearchResponse)
+def kb_search_many(
+    study_pack_id: int,
+    req: KBBatchSearchRequest,
+    db: Session = Depends(get_db),
+):
+    if not study_pack_exists(db, study_pack_id):
+        raise HTTPException(status_code=404, detail="Study pack not found")
+
+    try:
+        results = kb_search_batch(
+            db=db,
+            study_pack_id=study_pack_id,
+            queries=req.queries,
+            model=req.model,
+            limit=req.limit,
+            hybrid=req.hybrid,
+            ef_search=req.ef_search,
+            fusion=req.fusion,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"KB batch search failed: {e}")
+
+    return KBBatchSearchResponse(
+        ok=True,
+        study_pack_id=study_pack_id,
+        model=req.model,
+        limit=req.limit,
+        hybrid=req.hybrid,
+        fusion=(req.fusion or settings.kb_fusion) if req.hybrid else None,
+        results=[
+            KBBatchSearchResult(q=q, items=[KBSearchItemModel(**x) for x in items])
+            for q, items in zip(req.queries, results)
+        ],
+    )
+
+
 # -----------------------
 # V2.4 — KB (Q&A)
 # -----------------------
 class KBAskRequest(BaseModel):
-    question: str
+    # V2.29 — bounded so the question can't crowd the excerpts out of KB_QA_CONTEXT_TOKENS
+    question: str = Field(..., max_length=2000)
 
     # LLM (Ollama) model
     model: str | None = None
@@ -451,60 +772,121 @@ class KBAskRequest(BaseModel):
 
     limit: int | None = 6
     hybrid: bool | None = True
+    fusion: str | None = Field(default=None, pattern="^(rrf|boost)$")  # default: settings
+    diversify: bool | None = True  # V2.13 MMR + span merging of the context
+    mmr_lambda: float | None = Field(default=None, ge=0.0, le=1.0)
+    rerank: bool | None = None  # V2.14 cross-encoder re-rank (default: KB_RERANK)
+    context_window: int | None = None  # V2.15 idx±w neighbours per hit (default: settings)
+    # V2.16 — restrict retrieval to a time window (e.g. a chapter, the last 10 minutes)
+    from_sec: float | None = None
+    to_sec: float | None = None
     min_best_score: float | None = 0.52
+    cache: bool | None = True  # V2.28 answer cache (false = always generate)
+
+
+def _ask_citations_out(sp: StudyPack, citations) -> list[dict]:
+    base_url = sp.source_url or ""
+    return [
+        {
+            "chunk_id": c.chunk_id,
+            "idx": c.idx,
+            "idx_end": c.idx_end,
+            "start_sec": c.start_sec,
+            "end_sec": c.end_sec,
+            "text": c.text,
+            "score": c.score,
+            "url": with_timestamp(base_url, c.start_sec),  # ✅ V2.4
+        }
+        for c in (citations or [])
+    ]
+
+
+def _ask_study_pack_out(sp: StudyPack) -> dict:
+    # ✅ V2.4 convenience payload for frontend
+    return {
+        "id": sp.id,
+        "title": sp.title,
+        "source_url": sp.source_url,
+        "source_type": sp.source_type,
+        "playlist_id": sp.playlist_id,
+        "playlist_index": sp.playlist_index,
+    }
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode("ascii") + b"\ndata: " + dumps(data) + b"\n\n"
 
 
 @router.post("/{study_pack_id}/kb/ask")
-def kb_ask(
+async def kb_ask(
     study_pack_id: int,
     req: KBAskRequest,
-    db: Session = Depends(get_db),
+    # V2.25 — Server-Sent Events: citations, then token deltas, then `done`
+    stream: bool = Query(default=False),
 ):
-    sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).first()
+    """
+    V2.27 — async: the pack lookup uses the async engine, retrieval runs on the
+    bounded KB_RETRIEVAL_WORKERS pool and generation awaits the async Ollama
+    client, so in-flight questions don't occupy the sync threadpool.
+    """
+    if req.from_sec is not None and req.to_sec is not None and req.from_sec > req.to_sec:
+        raise HTTPException(status_code=400, detail="from_sec must be <= to_sec")
+
+    # Short-lived session: a request-scoped one would keep its pooled
+    # connection checked out through the whole LLM call.
+    async with get_async_sessionmaker()() as db:
+        sp = await get_study_pack_light_async(db, study_pack_id)
     if not sp:
         raise HTTPException(status_code=404, detail="Study pack not found")
 
-    res = ask_grounded(
-        db=db,
+    ask_args = dict(
         study_pack_id=study_pack_id,
         question=req.question,
         model=req.model,
         embed_model=req.embed_model,
         limit=int(req.limit or 6),
         hybrid=bool(req.hybrid if req.hybrid is not None else True),
+        fusion=req.fusion,
+        diversify=bool(req.diversify if req.diversify is not None else True),
+        mmr_lambda=req.mmr_lambda,
+        rerank=req.rerank,
+        context_window=req.context_window,
+        from_sec=req.from_sec,
+        to_sec=req.to_sec,
         min_best_score=float(req.min_best_score or 0.52),
+        use_cache=bool(req.cache if req.cache is not None else True),
     )
 
-    base_url = sp.source_url or ""
-    citations_out = []
-    for c in (res.citations or []):
-        citations_out.append(
-            {
-                "chunk_id": c.chunk_id,
-                "idx": c.idx,
-                "start_sec": c.start_sec,
-                "end_sec": c.end_sec,
-                "text": c.text,
-                "score": c.score,
-                "url": _with_timestamp(base_url, c.start_sec),  # ✅ V2.4
-            }
+    if stream:
+        # Retrieval finishes before the response starts; the body only talks to Ollama.
+        prep = await prepare_ask_async(**ask_args)
+        head = {
+            "study_pack_id": study_pack_id,
+            "study_pack": _ask_study_pack_out(sp),
+            "citations": _ask_citations_out(sp, prep.citations),
+        }
+
+        async def events():
+            async for event, data in ask_grounded_stream_async(prep):
+                yield _sse(event, head if event == "citations" else data)
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
+    res = await ask_grounded_async(**ask_args)
+
     return {
         "ok": True,
         "study_pack_id": study_pack_id,
         "refused": bool(res.refused),
+        "cached": bool(res.cached),  # V2.28
         "answer": res.answer,
         "model": res.model,
         "embed_model": (req.embed_model or None),  # ✅ V2.4 (echo)
-        "study_pack": {  # ✅ V2.4 convenience payload for frontend
-            "id": sp.id,
-            "title": sp.title,
-            "source_url": sp.source_url,
-            "source_type": sp.source_type,
-            "playlist_id": sp.playlist_id,
-            "playlist_index": sp.playlist_index,
-        },
-        "citations": citations_out,
+        "study_pack": _ask_study_pack_out(sp),
+        "citations": _ask_citations_out(sp, res.citations),
         "retrieval": res.retrieval,
     }
\ No newline at end of file
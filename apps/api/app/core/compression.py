@@ -0,0 +1,166 @@
+# apps/api/app/core/compression.py
+from __future__ import annotations
+
+import zlib
+from typing import Any, Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # type: ignore
+except Exception:  # optional: gzip is always available
+    brotli = None
+
+
+# -----------------------------
+# V2.23 — Response compression (br when the client accepts it and the brotli
+# package is installed, else gzip). Bodies under `minimum_size` go out as-is;
+# streamed bodies (NDJSON) are compressed chunk by chunk with a sync flush so
+# each line still reaches the client promptly. text/event-stream is left alone.
+#
+# Like nginx, a strong ETag on a compressed body is downgraded to W/"..." (the
+# bytes differ per encoding); If-None-Match handling accepts both forms.
+# Every response that could have been compressed carries Vary: Accept-Encoding
+# (identity ones too: small bodies, clients without gzip/br), so shared caches
+# never hand one encoding to a client that asked for another.
+# -----------------------------
+
+_SKIP_TYPES = ("text/event-stream",)
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int) -> None:
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush()
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.finish()
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        q = params.strip()
+        return not (q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"))
+    return False
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ) -> None:
+        self.app = app
+        self.minimum_size = int(minimum_size)
+        self.gzip_level = int(gzip_level)
+        self.brotli_quality = int(brotli_quality)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept, "br"):
+            make = lambda: _BrotliEncoder(self.brotli_quality)  # noqa: E731
+        elif _accepts(accept, "gzip"):
+            make = lambda: _GzipEncoder(self.gzip_level)  # noqa: E731
+        else:
+            make = None  # identity, but the response still varies on Accept-Encoding
+
+        await _CompressingResponder(self.app, self.minimum_size, make)(scope, receive, send)
+
+
+class _CompressingResponder:
+    def __init__(self, app: ASGIApp, minimum_size: int, make_encoder: Optional[Callable[[], Any]]) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.make_encoder = make_encoder
+        self.send: Send
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+        self.started = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self._send)
+
+    def _encoded_headers(self, length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoder.name
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    async def _send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            ctype = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or ctype.startswith(_SKIP_TYPES)
+            if not self.passthrough:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                self.passthrough = self.make_encoder is None
+            if self.passthrough:
+                self.started = True
+                await self.send(message)
+            return
+
+        if kind != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if not more and len(body) < self.minimum_size:
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.encoder = self.make_encoder()
+            if not more:
+                data = self.encoder.finish(body)
+                self._encoded_headers(len(data))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            self._encoded_headers(None)
+            await self.send(self.start)
+
+        if self.encoder is None:
+            await self.send(message)
+            return
+        data = self.encoder.chunk(body) if more else self.encoder.finish(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more})
@@ -30,5 +30,106 @@ class Settings:
         "sentence-transformers/all-MiniLM-L6-v2",
     )
 
+    # V2.5 — ANN (pgvector HNSW) query-time tuning
+    # ef_search: candidate list size per query (higher = better recall, slower)
+    # iterative_scan: off | strict_order | relaxed_order (pgvector >= 0.8).
+    #   Keeps scanning the index when WHERE filters (pack/model) drop candidates.
+    #   With "off" the pack filter runs on at most ef_search index rows, so a
+    #   pack-scoped search can return fewer than k rows when many packs share
+    #   the index. Searches raise ef_search to at least k, which doesn't help
+    #   when the pack's rows are a small share of the index. Use relaxed_order
+    #   on pgvector >= 0.8. The default stays "off" because older pgvector
+    #   rejects the setting.
+    kb_hnsw_ef_search: int = int(os.getenv("KB_HNSW_EF_SEARCH", "64"))
+    kb_hnsw_iterative_scan: str = os.getenv("KB_HNSW_ITERATIVE_SCAN", "off")
+    # V2.10 — cross-pack search filters after the index walk; search wider by default
+    kb_library_ef_search: int = int(os.getenv("KB_LIBRARY_EF_SEARCH", "200"))
+
+    # V2.7 — hybrid: score += weight * ts_rank_cd (normalised to [0, 1))
+    kb_lexical_weight: float = float(os.getenv("KB_LEXICAL_WEIGHT", "0.15"))
+
+    # V2.8 — hybrid fusion: rrf (independent candidate lists) | boost (V2.7)
+    kb_fusion: str = os.getenv("KB_FUSION", "rrf")
+    kb_rrf_k: int = int(os.getenv("KB_RRF_K", "60"))
+    kb_rrf_semantic_weight: float = float(os.getenv("KB_RRF_SEMANTIC_WEIGHT", "1.0"))
+    kb_rrf_lexical_weight: float = float(os.getenv("KB_RRF_LEXICAL_WEIGHT", "1.0"))
+    kb_rrf_candidates: int = int(os.getenv("KB_RRF_CANDIDATES", "40"))
+
+    # V2.9 — in-process per-pack vector index (NumPy brute force, LRU by bytes)
+    kb_pack_index_enabled: bool = os.getenv("KB_PACK_INDEX", "1") == "1"
+    kb_pack_index_max_bytes: int = int(os.getenv("KB_PACK_INDEX_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # V2.12 — versioned result cache: memory (per-process LRU) | redis | off
+    kb_cache_backend: str = os.getenv("KB_CACHE", "memory")
+    kb_cache_max_entries: int = int(os.getenv("KB_CACHE_MAX_ENTRIES", "2048"))
+    kb_cache_ttl_sec: int = int(os.getenv("KB_CACHE_TTL_SEC", "3600"))
+    kb_cache_redis_url: str = os.getenv(
+        "KB_CACHE_REDIS_URL",
+        os.getenv("REDIS_URL", "redis://localhost:6379/1"),
+    )
+    kb_cache_prefix: str = os.getenv("KB_CACHE_PREFIX", "ylc:kb")
+
+    # V2.13 — diversification: MMR trade-off (1 = relevance only), candidate pool
+    # = limit * pool_factor, and max idx gap for merging hits into one span
+    kb_mmr_lambda: float = float(os.getenv("KB_MMR_LAMBDA", "0.7"))
+    kb_mmr_pool_factor: int = int(os.getenv("KB_MMR_POOL_FACTOR", "3"))
+    kb_merge_max_gap: int = int(os.getenv("KB_MERGE_MAX_GAP", "1"))
+
+    # V2.14 — optional cross-encoder re-rank (KB_RERANK=1 turns it on for QA)
+    kb_rerank_enabled: bool = os.getenv("KB_RERANK", "0") == "1"
+    kb_rerank_model: str = os.getenv("KB_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    kb_rerank_onnx_path: str = os.getenv("KB_RERANK_ONNX_PATH", "")  # set = ONNX Runtime instead of torch
+    kb_rerank_top_n: int = int(os.getenv("KB_RERANK_TOP_N", "20"))
+    kb_rerank_budget_ms: int = int(os.getenv("KB_RERANK_BUDGET_MS", "250"))
+    kb_rerank_cache_size: int = int(os.getenv("KB_RERANK_CACHE_SIZE", "20000"))
+    # passes queued + running on the single rerank thread; more = skip ("busy")
+    kb_rerank_max_pending: int = int(os.getenv("KB_RERANK_MAX_PENDING", "2"))
+    # QA context size when the re-rank applied (precise order -> fewer chunks needed)
+    kb_rerank_context_k: int = int(os.getenv("KB_RERANK_CONTEXT_K", "4"))
+
+    # V2.15 — QA context: idx±window neighbours per hit, merged into spans and
+    # bounded per span (characters)
+    kb_qa_context_window: int = int(os.getenv("KB_QA_CONTEXT_WINDOW", "1"))
+    kb_qa_max_span_chars: int = int(os.getenv("KB_QA_MAX_SPAN_CHARS", "1800"))
+
+    # V2.29 — QA prompt budget in tokens (instructions + question + excerpts);
+    # excerpts are deduped and packed into what's left. KB_QA_TOKENIZER names a
+    # Hugging Face tokenizer matching the LLM (needs transformers); empty = estimate.
+    kb_qa_context_tokens: int = int(os.getenv("KB_QA_CONTEXT_TOKENS", "1800"))
+    kb_qa_tokenizer: str = os.getenv("KB_QA_TOKENIZER", "")
+    kb_qa_dedupe_ngram: int = int(os.getenv("KB_QA_DEDUPE_NGRAM", "8"))
+
+    # V2.22 — decoded transcripts kept per process for /transcript/segments
+    # (LRU by bytes, validated against study_packs.updated_at)
+    transcript_cache_max_bytes: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    transcript_window_max_segments: int = int(os.getenv("TRANSCRIPT_WINDOW_MAX_SEGMENTS", "2000"))
+
+    # V2.23 — response compression (br if the brotli package is installed, else gzip)
+    http_compression_enabled: bool = os.getenv("HTTP_COMPRESSION", "1") == "1"
+    http_compression_min_bytes: int = int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", "1024"))
+    http_gzip_level: int = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+    http_brotli_quality: int = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))
+
+    # V2.26 — pooled outbound HTTP clients (Ollama / OpenAI), per upstream
+    http_pool_max_connections: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "64"))
+    http_pool_max_keepalive: int = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "16"))
+    http_pool_keepalive_expiry_sec: float = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY_SEC", "60"))
+
+    # V2.27 — async kb/ask: DB pool for the async engine, and the bounded thread
+    # pool that runs retrieval (query embedding, vector search, re-rank)
+    async_db_pool_size: int = int(os.getenv("ASYNC_DB_POOL_SIZE", "10"))
+    async_db_max_overflow: int = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10"))
+    kb_retrieval_workers: int = int(os.getenv("KB_RETRIEVAL_WORKERS", "4"))
+
+    # V2.28 — grounded-answer cache (backend kind follows KB_CACHE). Exact tier:
+    # same normalised question + evidence; semantic tier: question embedding
+    # cosine >= threshold with the same evidence (up to N questions per evidence set)
+    kb_answer_cache_enabled: bool = os.getenv("KB_ANSWER_CACHE", "1") == "1"
+    kb_answer_cache_ttl_sec: int = int(os.getenv("KB_ANSWER_CACHE_TTL_SEC", "86400"))
+    kb_answer_cache_max_entries: int = int(os.getenv("KB_ANSWER_CACHE_MAX_ENTRIES", "4096"))
+    kb_answer_cache_semantic: bool = os.getenv("KB_ANSWER_CACHE_SEMANTIC", "1") == "1"
+    kb_answer_cache_sim_threshold: float = float(os.getenv("KB_ANSWER_CACHE_SIM_THRESHOLD", "0.92"))
+    kb_answer_cache_semantic_per_evidence: int = int(os.getenv("KB_ANSWER_CACHE_SEMANTIC_PER_EVIDENCE", "16"))
+
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,68 @@
+# apps/api/app/core/responses.py
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+try:
+    import orjson  # type: ignore
+except Exception:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+# -----------------------------
+# V2.24 — Fast JSON responses
+#
+# FastJSONResponse is the app's default response class. With orjson installed
+# it renders dicts/lists/str/datetime/NumPy natively (anything else goes
+# through jsonable_encoder as `default`), several times faster than
+# json.dumps. Heavy endpoints return it directly so FastAPI's jsonable_encoder
+# pass over the whole payload is skipped as well.
+#
+# json_fragment() splices a JSON text column (already valid JSON, written by
+# json.dumps) into a response as-is via orjson.Fragment, instead of
+# json.loads + re-serialising it. Older rows can hold NaN / Infinity, which
+# json.dumps writes by default but is not JSON. Those rows, and any row that
+# looks like one, take the parse path instead: non-finite numbers become null
+# (unparseable text, None). Rows are otherwise trusted as json.dumps output;
+# new rows are written strictly (study_materials._dumps_finite).
+# -----------------------------
+
+_HAS_FRAGMENT = orjson is not None and hasattr(orjson, "Fragment")
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=jsonable_encoder,
+    ).encode("utf-8")
+
+
+_NON_FINITE = ("NaN", "Infinity")
+
+
+def json_fragment(raw: str | bytes | None) -> Any:
+    """Pre-serialised JSON for a FastJSONResponse payload (None for empty / invalid input)."""
+    if not raw:
+        return None
+    text = raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
+    if _HAS_FRAGMENT and not any(tok in text for tok in _NON_FINITE):
+        return orjson.Fragment(raw)
+    try:
+        return json.loads(text, parse_constant=lambda _c: None)
+    except Exception:
+        return None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
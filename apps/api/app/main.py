@@ -1,19 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.db.session import dispose_async_engine, get_db
+from app.services.http_clients import aclose_clients, pool_stats
+from app.services import kb_rerank
 from app.api.jobs import router as jobs_router
 from app.api.study_packs import router as study_packs_router
 from app.api.study_materials import router as study_materials_router
+from app.api.kb import router as kb_router
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI(title="YouTube Learning Copilot API", version="0.0.2")  # ✅ bumped
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.kb_rerank_enabled:
+        # V2.14 — load the cross-encoder before traffic, not inside a request's budget
+        await asyncio.to_thread(kb_rerank.warm_up)
+    yield
+    # V2.26 — pooled Ollama / OpenAI clients (app.services.http_clients)
+    await aclose_clients()
+    # V2.27 — async engine (kb/ask)
+    await dispose_async_engine()
+
+
+app = FastAPI(
+    title="YouTube Learning Copilot API",
+    version="0.0.2",  # ✅ bumped
+    default_response_class=FastJSONResponse,  # V2.24 — orjson when installed
+    lifespan=lifespan,
+)
 app.include_router(jobs_router)
 app.include_router(study_packs_router)
 app.include_router(study_materials_router)
+app.include_router(kb_router)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -23,7 +50,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+if settings.http_compression_enabled:
+    # V2.23 — added last = outermost: compresses after CORS headers are set
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.http_compression_min_bytes,
+        gzip_level=settings.http_gzip_level,
+        brotli_quality=settings.http_brotli_quality,
+    )
 
 
 class HealthResponse(BaseModel):
@@ -48,4 +84,10 @@ def health() -> HealthResponse:
         except Exception:
             pass
 
-    return HealthResponse(ok=True, service="api", version=app.version, db_ok=db_ok)
\ No newline at end of file
+    return HealthResponse(ok=True, service="api", version=app.version, db_ok=db_ok)
+
+
+@app.get("/health/http-clients")
+def http_client_stats() -> dict:
+    """V2.26 — connection reuse per upstream pool (requests vs new connections)."""
+    return {"ok": True, "pools": pool_stats()}
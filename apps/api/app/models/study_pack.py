@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Index, Integer, LargeBinary, String, Text
 from sqlalchemy.sql import func
 from sqlalchemy.types import DateTime
 
@@ -10,6 +10,17 @@ from sqlalchemy.types import DateTime
 from app.db.base_class import Base
 
 
+# V2.18 — library search expression. The listing filters `<expr> ILIKE '%q%'`
+# and idx_study_packs_search_trgm (pg_trgm, migration f5c1d8e3a742) indexes the
+# same expression, so keep both in sync. chr(10) separates fields so a match
+# can't straddle two of them.
+STUDY_PACK_SEARCH_SQL = (
+    "(coalesce(title, '') || chr(10) || coalesce(source_url, '') || chr(10) || "
+    "coalesce(source_id, '') || chr(10) || coalesce(playlist_title, '') || chr(10) || "
+    "coalesce(playlist_id, ''))"
+)
+
+
 class StudyPack(Base):
     __tablename__ = "study_packs"
 
@@ -26,6 +37,9 @@ class StudyPack(Base):
     meta_json = Column(Text, nullable=True)
     transcript_json = Column(Text, nullable=True)
     transcript_text = Column(Text, nullable=True)
+    # V2.21 — same segments as transcript_json, columnar + compressed
+    # (app.services.transcript_codec); NULL for rows not yet backfilled.
+    transcript_bin = Column(LargeBinary, nullable=True)
 
     playlist_id = Column(String, nullable=True)
     playlist_title = Column(String, nullable=True)
@@ -33,5 +47,16 @@ class StudyPack(Base):
 
     error = Column(Text, nullable=True)
 
+    # V2.9 — bumped whenever this pack's embedding set changes (embed / re-ingest).
+    # In-process vector indexes (kb_search) compare against it to invalidate.
+    embedding_version = Column(Integer, nullable=False, server_default="0", default=0)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # V2.18 — keyset listing order (created_at DESC, id DESC), optionally filtered
+    __table_args__ = (
+        Index("idx_study_packs_created_id", "created_at", "id"),
+        Index("idx_study_packs_status_created_id", "status", "created_at", "id"),
+        Index("idx_study_packs_source_type_created_id", "source_type", "created_at", "id"),
+    )
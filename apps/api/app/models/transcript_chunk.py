@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, Column, Float, ForeignKey, Index, Integer, Text, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Computed, Float, ForeignKey, Index, Integer, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
+# V2.7 — text search config used by the generated tsvector column and by every
+# lexical query (websearch_to_tsquery must use the same config to match).
+FTS_CONFIG = "english"
+
 
 class TranscriptChunk(Base):
     __tablename__ = "transcript_chunks"
@@ -23,10 +28,16 @@ class TranscriptChunk(Base):
     end_sec = Column(Float, nullable=False)
     text = Column(Text, nullable=False)
 
+    # V2.7 — generated lexical index column (GIN); never written by the app
+    text_tsv = Column(TSVECTOR, Computed(f"to_tsvector('{FTS_CONFIG}', text)", persisted=True))
+
     study_pack = relationship("StudyPack", backref="transcript_chunks")
 
     __table_args__ = (
         UniqueConstraint("study_pack_id", "idx", name="uq_transcript_chunks_pack_idx"),
         Index("idx_transcript_chunks_pack", "study_pack_id"),
         Index("idx_transcript_chunks_time", "study_pack_id", "start_sec", "end_sec"),
+        Index("idx_transcript_chunks_tsv", "text_tsv", postgresql_using="gin"),
+        # V2.17 — idx_transcript_chunks_text_trgm (gin_trgm_ops on text) is created by
+        # migration e2a7c4b9d513 only where pg_trgm is available, so it is not declared here.
     )
\ No newline at end of file
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, UniqueConstraint, Index
+from sqlalchemy import BigInteger, CheckConstraint, Column, DateTime, ForeignKey, Integer, String, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
 
 from app.db.base_class import Base
 
@@ -40,8 +40,11 @@ class TranscriptChunkEmbedding(Base):
     model = Column(String(128), nullable=False, default="unknown")
     dim = Column(Integer, nullable=False)
 
-    # pgvector column (use a fixed dimension for now; V2 uses 384)
-    embedding = Column(Vector(384), nullable=False)
+    # V2.6 — untyped pgvector columns; exactly one is set per row.
+    # Storage (float32 vs float16) + dim are chosen per model from
+    # app.services.embedding_store.EMBED_MODEL_REGISTRY.
+    embedding = Column(Vector(), nullable=True)  # float32
+    embedding_half = Column(HALFVEC(), nullable=True)  # float16 (~2x smaller rows + index)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -54,4 +57,5 @@ class TranscriptChunkEmbedding(Base):
         UniqueConstraint("chunk_id", "model", name="uq_chunk_embeddings_chunk_model"),
         Index("idx_chunk_embeddings_pack", "study_pack_id"),
         Index("idx_chunk_embeddings_chunk", "chunk_id"),
+        CheckConstraint("num_nonnulls(embedding, embedding_half) = 1", name="ck_chunk_embeddings_one_storage"),
     )
\ No newline at end of file
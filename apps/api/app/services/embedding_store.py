@@ -0,0 +1,129 @@
+# apps/api/app/services/embedding_store.py
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# -----------------------------
+# V2.6 — Model-agnostic embedding storage
+#
+# transcript_chunk_embeddings has two *untyped* vector columns:
+#   - embedding       vector   (float32, 4 bytes/dim)
+#   - embedding_half  halfvec  (float16, 2 bytes/dim)
+# Exactly one is set per row. Which one (and the expected dim) comes from the
+# model registry below. ANN indexes are partial expression indexes per
+# (storage, dim), e.g.:
+#   USING hnsw ((embedding_half::halfvec(384)) halfvec_cosine_ops) WHERE dim = 384
+# so every query must cast to the same typed expression and filter on dim.
+# -----------------------------
+
+STORAGE_VECTOR = "vector"
+STORAGE_HALFVEC = "halfvec"
+
+# pgvector HNSW limits
+_MAX_INDEX_DIMS = {STORAGE_VECTOR: 2000, STORAGE_HALFVEC: 4000}
+
+# Storage for models that are not in the registry.
+DEFAULT_EMBED_STORAGE = (os.getenv("YLC_EMBED_STORAGE", STORAGE_HALFVEC).strip().lower() or STORAGE_HALFVEC)
+
+_HNSW_M = 16
+_HNSW_EF_CONSTRUCTION = 64
+
+
+@dataclass(frozen=True)
+class EmbedModelSpec:
+    name: str
+    dim: int
+    storage: str = STORAGE_HALFVEC
+
+    @property
+    def column(self) -> str:
+        return "embedding_half" if self.storage == STORAGE_HALFVEC else "embedding"
+
+    @property
+    def sql_type(self) -> str:
+        return f"{self.storage}({int(self.dim)})"
+
+    @property
+    def ops_class(self) -> str:
+        return f"{self.storage}_cosine_ops"
+
+    @property
+    def index_name(self) -> str:
+        return f"idx_chunk_embeddings_hnsw_{self.storage}_{int(self.dim)}"
+
+    def vector_sql(self, alias: Optional[str] = "tce") -> str:
+        """Typed column expression matching the partial ANN index."""
+        col = f"{alias}.{self.column}" if alias else self.column
+        return f"({col}::{self.sql_type})"
+
+    def query_sql(self, param: str = "qvec") -> str:
+        """Bound text literal cast to the same type as vector_sql()."""
+        return f"(:{param})::{self.sql_type}"
+
+
+# Known models. Changing a model's storage later requires moving its rows
+# (see alembic b7d2e4f81c95 for the pattern).
+EMBED_MODEL_REGISTRY: Dict[str, EmbedModelSpec] = {
+    spec.name: spec
+    for spec in [
+        EmbedModelSpec("sentence-transformers/all-MiniLM-L6-v2", 384, STORAGE_HALFVEC),
+        EmbedModelSpec("sentence-transformers/all-MiniLM-L12-v2", 384, STORAGE_HALFVEC),
+        EmbedModelSpec("sentence-transformers/all-mpnet-base-v2", 768, STORAGE_HALFVEC),
+        EmbedModelSpec("BAAI/bge-small-en-v1.5", 384, STORAGE_HALFVEC),
+        EmbedModelSpec("BAAI/bge-base-en-v1.5", 768, STORAGE_HALFVEC),
+    ]
+}
+
+
+def resolve_model_spec(model: str, dim: Optional[int] = None) -> EmbedModelSpec:
+    """
+    Registry lookup; unknown models fall back to (observed dim, DEFAULT_EMBED_STORAGE).
+
+    Raises ValueError when the dim is unknown or does not match the registry.
+    """
+    name = (model or "").strip()
+    spec = EMBED_MODEL_REGISTRY.get(name)
+    if spec is None:
+        if not dim:
+            raise ValueError(f"Unknown embedding model {name!r} and no dim given")
+        storage = DEFAULT_EMBED_STORAGE if DEFAULT_EMBED_STORAGE in _MAX_INDEX_DIMS else STORAGE_HALFVEC
+        spec = EmbedModelSpec(name, int(dim), storage)
+
+    if dim is not None and int(dim) != spec.dim:
+        raise ValueError(f"Unexpected embedding dim={dim} (expected {spec.dim}) for model={name}")
+    if spec.dim <= 0 or spec.dim > _MAX_INDEX_DIMS[spec.storage]:
+        raise ValueError(f"dim={spec.dim} not indexable as {spec.storage} (max {_MAX_INDEX_DIMS[spec.storage]})")
+    return spec
+
+
+def ensure_ann_index(db: Session, spec: EmbedModelSpec) -> None:
+    """
+    Create the partial HNSW index for (storage, dim) if missing.
+
+    Runs on a separate AUTOCOMMIT connection so it can be CONCURRENTLY
+    (no write lock on the table while other packs keep embedding).
+    Call it with no open transaction on `db`: CONCURRENTLY waits for older
+    snapshots to finish, including the caller's own.
+    """
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_indexes WHERE tablename = 'transcript_chunk_embeddings' AND indexname = :n"),
+            {"n": spec.index_name},
+        ).first()
+        if exists:
+            return
+
+        conn.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {spec.index_name} "
+                f"ON transcript_chunk_embeddings USING hnsw ({spec.vector_sql(alias=None)} {spec.ops_class}) "
+                f"WITH (m = {_HNSW_M}, ef_construction = {_HNSW_EF_CONSTRUCTION}) "
+                f"WHERE dim = {int(spec.dim)}"
+            )
+        )
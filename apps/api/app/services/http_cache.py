@@ -0,0 +1,78 @@
+# apps/api/app/services/http_cache.py
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# -----------------------------
+# V2.23 — Conditional GET for pack endpoints
+#
+# Pack payloads change only on ingest / chunk replace / embed (updated_at and
+# embedding_version) or when materials are (re)generated. The endpoints read
+# those from one PK lookup, derive a strong ETag (+ the query string, since
+# fields/cursor/limit change the representation) and answer If-None-Match with
+# 304 before any heavy column is loaded.
+# -----------------------------
+
+CACHE_CONTROL = "private, no-cache"  # always revalidate; 304 is cheap
+
+_PACK_VERSION_SQL = "SELECT updated_at, embedding_version FROM study_packs WHERE id = :id"
+
+_MATERIALS_VERSION_SQL = """
+    SELECT sp.updated_at, sp.embedding_version,
+           (SELECT count(*) FROM study_materials m WHERE m.study_pack_id = sp.id),
+           (SELECT max(m.updated_at) FROM study_materials m WHERE m.study_pack_id = sp.id)
+    FROM study_packs sp
+    WHERE sp.id = :id
+"""
+
+
+def pack_version(db: Session, study_pack_id: int) -> Optional[Tuple[Any, ...]]:
+    """(updated_at, embedding_version) or None if the pack doesn't exist."""
+    row = db.execute(text(_PACK_VERSION_SQL), {"id": study_pack_id}).first()
+    return tuple(row) if row is not None else None
+
+
+def materials_version(db: Session, study_pack_id: int) -> Optional[Tuple[Any, ...]]:
+    """Pack version + (count, max(updated_at)) of its materials; None if no pack."""
+    row = db.execute(text(_MATERIALS_VERSION_SQL), {"id": study_pack_id}).first()
+    return tuple(row) if row is not None else None
+
+
+def make_etag(kind: str, study_pack_id: int, version: Tuple[Any, ...], request: Request) -> str:
+    raw = "|".join([kind, str(study_pack_id), *(str(v) for v in version), str(request.url.query)])
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison (RFC 9110 13.1.2): W/"x" matches "x".
+    The compression middleware weakens ETags on encoded bodies, so clients
+    may send either form back.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,171 @@
+# apps/api/app/services/http_clients.py
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+
+
+# -----------------------------
+# V2.26 — Process-wide pooled HTTP clients
+#
+# One httpx.Client / httpx.AsyncClient per upstream ("ollama", "openai"),
+# created on first use and kept for the life of the process so calls reuse
+# keep-alive connections instead of paying TCP (+TLS) setup every time.
+# Per-call timeouts are passed on each request; the pool limits come from
+# settings.
+#
+# Reuse is measured with httpx's "trace" request extension: every request is
+# counted and every new TCP connection is counted, so
+# reused = requests - new connections.
+#
+# Shutdown: the API closes both kinds in its shutdown hook; sync clients are
+# also closed at interpreter exit (Celery workers).
+# -----------------------------
+
+_CONNECT_DONE = "connection.connect_tcp.complete"
+_TLS_DONE = "connection.start_tls.complete"
+
+
+class _PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def on_trace(self, event: str) -> None:
+        if event == _CONNECT_DONE:
+            with self._lock:
+                self.connections += 1
+        elif event == _TLS_DONE:
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.requests, 4) if self.requests else None,
+            }
+
+
+_lock = threading.Lock()
+_sync_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_stats: Dict[str, _PoolStats] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(settings.http_pool_max_connections),
+        max_keepalive_connections=int(settings.http_pool_max_keepalive),
+        keepalive_expiry=float(settings.http_pool_keepalive_expiry_sec),
+    )
+
+
+def _stats_for(name: str) -> _PoolStats:
+    st = _stats.get(name)
+    if st is None:
+        st = _stats[name] = _PoolStats()
+    return st
+
+
+def get_sync_client(name: str) -> httpx.Client:
+    client = _sync_clients.get(name)
+    if client is not None and not client.is_closed:
+        return client
+    with _lock:
+        client = _sync_clients.get(name)
+        if client is None or client.is_closed:
+            st = _stats_for(name)
+
+            def trace(event: str, info: Dict[str, Any]) -> None:
+                st.on_trace(event)
+
+            def on_request(request: httpx.Request) -> None:
+                st.on_request()
+                request.extensions["trace"] = trace
+
+            client = httpx.Client(
+                limits=_limits(),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                event_hooks={"request": [on_request]},
+            )
+            _sync_clients[name] = client
+        return client
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    """Async pool for `name`. Bound to the running event loop: use it from the API process only."""
+    client = _async_clients.get(name)
+    if client is not None and not client.is_closed:
+        return client
+    with _lock:
+        client = _async_clients.get(name)
+        if client is None or client.is_closed:
+            st = _stats_for(name)
+
+            async def trace(event: str, info: Dict[str, Any]) -> None:
+                st.on_trace(event)
+
+            async def on_request(request: httpx.Request) -> None:
+                st.on_request()
+                request.extensions["trace"] = trace
+
+            client = httpx.AsyncClient(
+                limits=_limits(),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                event_hooks={"request": [on_request]},
+            )
+            _async_clients[name] = client
+        return client
+
+
+def pool_stats() -> Dict[str, Any]:
+    with _lock:
+        names = sorted(_stats)
+        open_sync = {n for n, c in _sync_clients.items() if not c.is_closed}
+        open_async = {n for n, c in _async_clients.items() if not c.is_closed}
+    return {
+        n: {**_stats[n].snapshot(), "sync_open": n in open_sync, "async_open": n in open_async}
+        for n in names
+    }
+
+
+def close_sync_clients() -> None:
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for c in clients:
+        try:
+            c.close()
+        except Exception:
+            pass
+
+
+async def aclose_clients() -> None:
+    with _lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for c in clients:
+        try:
+            await c.aclose()
+        except Exception:
+            pass
+    close_sync_clients()
+
+
+atexit.register(close_sync_clients)
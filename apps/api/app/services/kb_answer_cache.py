@@ -0,0 +1,152 @@
+# apps/api/app/services/kb_answer_cache.py
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.embeddings import embed_texts
+from app.services.kb_cache import get_answer_cache
+
+
+# -----------------------------
+# V2.28 — Grounded-answer cache
+#
+# A cohort asks the same questions about the same lecture; retrieval is cheap,
+# generation is not. Lookups happen after retrieval, so the retrieved evidence
+# (chunk ids in prompt order) is part of every key: an answer is only reused
+# for the exact prompt context it was generated from.
+#
+#   exact     (pack, embedding_version, llm, embed model, evidence, normalised question)
+#   semantic  (pack, embedding_version, llm, embed model, evidence) -> recent
+#             questions with their embeddings; a hit needs cosine >= threshold
+#
+# embedding_version is bumped on re-ingest / re-embed, so old entries become
+# unreachable and age out (same scheme as kb_cache); entries also have a TTL.
+#
+# The semantic tier reuses the query vector retrieval already computed.
+# A semantic bucket is updated by get / modify / put. A lock covers that
+# within a process. On Redis, two API processes storing into the same bucket
+# at the same moment can drop one entry (last writer wins). That is
+# accepted: the bucket is a best-effort cache, and a lost entry costs one
+# regeneration.
+# -----------------------------
+
+TIER_EXACT = "exact"
+TIER_SEMANTIC = "semantic"
+
+_WS_RE = re.compile(r"\s+")
+_BUCKET_LOCK = threading.Lock()
+
+
+@dataclass
+class AnswerCacheKeys:
+    exact: str
+    semantic: str
+    question: str  # normalised
+    q_vec: Optional[List[float]] = None  # set when the semantic tier is on
+
+
+def normalize_question_key(question: str) -> str:
+    """Case, whitespace and trailing punctuation don't change the question."""
+    q = _WS_RE.sub(" ", (question or "").strip().lower())
+    return q.rstrip(" ?!.")
+
+
+def evidence_ids(citations: Sequence[Any]) -> List[int]:
+    out: List[int] = []
+    for c in citations:
+        out.extend(int(x) for x in (c.chunk_ids or [c.chunk_id]))
+    return out
+
+
+def _pack_version(db: Session, study_pack_id: int) -> Optional[int]:
+    v = db.execute(
+        text("SELECT embedding_version FROM study_packs WHERE id = :id"),
+        {"id": study_pack_id},
+    ).scalar()
+    return int(v) if v is not None else None
+
+
+def lookup_answer(
+    db: Session,
+    *,
+    study_pack_id: int,
+    question: str,
+    llm_model: str,
+    embed_model: str,
+    citations: Sequence[Any],
+    q_vec: Optional[Sequence[float]] = None,
+) -> Tuple[Optional[AnswerCacheKeys], Optional[Dict[str, Any]]]:
+    """
+    (keys, hit). keys is None when the cache is off; hit is None on a miss,
+    else {"answer", "tier", "similarity"?, "matched_question"?}.
+
+    q_vec: the question's normalised embedding from retrieval (same model);
+    only embedded here when it isn't passed.
+    """
+    cache = get_answer_cache()
+    if not cache.enabled:
+        return None, None
+    version = _pack_version(db, study_pack_id)
+    if version is None:
+        return None, None
+
+    qn = normalize_question_key(question)
+    base = {"llm": llm_model, "embed": embed_model, "evidence": evidence_ids(citations)}
+    keys = AnswerCacheKeys(
+        exact=cache.key("answer", study_pack_id, version, {**base, "q": qn}),
+        semantic=cache.key("answer-sem", study_pack_id, version, base),
+        question=qn,
+    )
+
+    hit, _status = cache.get(keys.exact)
+    if hit and hit.get("answer"):
+        return keys, {"answer": hit["answer"], "tier": TIER_EXACT}
+
+    if not settings.kb_answer_cache_semantic:
+        return keys, None
+
+    # Same model as retrieval, so the threshold means what it means for search.
+    if q_vec is None:
+        q_vec = embed_texts([question], model_name=embed_model, normalize=True)[0]
+    vec = np.asarray(q_vec, dtype=np.float32)
+    keys.q_vec = [round(float(x), 6) for x in vec]
+
+    bucket, _status = cache.get(keys.semantic)
+    entries = (bucket or {}).get("entries") or []
+    best_sim, best = -1.0, None
+    for e in entries:
+        sim = float(np.dot(vec, np.asarray(e["vec"], dtype=np.float32)))
+        if sim > best_sim:
+            best_sim, best = sim, e
+    if best is not None and best_sim >= float(settings.kb_answer_cache_sim_threshold):
+        return keys, {
+            "answer": best["answer"],
+            "tier": TIER_SEMANTIC,
+            "similarity": round(best_sim, 4),
+            "matched_question": best["q"],
+        }
+    return keys, None
+
+
+def store_answer(keys: Optional[AnswerCacheKeys], answer: str) -> None:
+    if keys is None or not answer:
+        return
+    cache = get_answer_cache()
+    cache.put(keys.exact, {"answer": answer})
+
+    if keys.q_vec is None:
+        return
+    with _BUCKET_LOCK:
+        bucket, _status = cache.get(keys.semantic)
+        entries = [e for e in ((bucket or {}).get("entries") or []) if e.get("q") != keys.question]
+        entries.append({"q": keys.question, "vec": keys.q_vec, "answer": answer})
+        keep = max(1, int(settings.kb_answer_cache_semantic_per_evidence))
+        cache.put(keys.semantic, {"entries": entries[-keep:]})
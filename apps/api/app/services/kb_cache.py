@@ -0,0 +1,195 @@
+# apps/api/app/services/kb_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+# -----------------------------
+# V2.12 — Versioned KB result cache
+#
+# Keys embed the pack's content version (study_packs.embedding_version), which
+# is bumped in the same transaction that replaces chunks (re-ingest) or writes
+# embeddings. A request reads the version first, so after a re-ingest commits
+# every lookup uses a new key: old entries are unreachable and simply age out
+# (LRU / TTL). No explicit invalidation, no stale reads.
+#
+# Backends: "memory" (per-process LRU), "redis" (shared, optional), "off".
+# -----------------------------
+
+CACHE_OFF = "off"
+CACHE_MEMORY = "memory"
+CACHE_REDIS = "redis"
+
+# Values for the X-KB-Cache response header.
+STATUS_HIT = "hit"
+STATUS_MISS = "miss"
+STATUS_BYPASS = "bypass"
+STATUS_ERROR = "error"
+
+
+class _MemoryBackend:
+    """Thread-safe LRU of JSON strings (bounded by entry count, per-entry TTL)."""
+
+    name = CACHE_MEMORY
+
+    def __init__(self, max_entries: int, ttl_sec: int) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_sec = int(ttl_sec)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires, value = hit
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        expires = time.monotonic() + self.ttl_sec if self.ttl_sec > 0 else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.name, "entries": len(self._data), "max_entries": self.max_entries}
+
+
+class _RedisBackend:
+    """Shared cache across API workers; entries expire via Redis TTL."""
+
+    name = CACHE_REDIS
+
+    def __init__(self, url: str, ttl_sec: int) -> None:
+        import redis  # optional at runtime; only needed for KB_CACHE=redis
+
+        self.ttl_sec = int(ttl_sec)
+        self._r = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    def get(self, key: str) -> Optional[str]:
+        v = self._r.get(key)
+        return v.decode("utf-8") if isinstance(v, bytes) else v
+
+    def set(self, key: str, value: str) -> None:
+        if self.ttl_sec > 0:
+            self._r.set(key, value, ex=self.ttl_sec)
+        else:
+            self._r.set(key, value)
+
+    def clear(self) -> None:
+        for k in self._r.scan_iter(match=f"{settings.kb_cache_prefix}:*"):
+            self._r.delete(k)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class KBResultCache:
+    """
+    get/put JSON-serialisable values under (namespace, pack, version, params).
+
+    Backend errors (e.g. Redis down) never fail the request: lookups report
+    STATUS_ERROR and the caller computes the result as on a miss.
+    """
+
+    def __init__(self, backend: Optional[Any]) -> None:
+        self.backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def key(namespace: str, study_pack_id: int, version: int, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{settings.kb_cache_prefix}:{namespace}:{int(study_pack_id)}:v{int(version)}:{digest}"
+
+    def get(self, key: str) -> Tuple[Optional[Any], str]:
+        if self.backend is None:
+            return None, STATUS_BYPASS
+        try:
+            raw = self.backend.get(key)
+        except Exception:
+            return None, STATUS_ERROR
+        if raw is None:
+            return None, STATUS_MISS
+        return json.loads(raw), STATUS_HIT
+
+    def put(self, key: str, value: Any) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, json.dumps(value))
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        if self.backend is None:
+            return {"backend": CACHE_OFF}
+        try:
+            return self.backend.stats()
+        except Exception as e:
+            return {"backend": self.backend.name, "error": str(e)}
+
+
+def _make_backend(max_entries: Optional[int] = None, ttl_sec: Optional[int] = None) -> Optional[Any]:
+    kind = (settings.kb_cache_backend or CACHE_OFF).strip().lower()
+    max_entries = settings.kb_cache_max_entries if max_entries is None else max_entries
+    ttl_sec = settings.kb_cache_ttl_sec if ttl_sec is None else ttl_sec
+    if kind == CACHE_MEMORY:
+        return _MemoryBackend(max_entries, ttl_sec)
+    if kind == CACHE_REDIS:
+        try:
+            return _RedisBackend(settings.kb_cache_redis_url, ttl_sec)
+        except Exception:
+            # redis package missing / bad URL: keep serving, uncached per process
+            return _MemoryBackend(max_entries, ttl_sec)
+    return None
+
+
+_CACHE: Optional[KBResultCache] = None
+_ANSWER_CACHE: Optional[KBResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_kb_cache() -> KBResultCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = KBResultCache(_make_backend())
+    return _CACHE
+
+
+def get_answer_cache() -> KBResultCache:
+    """V2.28 — same backend kind as KB_CACHE, with its own size and TTL (kb_answer_cache)."""
+    global _ANSWER_CACHE
+    if _ANSWER_CACHE is None:
+        with _CACHE_LOCK:
+            if _ANSWER_CACHE is None:
+                backend = (
+                    _make_backend(settings.kb_answer_cache_max_entries, settings.kb_answer_cache_ttl_sec)
+                    if settings.kb_answer_cache_enabled
+                    else None
+                )
+                _ANSWER_CACHE = KBResultCache(backend)
+    return _ANSWER_CACHE
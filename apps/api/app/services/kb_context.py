@@ -0,0 +1,309 @@
+# apps/api/app/services/kb_context.py
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.kb_diversify import join_span_text
+
+
+# -----------------------------
+# V2.15 — Neighbour-context expansion for QA
+#
+# A hit at idx i is sent with chunks i-w .. i+w. Windows of all hits are merged
+# into disjoint idx ranges first, then fetched in ONE query (unnest of range
+# bounds joined against uq_transcript_chunks_pack_idx), so the cost doesn't
+# grow with the number of hits. Each merged range becomes one prompt span.
+# -----------------------------
+
+_RANGE_SQL = """
+    SELECT tc.id, tc.idx, tc.start_sec, tc.end_sec, tc.text
+    FROM unnest(CAST(:lo AS int[]), CAST(:hi AS int[])) AS r(lo, hi)
+    JOIN transcript_chunks tc
+      ON tc.study_pack_id = :study_pack_id
+     AND tc.idx BETWEEN r.lo AND r.hi
+    ORDER BY tc.idx ASC
+"""
+
+
+@dataclass
+class ContextSpan:
+    idx: int
+    idx_end: int
+    start_sec: float
+    end_sec: float
+    text: str
+    hit: Dict[str, Any]  # best-ranked hit inside the span (ids / scores)
+    rank: int  # that hit's position in the retrieval order
+    chunk_ids: List[int] = field(default_factory=list)
+    hit_chunk_ids: List[int] = field(default_factory=list)
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    out: List[Tuple[int, int]] = []
+    for lo, hi in sorted(ranges):
+        if out and lo <= out[-1][1] + 1:
+            out[-1] = (out[-1][0], max(out[-1][1], hi))
+        else:
+            out.append((lo, hi))
+    return out
+
+
+def _fit_span(parts: List[Tuple[int, str]], hits: set, max_chars: int) -> List[Tuple[int, str]]:
+    """Drop outermost non-hit neighbours (alternating ends) until the span fits."""
+    parts = list(parts)
+    left = True
+    while len(parts) > 1 and len(join_span_text([t for _, t in parts])) > max_chars:
+        if left and parts[0][0] not in hits:
+            parts.pop(0)
+        elif not left and parts[-1][0] not in hits:
+            parts.pop()
+        elif parts[0][0] not in hits:
+            parts.pop(0)
+        elif parts[-1][0] not in hits:
+            parts.pop()
+        else:
+            break  # only hits left; the caller clips the text
+        left = not left
+    return parts
+
+
+def expand_hits(
+    db: Session,
+    study_pack_id: int,
+    hits: List[Dict[str, Any]],
+    *,
+    window: int,
+    max_span_chars: int,
+) -> List[ContextSpan]:
+    """
+    Fetch idx±window around every hit in one query and merge overlapping /
+    touching windows into spans, returned in best-hit retrieval order.
+
+    Hits may already be spans (idx..idx_end, V2.13). Each span is trimmed to
+    max_span_chars by dropping neighbour chunks before hit chunks.
+    """
+    if not hits:
+        return []
+
+    w = max(0, int(window))
+    ranges = _merge_ranges([(int(h["idx"]) - w, int(h.get("idx_end", h["idx"])) + w) for h in hits])
+    rows = db.execute(
+        text(_RANGE_SQL),
+        {
+            "study_pack_id": study_pack_id,
+            "lo": [lo for lo, _ in ranges],
+            "hi": [hi for _, hi in ranges],
+        },
+    ).all()
+
+    by_range: List[List[Any]] = [[] for _ in ranges]
+    ri = 0
+    for r in rows:
+        while int(r[1]) > ranges[ri][1]:
+            ri += 1
+        by_range[ri].append(r)
+
+    spans: List[ContextSpan] = []
+    for (lo, hi), members in zip(ranges, by_range):
+        if not members:
+            continue
+        inside = [(rank, h) for rank, h in enumerate(hits) if lo <= int(h["idx"]) <= hi]
+        if not inside:
+            continue
+        rank, best = min(inside, key=lambda x: x[0])
+        hit_ids = {int(cid) for _, h in inside for cid in (h.get("chunk_ids") or [h["chunk_id"]])}
+
+        parts = _fit_span([(int(m[0]), str(m[4])) for m in members], hit_ids, max_span_chars)
+        keep = {cid for cid, _ in parts}
+        kept = [m for m in members if int(m[0]) in keep]
+        span_text = join_span_text([t for _, t in parts])
+        if len(span_text) > max_span_chars:
+            span_text = span_text[: max_span_chars - 3].rstrip() + "..."
+        spans.append(
+            ContextSpan(
+                idx=int(kept[0][1]),
+                idx_end=int(kept[-1][1]),
+                start_sec=float(kept[0][2] or 0.0),
+                end_sec=float(kept[-1][3] or 0.0),
+                text=span_text,
+                hit=best,
+                rank=rank,
+                chunk_ids=[int(m[0]) for m in kept],
+                hit_chunk_ids=sorted(hit_ids & keep),
+            )
+        )
+
+    spans.sort(key=lambda s: s.rank)
+    return spans
+
+
+# -----------------------------
+# V2.29 — Token-budgeted context packing
+#
+# The prompt's excerpts are filled against a token budget instead of fixed
+# character caps. Tokens are counted with the LLM's own tokenizer when
+# KB_QA_TOKENIZER names a Hugging Face tokenizer (transformers installed),
+# else with a fast estimate: a word piece per 6 characters of each word, one
+# per punctuation mark. The estimate tracks BPE counts for English captions
+# closely enough to size a budget.
+#
+# Candidates come in retrieval order (fused / MMR / re-ranked score). Text
+# already packed is removed from later candidates first: any run of
+# `dedupe_ngram` words seen before is cut (auto-captions rarely have
+# punctuation, so this works on word n-grams, not sentences); a candidate
+# left mostly empty is dropped. Then candidates are taken greedily while they
+# fit; one that doesn't is skipped in favour of smaller ones, and leftover
+# room (>= min_tail_tokens) goes to the best skipped one, truncated.
+# -----------------------------
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class TokenCounter:
+    def __init__(self, tokenizer: Any = None, name: str = "approx") -> None:
+        self._tok = tokenizer
+        self.name = name
+
+    def count(self, s: str) -> int:
+        if not s:
+            return 0
+        if self._tok is not None:
+            return len(self._tok.encode(s, add_special_tokens=False))
+        return sum(1 + (len(m.group()) - 1) // 6 for m in _PIECE_RE.finditer(s))
+
+    def truncate(self, s: str, max_tokens: int) -> str:
+        if max_tokens <= 0 or not s:
+            return ""
+        if self.count(s) <= max_tokens:
+            return s
+        room = max_tokens - self.count("...")  # the ellipsis costs tokens too
+        if room <= 0:
+            return ""
+        if self._tok is not None:
+            ids = self._tok.encode(s, add_special_tokens=False)
+            return self._tok.decode(ids[:room]).rstrip() + "..."
+        used = 0
+        for m in _PIECE_RE.finditer(s):
+            used += 1 + (len(m.group()) - 1) // 6
+            if used > room:
+                return s[: m.start()].rstrip() + "..."
+        return s
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(name: str = "") -> TokenCounter:
+    """Tokenizer-backed counter for a HF tokenizer name, else the estimate."""
+    name = (name or "").strip()
+    if name:
+        try:
+            from transformers import AutoTokenizer  # type: ignore
+
+            return TokenCounter(AutoTokenizer.from_pretrained(name), name=name)
+        except Exception:
+            pass  # transformers missing / unknown name: estimate instead
+    return TokenCounter()
+
+
+def _dedupe(words: List[str], seen: Set[Tuple[str, ...]], n: int) -> List[List[str]]:
+    """Runs of `words` left after cutting every n-gram already in `seen`."""
+    if len(words) < n:
+        return [words] if words else []
+    low = [w.lower() for w in words]
+    covered = [False] * len(words)
+    for i in range(len(words) - n + 1):
+        if tuple(low[i : i + n]) in seen:
+            for j in range(i, i + n):
+                covered[j] = True
+    runs: List[List[str]] = []
+    cur: List[str] = []
+    for w, c in zip(words, covered):
+        if c:
+            if cur:
+                runs.append(cur)
+                cur = []
+        else:
+            cur.append(w)
+    if cur:
+        runs.append(cur)
+    return runs
+
+
+def _add_shingles(words: List[str], seen: Set[Tuple[str, ...]], n: int) -> None:
+    low = [w.lower() for w in words]
+    for i in range(len(low) - n + 1):
+        seen.add(tuple(low[i : i + n]))
+
+
+@dataclass
+class PackedContext:
+    selected: List[Tuple[int, str]]  # (candidate index, packed text), in candidate order
+    tokens: int  # excerpt tokens used, headers included
+    stats: Dict[str, Any]
+
+
+def pack_context(
+    texts: List[str],
+    *,
+    budget_tokens: int,
+    counter: TokenCounter,
+    header_tokens: int = 0,
+    dedupe_ngram: int = 8,
+    min_keep_ratio: float = 0.3,
+    min_tail_tokens: int = 48,
+) -> PackedContext:
+    """
+    Choose and trim candidate excerpts (best first) to fit budget_tokens.
+    header_tokens is the per-excerpt overhead (the "[i] (chunk_id=...)" line).
+    """
+    seen: Set[Tuple[str, ...]] = set()
+    chosen: Dict[int, str] = {}
+    skipped: List[Tuple[int, str]] = []
+    left = int(budget_tokens)
+    deduped_words = 0
+    duplicates = 0
+
+    for i, t in enumerate(texts):
+        words = (t or "").split()
+        runs = _dedupe(words, seen, dedupe_ngram) if dedupe_ngram > 0 else ([words] if words else [])
+        kept = sum(len(r) for r in runs)
+        deduped_words += len(words) - kept
+        if not kept or kept < min_keep_ratio * len(words):
+            duplicates += 1
+            continue
+        body = " ... ".join(" ".join(r) for r in runs)
+        cost = header_tokens + counter.count(body)
+        if cost <= left:
+            chosen[i] = body
+            left -= cost
+            for r in runs:
+                _add_shingles(r, seen, dedupe_ngram)
+        else:
+            skipped.append((i, body))
+
+    truncated = None
+    if skipped and left - header_tokens >= min_tail_tokens:
+        i, body = skipped[0]
+        cut = counter.truncate(body, left - header_tokens)
+        if cut:
+            chosen[i] = cut
+            left -= header_tokens + counter.count(cut)
+            truncated = i
+
+    selected = sorted(chosen.items())
+    return PackedContext(
+        selected=selected,
+        tokens=int(budget_tokens) - left,
+        stats={
+            "candidates": len(texts),
+            "packed": len(selected),
+            "skipped": len(skipped) - (1 if truncated is not None else 0),
+            "duplicates_dropped": duplicates,
+            "deduped_words": deduped_words,
+            "truncated": truncated is not None,
+        },
+    )
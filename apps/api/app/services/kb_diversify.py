@@ -0,0 +1,156 @@
+# apps/api/app/services/kb_diversify.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# -----------------------------
+# V2.13 — Result diversification
+#
+# Consecutive transcript chunks (idx 41, 42, 43) often say the same thing, so a
+# plain top-k spends most of the QA prompt on one passage. Two steps:
+#   1) MMR over the fused candidate pool: greedily pick the item maximising
+#      lam * relevance - (1 - lam) * max_sim_to_already_picked
+#      (relevance = the ranking MMR is diversifying: cross-encoder score, else
+#      the fused score min-max normalised over the pool, else cosine; sims
+#      from the stored chunk vectors)
+#   2) merge picked hits whose idx are adjacent into one time span
+# -----------------------------
+
+# Word-overlap window when joining neighbouring chunk texts into a span.
+_JOIN_OVERLAP_WORDS = 12
+
+
+def _relevance(items: List[Dict[str, Any]]) -> np.ndarray:
+    """rerank_score > normalised fused_score > score, per item."""
+    n = len(items)
+    fused = np.fromiter((float(it.get("fused_score") or 0.0) for it in items), dtype=np.float32, count=n)
+    has_fused = np.fromiter((it.get("fused_score") is not None for it in items), dtype=bool, count=n)
+    if has_fused.any():
+        lo, hi = float(fused[has_fused].min()), float(fused[has_fused].max())
+        fused = (fused - lo) / (hi - lo) if hi > lo else np.ones(n, dtype=np.float32)
+
+    rel = np.empty(n, dtype=np.float32)
+    for i, it in enumerate(items):
+        if it.get("rerank_score") is not None:  # V2.14 — cross-encoder when the pool was re-ranked
+            rel[i] = float(it["rerank_score"])
+        elif has_fused[i]:
+            rel[i] = fused[i]
+        else:
+            rel[i] = float(it.get("score") or 0.0)
+    return rel
+
+
+def mmr_select(
+    items: List[Dict[str, Any]],
+    vecs: Sequence[Optional[np.ndarray]],
+    *,
+    k: int,
+    lam: float,
+) -> List[Dict[str, Any]]:
+    """
+    Maximal Marginal Relevance over `items` (already ranked), aligned with `vecs`.
+
+    Vectors must be L2-normalised; a None vector (chunk not embedded) counts as
+    dissimilar to everything. Relevance is `rerank_score` if present, else
+    `fused_score` scaled to [0, 1] over the pool (so lexical / RRF ranking
+    survives diversification), else cosine `score`. lam=1 keeps the input
+    order by relevance, lam=0 only maximises novelty. Picked items get
+    `mmr_score`.
+    """
+    n = len(items)
+    k = min(int(k), n)
+    if k <= 0:
+        return []
+
+    dim = next((len(v) for v in vecs if v is not None), 0)
+    mat = np.zeros((n, max(dim, 1)), dtype=np.float32)
+    for i, v in enumerate(vecs):
+        if v is not None:
+            mat[i] = v
+
+    rel = _relevance(items)
+    sims = mat @ mat.T  # (n, n); n is a candidate pool, not the corpus
+    lam = float(min(max(lam, 0.0), 1.0))
+
+    picked: List[int] = []
+    redundancy = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    for _ in range(k):
+        mmr = lam * rel - (1.0 - lam) * redundancy
+        mmr[~available] = -np.inf
+        j = int(np.argmax(mmr))
+        picked.append(j)
+        available[j] = False
+        np.maximum(redundancy, sims[j], out=redundancy)
+        items[j]["mmr_score"] = float(mmr[j])
+
+    return [items[j] for j in picked]
+
+
+def join_span_text(texts: List[str]) -> str:
+    """Concatenate chunk texts in idx order, dropping word overlap at the seams."""
+    out: List[str] = []
+    for t in texts:
+        words = (t or "").split()
+        if not words:
+            continue
+        if out:
+            win = min(_JOIN_OVERLAP_WORDS, len(out), len(words))
+            for n in range(win, 0, -1):
+                if [w.lower() for w in out[-n:]] == [w.lower() for w in words[:n]]:
+                    words = words[n:]
+                    break
+        out.extend(words)
+    return " ".join(out)
+
+
+def merge_adjacent(items: List[Dict[str, Any]], *, max_gap: int = 1) -> List[Dict[str, Any]]:
+    """
+    Merge hits whose idx ranges are within `max_gap` of each other (same pack)
+    into one span item, keeping the best-ranked member's ids/scores.
+
+    Span items carry `idx` (first), `idx_end` (last), `chunk_ids` (members in
+    idx order), min start_sec / max end_sec and the joined text. Output keeps
+    the order of each span's best-ranked member.
+    """
+    if not items:
+        return []
+
+    for rank, it in enumerate(items):
+        it.setdefault("idx_end", int(it["idx"]))
+        it.setdefault("chunk_ids", [int(it["chunk_id"])])
+        it["_rank"] = rank
+
+    ordered = sorted(items, key=lambda d: (d.get("study_pack_id") or 0, int(d["idx"])))
+    spans: List[List[Dict[str, Any]]] = [[ordered[0]]]
+    for it in ordered[1:]:
+        last = spans[-1][-1]
+        same_pack = (it.get("study_pack_id") or 0) == (last.get("study_pack_id") or 0)
+        if same_pack and int(it["idx"]) - int(last["idx_end"]) <= max_gap:
+            spans[-1].append(it)
+        else:
+            spans.append([it])
+
+    merged: List[Dict[str, Any]] = []
+    for members in spans:
+        best = min(members, key=lambda d: d["_rank"])
+        if len(members) > 1:
+            span = dict(best)
+            span["idx"] = int(members[0]["idx"])
+            span["idx_end"] = max(int(m["idx_end"]) for m in members)
+            span["chunk_ids"] = [cid for m in members for cid in m["chunk_ids"]]
+            span["start_sec"] = min(float(m["start_sec"]) for m in members)
+            span["end_sec"] = max(float(m["end_sec"]) for m in members)
+            span["text"] = join_span_text([str(m["text"]) for m in members])
+            best = span
+        merged.append(best)
+
+    merged.sort(key=lambda d: d["_rank"])
+    for it in items:
+        it.pop("_rank", None)
+    for it in merged:
+        it.pop("_rank", None)
+    return merged
@@ -1,14 +1,23 @@
 # apps/api/app/services/kb_qa.py
 from __future__ import annotations
 
+import asyncio
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
 import httpx
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.http_clients import get_async_client, get_sync_client
+from app.services.kb_answer_cache import AnswerCacheKeys, lookup_answer, store_answer
+from app.services.kb_context import expand_hits, get_token_counter, pack_context
 from app.services.kb_search import kb_search_chunks
 
 
@@ -20,6 +29,9 @@ class KBCitation:
     end_sec: float
     text: str
     score: float
+    # V2.13 — merged span of adjacent hits (idx..idx_end)
+    idx_end: Optional[int] = None
+    chunk_ids: Optional[List[int]] = None
 
 
 @dataclass
@@ -29,25 +41,58 @@ class KBAskResult:
     model: str
     citations: List[KBCitation]
     retrieval: Dict[str, Any]
+    cached: bool = False  # V2.28 — answer served from the answer cache
+
+
+@dataclass
+class PreparedAsk:
+    """V2.25 — retrieval done, prompt built; only the LLM call is left."""
+
+    llm_model: str
+    base_url: str
+    prompt: str
+    citations: List[KBCitation]
+    retrieval: Dict[str, Any]  # success shape; see _llm_error_result for failures
+    # V2.28 — answer cache keys (None = cache off) and the hit, if any
+    cache_keys: Optional[AnswerCacheKeys] = None
+    cache_hit: Optional[Dict[str, Any]] = None
 
 
 def _normalize_question(q: str) -> str:
     return (q or "").strip()
 
 
-def _clip(s: str, max_chars: int) -> str:
-    s = (s or "").strip()
-    if len(s) <= max_chars:
-        return s
-    return s[: max_chars - 3].rstrip() + "..."
+def _excerpt_header(i: int, c: KBCitation) -> str:
+    return f"[{i}] (chunk_id={c.chunk_id}, idx={c.idx}, t={c.start_sec:.2f}-{c.end_sec:.2f}s, score={c.score:.3f})"
 
 
-def _ollama_generate(*, base_url: str, model: str, prompt: str) -> str:
+def _build_prompt(q: str, excerpts: List[Tuple[KBCitation, str]]) -> str:
+    """excerpts: (citation, text to show the LLM) in citation order."""
+    ctx_lines = [f"{_excerpt_header(i, c)}\n{text}" for i, (c, text) in enumerate(excerpts, start=1)]
+    return f"""You are a study assistant. Answer the question ONLY using the provided transcript excerpts.
+
+Rules:
+- If the excerpts do not contain the answer, say you don't know and explain what's missing.
+- Every factual claim MUST be supported by citations like [1] or [1][2].
+- Do not invent information not present in the excerpts.
+- Keep the answer concise (4-8 sentences max).
+
+Question:
+{q}
+
+Transcript excerpts:
+{chr(10).join(ctx_lines)}
+
+Answer (with citations):
+"""
+
+
+def _ollama_request(*, model: str, prompt: str, stream: bool) -> tuple:
     """
-    Minimal Ollama call (no streaming) with safer timeouts & bounded output.
+    (payload, timeout) for /api/generate with safer timeouts & bounded output.
 
     Env overrides:
-      - OLLAMA_TIMEOUT_SEC (default 300)
+      - OLLAMA_TIMEOUT_SEC (default 300; per read when streaming)
       - OLLAMA_NUM_PREDICT (default 256)
       - OLLAMA_TEMPERATURE (default 0.2)
     """
@@ -55,26 +100,83 @@ def _ollama_generate(*, base_url: str, model: str, prompt: str) -> str:
     num_predict = int(os.getenv("OLLAMA_NUM_PREDICT", "256"))
     temperature = float(os.getenv("OLLAMA_TEMPERATURE", "0.2"))
 
-    url = base_url.rstrip("/") + "/api/generate"
     payload = {
         "model": model,
         "prompt": prompt,
-        "stream": False,
+        "stream": stream,
         "options": {
             "num_predict": num_predict,
             "temperature": temperature,
         },
     }
+    return payload, httpx.Timeout(timeout_sec, connect=10.0)
+
+
+def _ollama_generate(*, base_url: str, model: str, prompt: str) -> str:
+    """Minimal Ollama call (no streaming)."""
+    payload, timeout = _ollama_request(model=model, prompt=prompt, stream=False)
+    url = base_url.rstrip("/") + "/api/generate"
+
+    r = get_sync_client("ollama").post(url, json=payload, timeout=timeout)
+    r.raise_for_status()
+    data = r.json()
+    return (data.get("response") or "").strip()
+
+
+def _ollama_generate_stream(*, base_url: str, model: str, prompt: str) -> Iterator[str]:
+    """
+    V2.25 — Ollama streaming API: one JSON object per line, each with a
+    `response` token delta, the last one with "done": true.
+    """
+    payload, timeout = _ollama_request(model=model, prompt=prompt, stream=True)
+    url = base_url.rstrip("/") + "/api/generate"
 
-    timeout = httpx.Timeout(timeout_sec, connect=10.0)
-    with httpx.Client(timeout=timeout) as client:
-        r = client.post(url, json=payload)
+    with get_sync_client("ollama").stream("POST", url, json=payload, timeout=timeout) as r:
         r.raise_for_status()
-        data = r.json()
-        return (data.get("response") or "").strip()
+        for line in r.iter_lines():
+            delta, done = _ollama_stream_line(line)
+            if delta:
+                yield delta
+            if done:
+                return
+
+
+def _ollama_stream_line(line: str) -> Tuple[str, bool]:
+    """(token delta, done) for one line of Ollama's streaming response."""
+    if not line.strip():
+        return "", False
+    data = json.loads(line)
+    if data.get("error"):
+        raise RuntimeError(str(data["error"]))
+    return data.get("response") or "", bool(data.get("done"))
+
+
+async def _ollama_generate_async(*, base_url: str, model: str, prompt: str) -> str:
+    """V2.27 — _ollama_generate on the pooled AsyncClient (no thread held while waiting)."""
+    payload, timeout = _ollama_request(model=model, prompt=prompt, stream=False)
+    url = base_url.rstrip("/") + "/api/generate"
 
+    r = await get_async_client("ollama").post(url, json=payload, timeout=timeout)
+    r.raise_for_status()
+    data = r.json()
+    return (data.get("response") or "").strip()
 
-def ask_grounded(
+
+async def _ollama_generate_stream_async(*, base_url: str, model: str, prompt: str) -> AsyncIterator[str]:
+    payload, timeout = _ollama_request(model=model, prompt=prompt, stream=True)
+    url = base_url.rstrip("/") + "/api/generate"
+
+    async with get_async_client("ollama").stream("POST", url, json=payload, timeout=timeout) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            delta, done = _ollama_stream_line(line)
+            if delta:
+                yield delta
+            if done:
+                return
+
+
+def prepare_ask(
     *,
     db: Session,
     study_pack_id: int,
@@ -83,14 +185,39 @@ def ask_grounded(
     embed_model: Optional[str] = None,    # ✅ V2.4 retrieval model
     limit: int = 6,
     hybrid: bool = True,
+    fusion: Optional[str] = None,         # ✅ V2.8 rrf | boost
+    diversify: bool = True,               # ✅ V2.13 MMR + adjacent-span merging
+    mmr_lambda: Optional[float] = None,
+    rerank: Optional[bool] = None,        # ✅ V2.14 cross-encoder (default: settings)
+    context_window: Optional[int] = None, # ✅ V2.15 idx±w neighbours (default: settings)
+    from_sec: Optional[float] = None,     # ✅ V2.16 time window
+    to_sec: Optional[float] = None,
     min_best_score: float = 0.52,
-) -> KBAskResult:
+    use_cache: bool = True,               # ✅ V2.28 answer cache (exact + semantic)
+) -> Union[KBAskResult, PreparedAsk]:
     """
     V2.4 — Grounded Q&A over transcript chunks.
 
     - Retrieves chunks using kb_search_chunks(query=question, model=embed_model)
+    - V2.13: by default diversified (MMR over a wider pool, adjacent hits merged
+      into spans) so near-duplicate neighbours don't crowd out the prompt
+    - V2.14: optional cross-encoder re-rank; when it ran, fewer chunks
+      (KB_RERANK_CONTEXT_K) go into the prompt
+    - V2.15: each hit is sent with idx±context_window neighbours (one range
+      query), overlapping windows merged into spans (KB_QA_MAX_SPAN_CHARS each)
+    - V2.16: from_sec/to_sec restrict retrieval to chunks overlapping that window
+    - V2.29: excerpts are deduped and packed into KB_QA_CONTEXT_TOKENS; refuses
+      when nothing fits next to the question
     - Refuses if evidence missing / best_score below threshold
     - Answer must cite sources like [1], [2] ...
+
+    V2.25 — Everything up to the LLM call: returns the refusal result, or a
+    PreparedAsk for ask_grounded / ask_grounded_stream to generate from. For
+    streaming, call it with the request's session before the response starts;
+    the stream itself needs no DB.
+
+    V2.28 — with use_cache, also looks the answer up in the answer cache
+    (keyed on the retrieved evidence, so this has to come after retrieval).
     """
     q = _normalize_question(question)
     llm_model = model or getattr(settings, "ollama_model", "qwen2.5:7b-instruct")
@@ -123,17 +250,32 @@ def ask_grounded(
 
     top_k = max(1, int(limit))
     retrieval_k = min(24, max(top_k * 4, top_k))
+    use_rerank = settings.kb_rerank_enabled if rerank is None else bool(rerank)
 
+    search_info: Dict[str, Any] = {}
     items = kb_search_chunks(
         db=db,
         study_pack_id=study_pack_id,
         query=q,
-        limit=retrieval_k,
+        # diversify widens the candidate pool itself (KB_MMR_POOL_FACTOR)
+        limit=top_k if diversify else retrieval_k,
         model=retrieval_model,
         hybrid=bool(hybrid),
+        fusion=fusion,
+        diversify=bool(diversify),
+        mmr_lambda=mmr_lambda,
+        rerank=use_rerank,
+        from_sec=from_sec,
+        to_sec=to_sec,
+        info=search_info,
     )
+    reranked = any(it.get("rerank_score") is not None for it in items)
+    if reranked:
+        top_k = min(top_k, max(1, int(settings.kb_rerank_context_k)))
 
-    best_score = float(items[0]["score"]) if items else 0.0
+    # V2.8 — with RRF the first item is not necessarily the best cosine match;
+    # `score` stays cosine so the threshold keeps its meaning.
+    best_score = max(float(it["score"]) for it in items) if items else 0.0
 
     if not items or best_score < float(min_best_score):
         return KBAskResult(
@@ -158,53 +300,67 @@ def ask_grounded(
             },
         )
 
-    citations: List[KBCitation] = []
-    for it in items[:top_k]:
-        citations.append(
-            KBCitation(
-                chunk_id=int(it["chunk_id"]),
-                idx=int(it["idx"]),
-                start_sec=float(it["start_sec"]),
-                end_sec=float(it["end_sec"]),
-                text=str(it["text"]),
-                score=float(it["score"]),
-            )
-        )
-
-    max_chars_per_chunk = int(os.getenv("KB_QA_MAX_CHARS_PER_CHUNK", "700"))
+    window = int(settings.kb_qa_context_window if context_window is None else context_window)
 
-    ctx_lines: List[str] = []
-    for i, c in enumerate(citations, start=1):
-        ctx_lines.append(
-            f"[{i}] (chunk_id={c.chunk_id}, idx={c.idx}, t={c.start_sec:.2f}-{c.end_sec:.2f}s, score={c.score:.3f})\n"
-            f"{_clip(c.text, max_chars_per_chunk)}"
+    citations: List[KBCitation] = []
+    if window > 0:
+        spans = expand_hits(
+            db,
+            study_pack_id,
+            items[:top_k],
+            window=window,
+            max_span_chars=int(settings.kb_qa_max_span_chars),
         )
+        for sp in spans:
+            citations.append(
+                KBCitation(
+                    chunk_id=int(sp.hit["chunk_id"]),
+                    idx=sp.idx,
+                    start_sec=sp.start_sec,
+                    end_sec=sp.end_sec,
+                    text=sp.text,
+                    score=float(sp.hit["score"]),
+                    idx_end=sp.idx_end,
+                    chunk_ids=sp.chunk_ids,
+                )
+            )
+    else:
+        for it in items[:top_k]:
+            citations.append(
+                KBCitation(
+                    chunk_id=int(it["chunk_id"]),
+                    idx=int(it["idx"]),
+                    start_sec=float(it["start_sec"]),
+                    end_sec=float(it["end_sec"]),
+                    text=str(it["text"]),
+                    score=float(it["score"]),
+                    idx_end=int(it["idx_end"]) if it.get("idx_end") is not None else None,
+                    chunk_ids=it.get("chunk_ids"),
+                )
+            )
 
-    prompt = f"""You are a study assistant. Answer the question ONLY using the provided transcript excerpts.
-
-Rules:
-- If the excerpts do not contain the answer, say you don't know and explain what's missing.
-- Every factual claim MUST be supported by citations like [1] or [1][2].
-- Do not invent information not present in the excerpts.
-- Keep the answer concise (4-8 sentences max).
-
-Question:
-{q}
-
-Transcript excerpts:
-{chr(10).join(ctx_lines)}
-
-Answer (with citations):
-"""
-
-    try:
-        answer = _ollama_generate(base_url=base_url, model=llm_model, prompt=prompt)
-    except Exception as e:
+    # V2.29 — pack the candidates (best first) into the prompt's token budget
+    counter = get_token_counter(settings.kb_qa_tokenizer)
+    budget = int(settings.kb_qa_context_tokens)
+    prompt_overhead = counter.count(_build_prompt(q, []))
+    header_tokens = counter.count(_excerpt_header(99, citations[0])) + 1 if citations else 0
+    packed = pack_context(
+        [c.text for c in citations],
+        budget_tokens=max(budget - prompt_overhead, 0),
+        counter=counter,
+        header_tokens=header_tokens,
+        dedupe_ngram=int(settings.kb_qa_dedupe_ngram),
+    )
+    if not packed.selected:
+        # the question + instructions leave no room for evidence
         return KBAskResult(
             refused=True,
-            answer=f"I couldn’t generate an answer due to an LLM error: {e}",
+            answer=(
+                "I can’t answer that: the question is too long to fit alongside the transcript excerpts. "
+                "Try a shorter, more specific question."
+            ),
             model=llm_model,
-            citations=citations,
+            citations=[],
             retrieval={
                 "study_pack_id": study_pack_id,
                 "query": q,
@@ -213,28 +369,400 @@ Answer (with citations):
                 "min_best_score": float(min_best_score),
                 "best_score": float(best_score),
                 "retrieved": len(items),
-                "used": len(citations),
                 "embed_model": retrieval_model,
                 "llm_model": llm_model,
-                "reason": "ollama_error",
+                "tokenizer": counter.name,
+                "prompt_overhead_tokens": prompt_overhead,
+                "context_budget_tokens": budget,
+                "packing": packed.stats,
+                "reason": "context_budget_exhausted",
             },
         )
 
-    return KBAskResult(
-        refused=False,
-        answer=answer,
-        model=llm_model,
+    # clients get the full span text; the prompt gets the deduped / trimmed text
+    excerpts = [(citations[i], body) for i, body in packed.selected]
+    citations = [c for c, _ in excerpts]
+    prompt = _build_prompt(q, excerpts)
+
+    cache_keys, cache_hit = None, None
+    if use_cache:
+        try:
+            cache_keys, cache_hit = lookup_answer(
+                db,
+                study_pack_id=study_pack_id,
+                question=q,
+                llm_model=llm_model,
+                embed_model=retrieval_model,
+                citations=citations,
+                q_vec=search_info.get("query_vec"),  # retrieval already embedded the question
+            )
+        except Exception:
+            cache_keys, cache_hit = None, None  # the cache never fails a question
+
+    return PreparedAsk(
+        llm_model=llm_model,
+        base_url=base_url,
+        prompt=prompt,
         citations=citations,
+        cache_keys=cache_keys,
+        cache_hit=cache_hit,
         retrieval={
             "study_pack_id": study_pack_id,
             "query": q,
             "limit": int(limit),
             "hybrid": bool(hybrid),
+            "diversify": bool(diversify),
+            "rerank": reranked,
+            "rerank_info": search_info.get("rerank"),  # why it didn't apply: timeout / busy / error
+            "context_window": window,
+            "from_sec": from_sec,
+            "to_sec": to_sec,
             "min_best_score": float(min_best_score),
             "best_score": float(best_score),
             "retrieved": len(items),
             "used": len(citations),
             "embed_model": retrieval_model,
             "llm_model": llm_model,
+            "tokenizer": counter.name,
+            "prompt_tokens": counter.count(prompt),
+            "context_tokens": packed.tokens,
+            "context_budget_tokens": budget,
+            "packing": packed.stats,
+        },
+    )
+
+
+def _cached_result(prep: PreparedAsk) -> KBAskResult:
+    hit = prep.cache_hit or {}
+    retrieval = dict(prep.retrieval)
+    retrieval["cached"] = True
+    retrieval["cache_tier"] = hit.get("tier")
+    if hit.get("similarity") is not None:
+        retrieval["cache_similarity"] = hit["similarity"]
+        retrieval["cache_matched_question"] = hit.get("matched_question")
+    return KBAskResult(
+        refused=False,
+        answer=str(hit.get("answer") or ""),
+        model=prep.llm_model,
+        citations=prep.citations,
+        retrieval=retrieval,
+        cached=True,
+    )
+
+
+def _generated_result(prep: PreparedAsk, answer: str, *, store: bool = True) -> KBAskResult:
+    if store:
+        store_answer(prep.cache_keys, answer)
+    retrieval = dict(prep.retrieval)
+    retrieval["cached"] = False
+    return KBAskResult(
+        refused=False,
+        answer=answer,
+        model=prep.llm_model,
+        citations=prep.citations,
+        retrieval=retrieval,
+    )
+
+
+def _llm_error_result(prep: PreparedAsk, e: Exception) -> KBAskResult:
+    r = prep.retrieval
+    return KBAskResult(
+        refused=True,
+        answer=f"I couldn’t generate an answer due to an LLM error: {e}",
+        model=prep.llm_model,
+        citations=prep.citations,
+        retrieval={
+            "study_pack_id": r["study_pack_id"],
+            "query": r["query"],
+            "limit": r["limit"],
+            "hybrid": r["hybrid"],
+            "min_best_score": r["min_best_score"],
+            "best_score": r["best_score"],
+            "retrieved": r["retrieved"],
+            "used": r["used"],
+            "embed_model": r["embed_model"],
+            "llm_model": r["llm_model"],
+            "reason": "ollama_error",
         },
-    )
\ No newline at end of file
+    )
+
+
+def ask_grounded(
+    *,
+    db: Session,
+    study_pack_id: int,
+    question: str,
+    model: Optional[str] = None,          # LLM model
+    embed_model: Optional[str] = None,    # ✅ V2.4 retrieval model
+    limit: int = 6,
+    hybrid: bool = True,
+    fusion: Optional[str] = None,         # ✅ V2.8 rrf | boost
+    diversify: bool = True,               # ✅ V2.13 MMR + adjacent-span merging
+    mmr_lambda: Optional[float] = None,
+    rerank: Optional[bool] = None,        # ✅ V2.14 cross-encoder (default: settings)
+    context_window: Optional[int] = None, # ✅ V2.15 idx±w neighbours (default: settings)
+    from_sec: Optional[float] = None,     # ✅ V2.16 time window
+    to_sec: Optional[float] = None,
+    min_best_score: float = 0.52,
+    use_cache: bool = True,               # ✅ V2.28 answer cache (exact + semantic)
+) -> KBAskResult:
+    """Grounded answer in one piece; see prepare_ask for the arguments."""
+    prep = prepare_ask(
+        db=db,
+        study_pack_id=study_pack_id,
+        question=question,
+        model=model,
+        embed_model=embed_model,
+        limit=limit,
+        hybrid=hybrid,
+        fusion=fusion,
+        diversify=diversify,
+        mmr_lambda=mmr_lambda,
+        rerank=rerank,
+        context_window=context_window,
+        from_sec=from_sec,
+        to_sec=to_sec,
+        min_best_score=min_best_score,
+        use_cache=use_cache,
+    )
+    if isinstance(prep, KBAskResult):
+        return prep
+    if prep.cache_hit:
+        return _cached_result(prep)
+
+    try:
+        answer = _ollama_generate(base_url=prep.base_url, model=prep.llm_model, prompt=prep.prompt)
+    except Exception as e:
+        return _llm_error_result(prep, e)
+
+    return _generated_result(prep, answer)
+
+
+def ask_grounded_stream(prep: Union[KBAskResult, PreparedAsk]) -> Iterator[tuple]:
+    """
+    V2.25 — (event, data) pairs for an SSE answer:
+
+      citations  {"citations": [KBCitation...]}        right after retrieval
+      delta      {"text": "..."}                        per Ollama token chunk
+      done       {"refused", "answer", "model", "retrieval"}
+
+    `answer` in `done` is the full text (the deltas joined, stripped), or the
+    refusal / error message when nothing was generated. retrieval gains
+    ttft_ms and llm_ms (time to first token, total generation time).
+    """
+    if isinstance(prep, KBAskResult):
+        yield "citations", {"citations": prep.citations}
+        yield "done", _refused_event(prep)
+        return
+
+    yield "citations", {"citations": prep.citations}
+    if prep.cache_hit:
+        yield from _cached_events(prep)
+        return
+
+    t0 = time.perf_counter()
+    ttft_ms: Optional[float] = None
+    parts: List[str] = []
+    try:
+        for delta in _ollama_generate_stream(base_url=prep.base_url, model=prep.llm_model, prompt=prep.prompt):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - t0) * 1000.0
+            parts.append(delta)
+            yield "delta", {"text": delta}
+    except Exception as e:
+        yield "done", _refused_event(_llm_error_result(prep, e))
+        return
+
+    yield "done", _answered_event(prep, parts, t0, ttft_ms)
+
+
+def _refused_event(res: KBAskResult) -> Dict[str, Any]:
+    return {"refused": True, "cached": False, "answer": res.answer, "model": res.model, "retrieval": res.retrieval}
+
+
+def _cached_events(prep: PreparedAsk) -> Iterator[tuple]:
+    """V2.28 — a cached answer goes out as one delta, then `done` with cached: true."""
+    res = _cached_result(prep)
+    yield "delta", {"text": res.answer}
+    yield "done", {"refused": False, "cached": True, "answer": res.answer, "model": res.model, "retrieval": res.retrieval}
+
+
+def _answered_event(
+    prep: PreparedAsk, parts: List[str], t0: float, ttft_ms: Optional[float], *, store: bool = True
+) -> Dict[str, Any]:
+    res = _generated_result(prep, "".join(parts).strip(), store=store)
+    retrieval = res.retrieval
+    retrieval["ttft_ms"] = round(ttft_ms, 1) if ttft_ms is not None else None
+    retrieval["llm_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    return {
+        "refused": False,
+        "cached": False,
+        "answer": res.answer,
+        "model": res.model,
+        "retrieval": retrieval,
+    }
+
+
+# -----------------------------
+# V2.27 — Async ask path
+#
+# A sync kb/ask holds an AnyIO threadpool slot (~40 per process) for the whole
+# LLM call, so a burst of questions starves every other sync endpoint. The
+# async path only uses a thread for retrieval (query embedding, vector search,
+# re-rank: CPU + short DB work), on a small dedicated pool
+# (KB_RETRIEVAL_WORKERS) with its own session; generation awaits the pooled
+# async Ollama client and holds no thread at all.
+# -----------------------------
+_retrieval_executor: Optional[ThreadPoolExecutor] = None
+_retrieval_lock = threading.Lock()
+
+
+def _get_retrieval_executor() -> ThreadPoolExecutor:
+    global _retrieval_executor
+    if _retrieval_executor is None:
+        with _retrieval_lock:
+            if _retrieval_executor is None:
+                _retrieval_executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(settings.kb_retrieval_workers)),
+                    thread_name_prefix="kb-retrieval",
+                )
+    return _retrieval_executor
+
+
+def _prepare_ask_own_session(kwargs: Dict[str, Any]) -> Union[KBAskResult, PreparedAsk]:
+    db = SessionLocal()
+    try:
+        return prepare_ask(db=db, **kwargs)
+    finally:
+        db.close()
+
+
+async def _store_answer_async(prep: PreparedAsk, answer: str) -> None:
+    """store_answer off the event loop (the Redis backend does blocking I/O)."""
+    if prep.cache_keys is None or not answer:
+        return
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_get_retrieval_executor(), store_answer, prep.cache_keys, answer)
+
+
+async def prepare_ask_async(
+    *,
+    study_pack_id: int,
+    question: str,
+    model: Optional[str] = None,          # LLM model
+    embed_model: Optional[str] = None,    # ✅ V2.4 retrieval model
+    limit: int = 6,
+    hybrid: bool = True,
+    fusion: Optional[str] = None,         # ✅ V2.8 rrf | boost
+    diversify: bool = True,               # ✅ V2.13 MMR + adjacent-span merging
+    mmr_lambda: Optional[float] = None,
+    rerank: Optional[bool] = None,        # ✅ V2.14 cross-encoder (default: settings)
+    context_window: Optional[int] = None, # ✅ V2.15 idx±w neighbours (default: settings)
+    from_sec: Optional[float] = None,     # ✅ V2.16 time window
+    to_sec: Optional[float] = None,
+    min_best_score: float = 0.52,
+    use_cache: bool = True,               # ✅ V2.28 answer cache (exact + semantic)
+) -> Union[KBAskResult, PreparedAsk]:
+    """prepare_ask (without `db`) on the bounded retrieval pool."""
+    kwargs = dict(
+        study_pack_id=study_pack_id,
+        question=question,
+        model=model,
+        embed_model=embed_model,
+        limit=limit,
+        hybrid=hybrid,
+        fusion=fusion,
+        diversify=diversify,
+        mmr_lambda=mmr_lambda,
+        rerank=rerank,
+        context_window=context_window,
+        from_sec=from_sec,
+        to_sec=to_sec,
+        min_best_score=min_best_score,
+        use_cache=use_cache,
+    )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_retrieval_executor(), _prepare_ask_own_session, kwargs)
+
+
+async def ask_grounded_async(
+    *,
+    study_pack_id: int,
+    question: str,
+    model: Optional[str] = None,          # LLM model
+    embed_model: Optional[str] = None,    # ✅ V2.4 retrieval model
+    limit: int = 6,
+    hybrid: bool = True,
+    fusion: Optional[str] = None,         # ✅ V2.8 rrf | boost
+    diversify: bool = True,               # ✅ V2.13 MMR + adjacent-span merging
+    mmr_lambda: Optional[float] = None,
+    rerank: Optional[bool] = None,        # ✅ V2.14 cross-encoder (default: settings)
+    context_window: Optional[int] = None, # ✅ V2.15 idx±w neighbours (default: settings)
+    from_sec: Optional[float] = None,     # ✅ V2.16 time window
+    to_sec: Optional[float] = None,
+    min_best_score: float = 0.52,
+    use_cache: bool = True,               # ✅ V2.28 answer cache (exact + semantic)
+) -> KBAskResult:
+    """ask_grounded for async endpoints; same arguments minus `db`."""
+    prep = await prepare_ask_async(
+        study_pack_id=study_pack_id,
+        question=question,
+        model=model,
+        embed_model=embed_model,
+        limit=limit,
+        hybrid=hybrid,
+        fusion=fusion,
+        diversify=diversify,
+        mmr_lambda=mmr_lambda,
+        rerank=rerank,
+        context_window=context_window,
+        from_sec=from_sec,
+        to_sec=to_sec,
+        min_best_score=min_best_score,
+        use_cache=use_cache,
+    )
+    if isinstance(prep, KBAskResult):
+        return prep
+    if prep.cache_hit:
+        return _cached_result(prep)
+
+    try:
+        answer = await _ollama_generate_async(base_url=prep.base_url, model=prep.llm_model, prompt=prep.prompt)
+    except Exception as e:
+        return _llm_error_result(prep, e)
+
+    await _store_answer_async(prep, answer)
+    return _generated_result(prep, answer, store=False)
+
+
+async def ask_grounded_stream_async(prep: Union[KBAskResult, PreparedAsk]) -> AsyncIterator[tuple]:
+    """ask_grounded_stream over the async Ollama client (same events)."""
+    if isinstance(prep, KBAskResult):
+        yield "citations", {"citations": prep.citations}
+        yield "done", _refused_event(prep)
+        return
+
+    yield "citations", {"citations": prep.citations}
+    if prep.cache_hit:
+        for event in _cached_events(prep):
+            yield event
+        return
+
+    t0 = time.perf_counter()
+    ttft_ms: Optional[float] = None
+    parts: List[str] = []
+    try:
+        async for delta in _ollama_generate_stream_async(
+            base_url=prep.base_url, model=prep.llm_model, prompt=prep.prompt
+        ):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - t0) * 1000.0
+            parts.append(delta)
+            yield "delta", {"text": delta}
+    except Exception as e:
+        yield "done", _refused_event(_llm_error_result(prep, e))
+        return
+
+    done = _answered_event(prep, parts, t0, ttft_ms, store=False)
+    await _store_answer_async(prep, done["answer"])
+    yield "done", done
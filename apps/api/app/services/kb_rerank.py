@@ -0,0 +1,207 @@
+# apps/api/app/services/kb_rerank.py
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+# -----------------------------
+# V2.14 — Cross-encoder re-rank
+#
+# The bi-encoder + lexical fusion picks a candidate pool cheaply; a small
+# cross-encoder (query, chunk) model then scores the top-N in one batched
+# forward pass. Guard rails:
+#   - scores cached per (model, query, chunk_id); chunk ids change on re-ingest,
+#     so cached scores can't outlive the text they were computed for
+#   - a latency budget: inference runs on a single worker thread and, if it
+#     doesn't finish in time, the caller keeps the un-reranked order (a run
+#     that already started still completes in the background and warms the
+#     cache; one still queued is cancelled)
+#   - at most KB_RERANK_MAX_PENDING passes queued or running; past that a
+#     request skips the re-rank ("busy") instead of queueing work that would
+#     only time out
+#   - the model is loaded outside the budget (warm_up() at API startup, else
+#     by the first caller), so a cold load never turns into a timeout
+#   - ONNX Runtime instead of torch when KB_RERANK_ONNX_PATH is set
+# -----------------------------
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-rerank")
+_pending_lock = threading.Lock()
+_pending = 0
+
+
+def _try_reserve() -> bool:
+    global _pending
+    with _pending_lock:
+        if _pending >= max(1, int(settings.kb_rerank_max_pending)):
+            return False
+        _pending += 1
+        return True
+
+
+def _release(_fut: Any = None) -> None:
+    global _pending
+    with _pending_lock:
+        _pending = max(_pending - 1, 0)
+
+
+class _ScoreCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Tuple[str, str, int], float]" = OrderedDict()
+
+    def get_many(self, keys: List[Tuple[str, str, int]]) -> List[Optional[float]]:
+        out: List[Optional[float]] = []
+        with self._lock:
+            for k in keys:
+                v = self._data.get(k)
+                if v is not None:
+                    self._data.move_to_end(k)
+                out.append(v)
+        return out
+
+    def put_many(self, items: List[Tuple[Tuple[str, str, int], float]]) -> None:
+        with self._lock:
+            for k, v in items:
+                self._data[k] = v
+                self._data.move_to_end(k)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+_SCORE_CACHE = _ScoreCache(settings.kb_rerank_cache_size)
+
+
+class _TorchCrossEncoder:
+    def __init__(self, model_name: str) -> None:
+        from sentence_transformers import CrossEncoder  # type: ignore
+
+        self._m = CrossEncoder(model_name, device="cpu")
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        return np.asarray(self._m.predict(pairs, batch_size=len(pairs), show_progress_bar=False), dtype=np.float32)
+
+
+class _OnnxCrossEncoder:
+    def __init__(self, model_name: str, onnx_path: str) -> None:
+        import onnxruntime as ort  # type: ignore
+        from transformers import AutoTokenizer  # type: ignore
+
+        self._tok = AutoTokenizer.from_pretrained(model_name)
+        self._sess = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self._sess.get_inputs()}
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        enc = self._tok(
+            [p[0] for p in pairs],
+            [p[1] for p in pairs],
+            padding=True,
+            truncation=True,
+            max_length=512,
+            return_tensors="np",
+        )
+        feed = {k: v.astype(np.int64) for k, v in enc.items() if k in self._inputs}
+        logits = self._sess.run(None, feed)[0]
+        return np.asarray(logits, dtype=np.float32).reshape(len(pairs), -1)[:, 0]
+
+
+@lru_cache(maxsize=2)
+def _load_cross_encoder(model_name: str, onnx_path: str) -> Any:
+    if onnx_path:
+        return _OnnxCrossEncoder(model_name, onnx_path)
+    return _TorchCrossEncoder(model_name)
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-max(min(x, 50.0), -50.0)))
+
+
+def warm_up(model: Optional[str] = None) -> bool:
+    """Load the cross-encoder now (API startup) so the first requests don't pay for it."""
+    try:
+        _load_cross_encoder(model or settings.kb_rerank_model, settings.kb_rerank_onnx_path)
+        return True
+    except Exception:
+        return False
+
+
+def _score_pairs(enc: Any, model_name: str, query: str, pending: List[Tuple[int, str]]) -> Dict[int, float]:
+    """Runs on the rerank thread: one forward pass over all uncached pairs."""
+    logits = enc.predict([(query, t) for _, t in pending])
+    scores = {cid: _sigmoid(float(x)) for (cid, _), x in zip(pending, logits.tolist())}
+    _SCORE_CACHE.put_many([((model_name, query, cid), s) for cid, s in scores.items()])
+    return scores
+
+
+def rerank_items(
+    query: str,
+    items: List[Dict[str, Any]],
+    *,
+    top_n: Optional[int] = None,
+    budget_ms: Optional[int] = None,
+    model: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Re-order the first `top_n` items by cross-encoder score (items past top_n
+    keep their order after them). Scored items get `rerank_score` in [0, 1]
+    (sigmoid of the model logit).
+
+    Returns (items, info); on timeout/busy/error items come back unchanged
+    and info["applied"] is False with a `reason`.
+    """
+    model_name = model or settings.kb_rerank_model
+    n = min(int(top_n or settings.kb_rerank_top_n), len(items))
+    budget = float(budget_ms if budget_ms is not None else settings.kb_rerank_budget_ms) / 1000.0
+    info: Dict[str, Any] = {"model": model_name, "top_n": n, "applied": False}
+    if n <= 1:
+        info["reason"] = "too_few"
+        return items, info
+
+    head, tail = items[:n], items[n:]
+    keys = [(model_name, query, int(it["chunk_id"])) for it in head]
+    cached = _SCORE_CACHE.get_many(keys)
+    scores: Dict[int, float] = {k[2]: v for k, v in zip(keys, cached) if v is not None}
+    pending = [(int(it["chunk_id"]), str(it["text"])) for it, v in zip(head, cached) if v is None]
+    info["cached"] = len(scores)
+
+    if pending:
+        try:
+            enc = _load_cross_encoder(model_name, settings.kb_rerank_onnx_path)  # not on the budget
+        except Exception as e:
+            info["reason"] = f"error: {e}"
+            return items, info
+        if not _try_reserve():
+            info["reason"] = "busy"
+            return items, info
+
+    t0 = time.perf_counter()
+    if pending:
+        fut = _EXECUTOR.submit(_score_pairs, enc, model_name, query, pending)
+        fut.add_done_callback(_release)  # also runs when cancelled
+        try:
+            scores.update(fut.result(timeout=budget))
+        except FutureTimeout:
+            fut.cancel()  # no-op if it's already running
+            info["reason"] = "timeout"
+            info["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            return items, info
+        except Exception as e:
+            info["reason"] = f"error: {e}"
+            return items, info
+    info["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    for it in head:
+        it["rerank_score"] = float(scores[int(it["chunk_id"])])
+    head.sort(key=lambda d: d["rerank_score"], reverse=True)
+    info["applied"] = True
+    return head + tail, info
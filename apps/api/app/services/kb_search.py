@@ -1,14 +1,33 @@
 # apps/api/app/services/kb_search.py
 from __future__ import annotations
 
+import json
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import bindparam, text
+import numpy as np
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.models.transcript_chunk import TranscriptChunk
+from app.core.config import settings
+from app.models.transcript_chunk import FTS_CONFIG
+from app.services.embedding_store import EmbedModelSpec, resolve_model_spec
 from app.services.embeddings import embed_texts
+from app.services.kb_diversify import merge_adjacent, mmr_select
+from app.services.kb_rerank import rerank_items
+
+_ITERATIVE_SCAN_MODES = {"off", "strict_order", "relaxed_order"}
+
+FUSION_RRF = "rrf"
+FUSION_BOOST = "boost"
+FUSION_MODES = {FUSION_RRF, FUSION_BOOST}
+
+BACKEND_AUTO = "auto"
+BACKEND_MEMORY = "memory"
+BACKEND_PGVECTOR = "pgvector"
+BACKENDS = {BACKEND_AUTO, BACKEND_MEMORY, BACKEND_PGVECTOR}
 
 
 @dataclass
@@ -37,6 +56,555 @@ def _to_pgvector_literal(vec: List[float]) -> str:
     return "[" + ",".join(f"{float(v):.8f}" for v in vec) + "]"
 
 
+def _effective_ef_search(ef_search: Optional[int], default: int, k_sem: int) -> int:
+    """HNSW returns at most ef_search rows before scope filters: never scan for fewer than k_sem."""
+    return max(int(ef_search or default), int(k_sem))
+
+
+def _apply_ann_settings(
+    db: Session,
+    *,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+) -> None:
+    """
+    V2.5 — Per-query HNSW tuning.
+
+    Uses set_config(..., is_local=true) so the values only live for the current
+    transaction (the request's session) and never leak into pooled connections.
+    """
+    ef = int(ef_search or settings.kb_hnsw_ef_search)
+    ef = max(1, min(ef, 1000))  # pgvector accepts 1..1000
+    db.execute(text("SELECT set_config('hnsw.ef_search', :v, true)"), {"v": str(ef)})
+
+    mode = (iterative_scan or settings.kb_hnsw_iterative_scan or "off").strip().lower()
+    if mode not in _ITERATIVE_SCAN_MODES:
+        raise ValueError(f"Invalid iterative_scan={mode!r} (expected one of {sorted(_ITERATIVE_SCAN_MODES)})")
+    # Only touch the GUC when enabled: hnsw.iterative_scan does not exist before pgvector 0.8.
+    if mode != "off":
+        db.execute(text("SELECT set_config('hnsw.iterative_scan', :v, true)"), {"v": mode})
+
+
+# Candidate scopes: one pack (V2.2), an explicit pack list (V2.10), or every pack.
+_SCOPE_PACK = "pack"
+_SCOPE_PACKS = "packs"
+_SCOPE_ALL = "all"
+
+
+def _scope_sql(alias: str, scope: str) -> str:
+    if scope == _SCOPE_PACK:
+        return f"{alias}.study_pack_id = :study_pack_id"
+    if scope == _SCOPE_PACKS:
+        return f"{alias}.study_pack_id = ANY(:pack_ids)"
+    return "TRUE"
+
+
+def _time_sql(alias: str, timed: bool) -> str:
+    """
+    V2.16 — chunk overlaps [:from_sec, :to_sec] (either bound may be open: callers
+    bind -inf / +inf). Served by idx_transcript_chunks_time (study_pack_id, start_sec, end_sec).
+    """
+    if not timed:
+        return ""
+    return f" AND {alias}.start_sec <= :to_sec AND {alias}.end_sec >= :from_sec"
+
+
+def _time_params(from_sec: Optional[float], to_sec: Optional[float]) -> Dict[str, float]:
+    return {
+        "from_sec": float(from_sec) if from_sec is not None else float("-inf"),
+        "to_sec": float(to_sec) if to_sec is not None else float("inf"),
+    }
+
+
+def _lex_sql(scope: str = _SCOPE_PACK, timed: bool = False) -> str:
+    """
+    GIN-backed FTS top-k_lex ranked by ts_rank_cd (k_lex=0 disables it).
+    Carries the chunk columns so hits missing from the pack index can still be
+    returned as lexical-only candidates.
+    """
+    return f"""
+          SELECT l.chunk_id, l.idx, l.start_sec, l.end_sec, l.text, l.lex_score,
+                 row_number() OVER (ORDER BY l.lex_score DESC, l.chunk_id ASC) AS lex_rank
+          FROM (
+            SELECT t.id AS chunk_id, t.idx, t.start_sec, t.end_sec, t.text,
+                   ts_rank_cd(t.text_tsv, tsq, 32) AS lex_score
+            FROM transcript_chunks t,
+                 websearch_to_tsquery('{FTS_CONFIG}', :q) AS tsq
+            WHERE {_scope_sql("t", scope)}{_time_sql("t", timed)}
+              AND t.text_tsv @@ tsq
+            ORDER BY lex_score DESC, t.id ASC
+            LIMIT :k_lex
+          ) l
+    """
+
+
+def _candidates_sql(
+    spec: EmbedModelSpec,
+    scope: str = _SCOPE_PACK,
+    with_vectors: bool = False,
+    timed: bool = False,
+) -> str:
+    """
+    V2.8 — One round-trip: independent semantic + lexical candidate lists.
+    V2.11 — Batched: one statement for N queries (single search = batch of one).
+
+    For each (qvec, q) pair of the unnested :qvecs / :qtexts arrays, a LATERAL
+    subquery collects:
+    - sem: HNSW top-k_sem (inner ORDER BY/LIMIT so the ANN index is used with the
+      lateral query vector as a runtime key; ranks numbered over k rows only)
+    - lex: GIN-backed FTS top-k_lex ranked by ts_rank_cd (k_lex=0 disables it)
+    merged per chunk. The result is joined back to chunk text (+ pack metadata);
+    lexical-only hits get their cosine distance computed from their own embedding
+    row (NULL if not embedded). Rows carry `qord` (1-based query position).
+
+    Query vectors are bound as TEXT and cast to the spec's typed vector in SQL
+    (psycopg would otherwise send double precision[] and <=> fails). The typed
+    expression + literal dim must match the partial HNSW index, so they are
+    inlined, not bound.
+
+    with_vectors (V2.13) adds each chunk's stored vector as text (`vec`) for MMR.
+
+    timed (V2.16) restricts both lists to chunks overlapping [:from_sec, :to_sec].
+    The semantic side then joins transcript_chunks, so for a narrow window the
+    planner can start from idx_transcript_chunks_time and score only those rows.
+    """
+    emb = spec.vector_sql("e")
+    vec_col = f",\n          ({emb})::text AS vec" if with_vectors else ""
+    sem_time_join = (
+        f"\n              JOIN transcript_chunks st ON st.id = se.chunk_id{_time_sql('st', True)}" if timed else ""
+    )
+    sem_emb = spec.vector_sql("se")
+    qv = f"(qv.vec)::{spec.sql_type}"
+    dim = int(spec.dim)
+    return f"""
+        SELECT
+          qv.qord AS qord,
+          tc.id AS chunk_id,
+          tc.study_pack_id AS study_pack_id,
+          sp.title AS study_pack_title,
+          sp.source_url AS source_url,
+          sp.playlist_id AS playlist_id,
+          sp.playlist_index AS playlist_index,
+          tc.idx AS idx,
+          tc.start_sec AS start_sec,
+          tc.end_sec AS end_sec,
+          tc.text AS text,
+          COALESCE(c.distance, ({emb} <=> {qv})) AS distance,
+          c.sem_rank AS sem_rank,
+          c.lex_rank AS lex_rank,
+          c.lex_score AS lex_score{vec_col}
+        FROM unnest(CAST(:qvecs AS text[]), CAST(:qtexts AS text[])) WITH ORDINALITY AS qv(vec, q, qord)
+        CROSS JOIN LATERAL (
+          SELECT u.chunk_id,
+                 min(u.distance) AS distance,
+                 min(u.sem_rank) AS sem_rank,
+                 min(u.lex_rank) AS lex_rank,
+                 max(u.lex_score) AS lex_score
+          FROM (
+            SELECT s.chunk_id, s.distance,
+                   row_number() OVER (ORDER BY s.distance) AS sem_rank,
+                   NULL::bigint AS lex_rank,
+                   NULL::real AS lex_score
+            FROM (
+              SELECT se.chunk_id AS chunk_id, ({sem_emb} <=> {qv}) AS distance
+              FROM transcript_chunk_embeddings se{sem_time_join}
+              WHERE {_scope_sql("se", scope)}
+                AND se.model = :model
+                AND se.dim = {dim}
+              ORDER BY {sem_emb} <=> {qv}
+              LIMIT :k_sem
+            ) s
+            UNION ALL
+            SELECT l.chunk_id, NULL, NULL,
+                   row_number() OVER (ORDER BY l.lex_score DESC, l.chunk_id ASC),
+                   l.lex_score
+            FROM (
+              SELECT t.id AS chunk_id, ts_rank_cd(t.text_tsv, tsq, 32) AS lex_score
+              FROM transcript_chunks t,
+                   websearch_to_tsquery('{FTS_CONFIG}', qv.q) AS tsq
+              WHERE {_scope_sql("t", scope)}{_time_sql("t", timed)}
+                AND t.text_tsv @@ tsq
+              ORDER BY lex_score DESC, t.id ASC
+              LIMIT :k_lex
+            ) l
+          ) u
+          GROUP BY u.chunk_id
+        ) c
+        JOIN transcript_chunks tc ON tc.id = c.chunk_id
+        JOIN study_packs sp ON sp.id = tc.study_pack_id
+        LEFT JOIN transcript_chunk_embeddings e
+          ON e.chunk_id = c.chunk_id AND e.model = :model AND e.dim = {dim}
+    """
+
+
+def _run_candidates(
+    db: Session,
+    spec: EmbedModelSpec,
+    *,
+    scope: str,
+    q_vecs: List[List[float]],
+    texts: List[str],
+    k_sem: int,
+    k_lex: int,
+    study_pack_id: Optional[int] = None,
+    pack_ids: Optional[List[int]] = None,
+    with_vectors: bool = False,
+    from_sec: Optional[float] = None,
+    to_sec: Optional[float] = None,
+) -> List[List[Any]]:
+    """Execute _candidates_sql for N queries; returns row mappings grouped per query."""
+    timed = from_sec is not None or to_sec is not None
+    rows = (
+        db.execute(
+            text(_candidates_sql(spec, scope, with_vectors=with_vectors, timed=timed)),
+            {
+                **_time_params(from_sec, to_sec),
+                "qvecs": [_to_pgvector_literal([float(x) for x in v]) for v in q_vecs],
+                "qtexts": list(texts),
+                "study_pack_id": study_pack_id,
+                "pack_ids": list(pack_ids or []),
+                "model": spec.name,
+                "k_sem": int(k_sem),
+                "k_lex": int(k_lex),
+            },
+        )
+        .mappings()
+        .all()
+    )
+    grouped: List[List[Any]] = [[] for _ in q_vecs]
+    for r in rows:
+        grouped[int(r["qord"]) - 1].append(r)
+    return grouped
+
+
+def _row_to_candidate(r: Any) -> Dict[str, Any]:
+    distance = r["distance"]
+    return {
+        "chunk_id": int(r["chunk_id"]),
+        "idx": int(r["idx"]),
+        "start_sec": _safe_float(r["start_sec"]),
+        "end_sec": _safe_float(r["end_sec"]),
+        "text": str(r["text"]),
+        # cosine similarity; stays comparable to min_best_score thresholds in every fusion mode
+        "score": (1.0 - _safe_float(distance)) if distance is not None else 0.0,
+        "distance": _safe_float(distance, 1.0) if distance is not None else 1.0,
+        "sem_rank": int(r["sem_rank"]) if r["sem_rank"] is not None else None,
+        "lex_rank": int(r["lex_rank"]) if r["lex_rank"] is not None else None,
+        "lex_score": _safe_float(r["lex_score"]) if r["lex_score"] is not None else None,
+    }
+
+
+def _fuse_rrf(
+    cands: List[Dict[str, Any]],
+    *,
+    k: int,
+    w_sem: float,
+    w_lex: float,
+) -> List[Dict[str, Any]]:
+    """
+    Reciprocal Rank Fusion: sum_i w_i / (k + rank_i). Rank-based, so cosine and
+    ts_rank_cd never need to be put on the same scale.
+    """
+    for c in cands:
+        fused = 0.0
+        if c["sem_rank"] is not None:
+            fused += w_sem / (k + c["sem_rank"])
+        if c["lex_rank"] is not None:
+            fused += w_lex / (k + c["lex_rank"])
+        c["fused_score"] = fused
+    cands.sort(key=lambda d: (float(d["fused_score"]), float(d["score"])), reverse=True)
+    return cands
+
+
+def _fuse_boost(cands: List[Dict[str, Any]], *, weight: float) -> List[Dict[str, Any]]:
+    """
+    V2.7 behaviour: semantic list only; lexical matches re-rank it via
+    score += weight * ts_rank_cd.
+    """
+    out = [c for c in cands if c["sem_rank"] is not None]
+    for c in out:
+        if c["lex_score"] is not None:
+            c["score"] = float(c["score"]) + weight * float(c["lex_score"])
+        c["fused_score"] = float(c["score"])
+    out.sort(key=lambda d: float(d["score"]), reverse=True)
+    return out
+
+
+# -----------------------------
+# V2.9 — In-process per-pack vector index
+#
+# A single pack is tens to a few hundred chunks: one (n, dim) float32 matvec is
+# microseconds, while a pgvector round-trip is dominated by network + planning.
+# Packs stay resident with LRU-by-bytes eviction; entries are keyed by
+# (study_pack_id, model) and validated against study_packs.embedding_version
+# (bumped by embed_transcript_chunks and by re-ingest) on every search.
+# -----------------------------
+@dataclass
+class _PackIndex:
+    version: int
+    matrix: np.ndarray  # (n, dim) float32, C-contiguous, rows L2-normalised
+    chunk_ids: np.ndarray  # (n,) int64
+    idxs: np.ndarray  # (n,) int32
+    start_secs: np.ndarray  # (n,) float64
+    end_secs: np.ndarray  # (n,) float64
+    texts: List[str]
+    row_of: Dict[int, int]  # chunk_id -> row
+
+    @property
+    def nbytes(self) -> int:
+        arrays = self.matrix.nbytes + self.chunk_ids.nbytes + self.idxs.nbytes
+        arrays += self.start_secs.nbytes + self.end_secs.nbytes
+        # rough python-object overhead for texts + row map
+        return int(arrays + sum(len(t) + 49 for t in self.texts) + 100 * len(self.row_of))
+
+
+class _PackIndexCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self._items: "OrderedDict[Tuple[int, str], _PackIndex]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, str], version: int) -> Optional[_PackIndex]:
+        with self._lock:
+            ix = self._items.get(key)
+            if ix is None:
+                return None
+            if ix.version != version:
+                self._drop(key)
+                return None
+            self._items.move_to_end(key)
+            return ix
+
+    def put(self, key: Tuple[int, str], ix: _PackIndex) -> None:
+        size = ix.nbytes
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            if size > self.max_bytes:
+                return  # would evict everything else; serve it uncached
+            self._items[key] = ix
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                self._drop(next(iter(self._items)))
+
+    def invalidate(self, study_pack_id: int) -> None:
+        with self._lock:
+            for key in [k for k in self._items if k[0] == study_pack_id]:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"packs": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def _drop(self, key: Tuple[int, str]) -> None:
+        ix = self._items.pop(key, None)
+        if ix is not None:
+            self._bytes -= ix.nbytes
+
+
+_PACK_INDEX_CACHE = _PackIndexCache(settings.kb_pack_index_max_bytes)
+
+
+def _embedding_version(db: Session, study_pack_id: int) -> Optional[int]:
+    v = db.execute(
+        text("SELECT embedding_version FROM study_packs WHERE id = :id"),
+        {"id": study_pack_id},
+    ).scalar()
+    return int(v) if v is not None else None
+
+
+def _load_pack_index(db: Session, study_pack_id: int, spec: EmbedModelSpec, version: int) -> _PackIndex:
+    rows = db.execute(
+        text(
+            f"""
+            SELECT e.chunk_id, tc.idx, tc.start_sec, tc.end_sec, tc.text, e.{spec.column}::text AS vec
+            FROM transcript_chunk_embeddings e
+            JOIN transcript_chunks tc ON tc.id = e.chunk_id
+            WHERE e.study_pack_id = :study_pack_id
+              AND e.model = :model
+              AND e.dim = {int(spec.dim)}
+              AND e.{spec.column} IS NOT NULL
+            ORDER BY tc.idx ASC
+            """
+        ),
+        {"study_pack_id": study_pack_id, "model": spec.name},
+    ).all()
+
+    n = len(rows)
+    matrix = np.empty((n, spec.dim), dtype=np.float32)
+    for i, r in enumerate(rows):
+        matrix[i] = json.loads(r[5])  # pgvector text form "[a,b,...]" is valid JSON
+    # Stored vectors are normalised at embed time; re-normalise anyway (halfvec rounding).
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, np.maximum(norms, 1e-12), out=matrix)
+
+    chunk_ids = np.fromiter((int(r[0]) for r in rows), dtype=np.int64, count=n)
+    return _PackIndex(
+        version=version,
+        matrix=np.ascontiguousarray(matrix),
+        chunk_ids=chunk_ids,
+        idxs=np.fromiter((int(r[1]) for r in rows), dtype=np.int32, count=n),
+        start_secs=np.fromiter((_safe_float(r[2]) for r in rows), dtype=np.float64, count=n),
+        end_secs=np.fromiter((_safe_float(r[3]) for r in rows), dtype=np.float64, count=n),
+        texts=[str(r[4]) for r in rows],
+        row_of={int(c): i for i, c in enumerate(chunk_ids.tolist())},
+    )
+
+
+def _get_pack_index(db: Session, study_pack_id: int, spec: EmbedModelSpec) -> Optional[_PackIndex]:
+    version = _embedding_version(db, study_pack_id)
+    if version is None:
+        return None
+    key = (int(study_pack_id), spec.name)
+    ix = _PACK_INDEX_CACHE.get(key, version)
+    if ix is None:
+        ix = _load_pack_index(db, study_pack_id, spec, version)
+        _PACK_INDEX_CACHE.put(key, ix)
+    return ix
+
+
+def _memory_row(ix: _PackIndex, row: int, sim: float) -> Dict[str, Any]:
+    return {
+        "chunk_id": int(ix.chunk_ids[row]),
+        "idx": int(ix.idxs[row]),
+        "start_sec": float(ix.start_secs[row]),
+        "end_sec": float(ix.end_secs[row]),
+        "text": ix.texts[row],
+        "score": float(sim),
+        "distance": float(1.0 - sim),
+        "sem_rank": None,
+        "lex_rank": None,
+        "lex_score": None,
+    }
+
+
+def _memory_candidates(
+    db: Session,
+    ix: _PackIndex,
+    q_vec: np.ndarray,
+    *,
+    study_pack_id: int,
+    text_q: str,
+    k_sem: int,
+    k_lex: int,
+    from_sec: Optional[float] = None,
+    to_sec: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Same candidate shape as _candidates_sql, semantic side answered from memory.
+
+    Like the SQL path, lexical hits without a vector for this model (pack not
+    fully embedded) stay in as lexical-only candidates with score 0.0, so both
+    backends fuse the same set.
+    """
+    n = ix.matrix.shape[0]
+    sims = ix.matrix @ q_vec if n else np.empty(0, dtype=np.float32)  # one matvec, (n,)
+    timed = from_sec is not None or to_sec is not None
+    if timed:
+        # V2.16 — same overlap predicate as _time_sql
+        tp = _time_params(from_sec, to_sec)
+        outside = (ix.start_secs > tp["to_sec"]) | (ix.end_secs < tp["from_sec"])
+        n = int(n - outside.sum())
+        sims = np.where(outside, -np.inf, sims)
+    total = ix.matrix.shape[0]
+    k = min(int(k_sem), n)  # n = rows inside the time window
+    if k <= 0:
+        top = np.empty(0, dtype=np.int64)
+    elif k < total:
+        top = np.argpartition(-sims, k - 1)[:k]
+    else:
+        top = np.arange(total)
+    top = top[np.argsort(-sims[top], kind="stable")]
+
+    by_chunk: Dict[int, Dict[str, Any]] = {}
+    for rank, row in enumerate(top.tolist(), start=1):
+        c = _memory_row(ix, row, float(sims[row]))
+        c["sem_rank"] = rank
+        by_chunk[c["chunk_id"]] = c
+
+    if k_lex > 0:
+        lex_rows = db.execute(
+            text(_lex_sql(_SCOPE_PACK, timed=timed)),
+            {"q": text_q, "study_pack_id": study_pack_id, "k_lex": int(k_lex), **_time_params(from_sec, to_sec)},
+        ).mappings().all()
+        for r in lex_rows:
+            cid = int(r["chunk_id"])
+            c = by_chunk.get(cid)
+            if c is None:
+                row = ix.row_of.get(cid)
+                if row is not None:
+                    c = _memory_row(ix, row, float(sims[row]))
+                else:
+                    # not embedded with this model: lexical-only, as in _candidates_sql
+                    c = {
+                        "chunk_id": cid,
+                        "idx": int(r["idx"]),
+                        "start_sec": _safe_float(r["start_sec"]),
+                        "end_sec": _safe_float(r["end_sec"]),
+                        "text": str(r["text"]),
+                        "score": 0.0,
+                        "distance": 1.0,
+                        "sem_rank": None,
+                        "lex_rank": None,
+                        "lex_score": None,
+                    }
+                by_chunk[cid] = c
+            c["lex_rank"] = int(r["lex_rank"])
+            c["lex_score"] = _safe_float(r["lex_score"])
+
+    return list(by_chunk.values())
+
+
+def _pool_sizes(limit: int, *, hybrid: bool, fusion: str) -> Tuple[int, int]:
+    """
+    Candidate pool sizes (k_sem, k_lex):
+    - semantic-only: exactly `limit`
+    - boost: semantic top-`limit` re-ranked by a wider lexical list (V2.7)
+    - rrf: both lists deep enough that a strong hit in one can outrank the other
+    """
+    if not hybrid:
+        return limit, 0
+    if fusion == FUSION_BOOST:
+        return limit, limit * 3
+    k = max(limit, int(settings.kb_rrf_candidates))
+    return k, k
+
+
+def _resolve_fusion(fusion: Optional[str]) -> str:
+    f = (fusion or settings.kb_fusion or FUSION_RRF).strip().lower()
+    if f not in FUSION_MODES:
+        raise ValueError(f"Invalid fusion={f!r} (expected one of {sorted(FUSION_MODES)})")
+    return f
+
+
+def _rank(
+    cands: List[Dict[str, Any]],
+    *,
+    limit: int,
+    hybrid: bool,
+    fusion: str,
+    rrf_k: Optional[int],
+    w_sem: Optional[float],
+    w_lex: Optional[float],
+) -> List[Dict[str, Any]]:
+    if not hybrid:
+        cands.sort(key=lambda d: float(d["distance"]))
+        for c in cands:
+            c["fused_score"] = float(c["score"])
+        return cands[:limit]
+
+    if fusion == FUSION_BOOST:
+        return _fuse_boost(cands, weight=settings.kb_lexical_weight)[:limit]
+
+    return _fuse_rrf(
+        cands,
+        k=int(rrf_k if rrf_k is not None else settings.kb_rrf_k),
+        w_sem=float(w_sem if w_sem is not None else settings.kb_rrf_semantic_weight),
+        w_lex=float(w_lex if w_lex is not None else settings.kb_rrf_lexical_weight),
+    )[:limit]
+
+
 def kb_search_chunks(
     db: Session,
     study_pack_id: int,
@@ -46,6 +614,19 @@ def kb_search_chunks(
     limit: int = 5,
     model: str = "sentence-transformers/all-MiniLM-L6-v2",
     hybrid: bool = True,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+    fusion: Optional[str] = None,
+    rrf_k: Optional[int] = None,
+    w_sem: Optional[float] = None,
+    w_lex: Optional[float] = None,
+    backend: Optional[str] = None,
+    diversify: bool = False,
+    mmr_lambda: Optional[float] = None,
+    rerank: bool = False,
+    from_sec: Optional[float] = None,
+    to_sec: Optional[float] = None,
+    info: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     """
     V2.2 — Hybrid retrieval over transcript chunks.
@@ -54,99 +635,251 @@ def kb_search_chunks(
       q: query string (canonical)
       query: alias for q (compat)
       hybrid: if True, blend semantic + lexical; if False, semantic-only
+      ef_search: HNSW candidate list size for this query (default: settings)
+      iterative_scan: off | strict_order | relaxed_order (default: settings)
+      fusion: "rrf" (V2.8, default) or "boost" (lexical only re-ranks semantic hits)
+      rrf_k / w_sem / w_lex: RRF constant and per-source weights (default: settings)
+      backend: "memory" (V2.9 in-process index; lexical side still in Postgres),
+               "pgvector", or "auto"/None (memory when KB_PACK_INDEX is enabled)
+      diversify: V2.13 — MMR over a wider fused pool (mmr_lambda, default
+               settings), then adjacent-idx hits merged into spans; span items
+               add `idx_end` / `chunk_ids` and may number fewer than `limit`
+      rerank: V2.14 — cross-encoder re-rank of the top KB_RERANK_TOP_N fused
+               candidates (adds `rerank_score`); silently keeps the fused order
+               when the latency budget is exceeded
+      from_sec / to_sec: V2.16 — only chunks overlapping this time window
+               (either bound optional); applied inside candidate generation
+      info: optional dict filled with details of the run: `query_vec` (the
+               normalised query embedding) and `rerank` (the rerank_items
+               info: applied, reason, ms, ...)
+
+    Items carry `score` (cosine similarity), `fused_score` (ordering key) and
+    per-source `sem_rank` / `lex_rank` / `lex_score` for debugging.
     """
     text_q = (q if q is not None else query) or ""
     text_q = text_q.strip()
     if not text_q:
         return []
 
-    # 1) Semantic search (pgvector)
+    fusion = _resolve_fusion(fusion)
+    pool = limit * max(1, int(settings.kb_mmr_pool_factor)) if diversify else limit
+    if rerank:
+        pool = max(pool, int(settings.kb_rerank_top_n))
+
     q_vec = embed_texts([text_q], model_name=model, normalize=True)[0]
-    dim = len(q_vec)
-    qvec_literal = _to_pgvector_literal([float(x) for x in q_vec])
-
-    # Important:
-    # - bind :qvec as TEXT and cast to ::vector in SQL
-    # - otherwise psycopg sends python list as double precision[] and pgvector <=> fails
-    stmt = text(
-        """
-        SELECT
-          tce.chunk_id AS chunk_id,
-          tc.idx AS idx,
-          tc.start_sec AS start_sec,
-          tc.end_sec AS end_sec,
-          tc.text AS text,
-          (1.0 - (tce.embedding <=> (:qvec)::vector)) AS score,
-          (tce.embedding <=> (:qvec)::vector) AS distance
-        FROM transcript_chunk_embeddings tce
-        JOIN transcript_chunks tc ON tc.id = tce.chunk_id
-        WHERE tce.study_pack_id = :study_pack_id
-          AND tce.model = :model
-          AND tce.dim = :dim
-        ORDER BY tce.embedding <=> (:qvec)::vector
-        LIMIT :k
-        """
-    ).bindparams(
-        bindparam("qvec"),
-        bindparam("study_pack_id"),
-        bindparam("model"),
-        bindparam("dim"),
-        bindparam("k"),
-    )
+    if info is not None:
+        info["query_vec"] = q_vec
+    spec = resolve_model_spec(model, len(q_vec))
+    k_sem, k_lex = _pool_sizes(pool, hybrid=hybrid, fusion=fusion)
 
-    sem_rows = (
-        db.execute(
-            stmt,
-            {
-                "qvec": qvec_literal,
-                "study_pack_id": study_pack_id,
-                "model": model,
-                "dim": dim,
-                "k": int(limit),
-            },
+    backend = (backend or BACKEND_AUTO).strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid backend={backend!r} (expected one of {sorted(BACKENDS)})")
+    use_memory = backend == BACKEND_MEMORY or (backend == BACKEND_AUTO and settings.kb_pack_index_enabled)
+
+    ix = _get_pack_index(db, study_pack_id, spec) if use_memory else None
+    vec_text: Dict[int, Optional[str]] = {}
+    if ix is not None:
+        cands = _memory_candidates(
+            db,
+            ix,
+            np.asarray(q_vec, dtype=np.float32),
+            study_pack_id=study_pack_id,
+            text_q=text_q,
+            k_sem=k_sem,
+            k_lex=k_lex,
+            from_sec=from_sec,
+            to_sec=to_sec,
         )
-        .mappings()
-        .all()
-    )
+    else:
+        _apply_ann_settings(
+            db,
+            ef_search=_effective_ef_search(ef_search, settings.kb_hnsw_ef_search, k_sem),
+            iterative_scan=iterative_scan,
+        )
+        rows = _run_candidates(
+            db,
+            spec,
+            scope=_SCOPE_PACK,
+            q_vecs=[q_vec],
+            texts=[text_q],
+            k_sem=k_sem,
+            k_lex=k_lex,
+            study_pack_id=study_pack_id,
+            with_vectors=diversify,
+            from_sec=from_sec,
+            to_sec=to_sec,
+        )[0]
+        cands = [_row_to_candidate(r) for r in rows]
+        if diversify:
+            vec_text = {int(r["chunk_id"]): r["vec"] for r in rows}
 
-    sem_items: List[Dict[str, Any]] = []
-    for r in sem_rows:
-        sem_items.append(
-            {
-                "chunk_id": int(r["chunk_id"]),
-                "idx": int(r["idx"]),
-                "start_sec": _safe_float(r["start_sec"]),
-                "end_sec": _safe_float(r["end_sec"]),
-                "text": str(r["text"]),
-                "score": _safe_float(r["score"]),
-                "distance": _safe_float(r["distance"]),
+    ranked = _rank(cands, limit=pool, hybrid=hybrid, fusion=fusion, rrf_k=rrf_k, w_sem=w_sem, w_lex=w_lex)
+    if rerank:
+        ranked, rerank_info = rerank_items(text_q, ranked)
+        if info is not None:
+            info["rerank"] = rerank_info
+    if not diversify:
+        return ranked[:limit]
+
+    vecs = [_candidate_vector(ix, vec_text, int(c["chunk_id"])) for c in ranked]
+    lam = float(mmr_lambda if mmr_lambda is not None else settings.kb_mmr_lambda)
+    picked = mmr_select(ranked, vecs, k=limit, lam=lam)
+    return merge_adjacent(picked, max_gap=int(settings.kb_merge_max_gap))
+
+
+def _candidate_vector(
+    ix: Optional[_PackIndex],
+    vec_text: Dict[int, Optional[str]],
+    chunk_id: int,
+) -> Optional[np.ndarray]:
+    """V2.13 — Stored vector for MMR: from the pack index, else the SQL `vec` text."""
+    if ix is not None:
+        row = ix.row_of.get(chunk_id)
+        return ix.matrix[row] if row is not None else None
+    raw = vec_text.get(chunk_id)
+    if not raw:
+        return None
+    v = np.asarray(json.loads(raw), dtype=np.float32)
+    return v / max(float(np.linalg.norm(v)), 1e-12)
+
+
+def kb_search_library(
+    db: Session,
+    *,
+    q: str,
+    pack_ids: Optional[List[int]] = None,
+    playlist_id: Optional[str] = None,
+    limit: int = 10,
+    model: str = "sentence-transformers/all-MiniLM-L6-v2",
+    hybrid: bool = True,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+    fusion: Optional[str] = None,
+    rrf_k: Optional[int] = None,
+    w_sem: Optional[float] = None,
+    w_lex: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    V2.10 — Cross-pack retrieval (playlist / explicit pack list / whole library).
+
+    One query embedding, one statement: the same semantic + lexical candidate
+    lists as kb_search_chunks, with a pack filter instead of a single pack.
+    playlist_id and pack_ids combine (union); neither = every pack.
+
+    Filtered HNSW scans drop candidates outside the scope after the index walk,
+    so ef_search defaults higher here (KB_LIBRARY_EF_SEARCH); with pgvector >= 0.8
+    KB_HNSW_ITERATIVE_SCAN=relaxed_order is recommended (results are re-ranked in
+    Python, so relaxed ordering is harmless).
+
+    Items are kb_search_chunks items plus study_pack_id / study_pack_title /
+    source_url / playlist_id / playlist_index.
+    """
+    text_q = (q or "").strip()
+    if not text_q:
+        return []
+
+    fusion = _resolve_fusion(fusion)
+
+    scope = _SCOPE_ALL
+    ids: List[int] = sorted({int(x) for x in (pack_ids or [])})
+    if playlist_id:
+        ids = sorted(
+            set(ids)
+            | {
+                int(r[0])
+                for r in db.execute(
+                    text("SELECT id FROM study_packs WHERE playlist_id = :pid"),
+                    {"pid": playlist_id},
+                ).all()
             }
         )
+    if pack_ids is not None or playlist_id:
+        if not ids:
+            return []
+        scope = _SCOPE_PACKS
 
-    if not hybrid:
-        return sem_items[:limit]
-
-    # 2) Lexical boost (simple ILIKE, small candidate pool)
-    tokens = [
-        t
-        for t in text_q.lower().replace(":", " ").replace(",", " ").split()
-        if len(t) >= 3
-    ][:8]
-    if not tokens:
-        return sem_items[:limit]
-
-    lex_query = db.query(TranscriptChunk).filter(
-        TranscriptChunk.study_pack_id == study_pack_id
+    q_vec = embed_texts([text_q], model_name=model, normalize=True)[0]
+    spec = resolve_model_spec(model, len(q_vec))
+    k_sem, k_lex = _pool_sizes(limit, hybrid=hybrid, fusion=fusion)
+
+    _apply_ann_settings(
+        db,
+        ef_search=_effective_ef_search(ef_search, settings.kb_library_ef_search, k_sem),
+        iterative_scan=iterative_scan,
     )
-    for t in tokens:
-        lex_query = lex_query.filter(TranscriptChunk.text.ilike(f"%{t}%"))
+    rows = _run_candidates(
+        db,
+        spec,
+        scope=scope,
+        q_vecs=[q_vec],
+        texts=[text_q],
+        k_sem=k_sem,
+        k_lex=k_lex,
+        pack_ids=ids,
+    )[0]
+
+    cands: List[Dict[str, Any]] = []
+    for r in rows:
+        c = _row_to_candidate(r)
+        c["study_pack_id"] = int(r["study_pack_id"])
+        c["study_pack_title"] = r["study_pack_title"]
+        c["source_url"] = r["source_url"]
+        c["playlist_id"] = r["playlist_id"]
+        c["playlist_index"] = r["playlist_index"]
+        cands.append(c)
+
+    return _rank(cands, limit=limit, hybrid=hybrid, fusion=fusion, rrf_k=rrf_k, w_sem=w_sem, w_lex=w_lex)
 
-    lex_rows = lex_query.order_by(TranscriptChunk.idx.asc()).limit(limit * 3).all()
-    lex_ids = {int(x.id) for x in lex_rows}
 
-    for it in sem_items:
-        if int(it["chunk_id"]) in lex_ids:
-            it["score"] = float(it["score"]) + 0.08
+def kb_search_batch(
+    db: Session,
+    study_pack_id: int,
+    *,
+    queries: List[str],
+    limit: int = 5,
+    model: str = "sentence-transformers/all-MiniLM-L6-v2",
+    hybrid: bool = True,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None,
+    fusion: Optional[str] = None,
+    rrf_k: Optional[int] = None,
+    w_sem: Optional[float] = None,
+    w_lex: Optional[float] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    V2.11 — Many queries against one pack: one embed_texts batch, one SQL statement
+    (LATERAL over the unnested query vectors). Returns one item list per input
+    query, in input order; blank queries get [].
+    """
+    texts = [(x or "").strip() for x in (queries or [])]
+    out: List[List[Dict[str, Any]]] = [[] for _ in texts]
+    live = [i for i, t in enumerate(texts) if t]
+    if not live:
+        return out
+
+    fusion = _resolve_fusion(fusion)
+    q_vecs = embed_texts([texts[i] for i in live], model_name=model, normalize=True)
+    spec = resolve_model_spec(model, len(q_vecs[0]))
+    k_sem, k_lex = _pool_sizes(limit, hybrid=hybrid, fusion=fusion)
+
+    _apply_ann_settings(
+        db,
+        ef_search=_effective_ef_search(ef_search, settings.kb_hnsw_ef_search, k_sem),
+        iterative_scan=iterative_scan,
+    )
+    grouped = _run_candidates(
+        db,
+        spec,
+        scope=_SCOPE_PACK,
+        q_vecs=q_vecs,
+        texts=[texts[i] for i in live],
+        k_sem=k_sem,
+        k_lex=k_lex,
+        study_pack_id=study_pack_id,
+    )
 
-    sem_items.sort(key=lambda d: float(d["score"]), reverse=True)
-    return sem_items[:limit]
\ No newline at end of file
+    for i, rows in zip(live, grouped):
+        cands = [_row_to_candidate(r) for r in rows]
+        out[i] = _rank(cands, limit=limit, hybrid=hybrid, fusion=fusion, rrf_k=rrf_k, w_sem=w_sem, w_lex=w_lex)
+    return out
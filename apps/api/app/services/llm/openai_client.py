@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import os
 import re
+import threading
 import time
 from typing import Any, Dict, Tuple
 
@@ -96,7 +97,15 @@ def _compress_transcript(transcript_text: str, max_chars: int = 9000) -> str:
 # OpenAI call helpers (SDK compatible)
 # ----------------------------
 
+_client_lock = threading.Lock()
+_client_cache: Dict[Tuple[str, float, int, int], Any] = {}
+
+
 def _build_openai_client():
+    """
+    V2.26 — One OpenAI client per (key, timeout, retries), reused across
+    generations, on the shared "openai" keep-alive pool (http_clients).
+    """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY is missing")
@@ -104,10 +113,22 @@ def _build_openai_client():
     timeout_sec = float(os.getenv("OPENAI_TIMEOUT_SEC", "180"))
     max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
 
-    # OpenAI SDK v1+
-    from openai import OpenAI  # type: ignore
+    from app.services.http_clients import get_sync_client
+
+    http_client = get_sync_client("openai")
+    # the pool's identity is part of the key: a closed/recreated pool gets a new client
+    key = (api_key, timeout_sec, max_retries, id(http_client))
+
+    with _client_lock:
+        client = _client_cache.get(key)
+        if client is None:
+            # OpenAI SDK v1+
+            from openai import OpenAI  # type: ignore
 
-    return OpenAI(api_key=api_key, timeout=timeout_sec, max_retries=max_retries)
+            _client_cache.clear()
+            client = OpenAI(api_key=api_key, timeout=timeout_sec, max_retries=max_retries, http_client=http_client)
+            _client_cache[key] = client
+        return client
 
 
 def _extract_json(text: str) -> dict[str, Any]:
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
-import httpx
+from app.services.http_clients import get_sync_client
 
 
 @dataclass
@@ -42,10 +42,10 @@ class OllamaClient:
         if system:
             payload["system"] = system
 
-        with httpx.Client(timeout=self.timeout_s) as client:
-            r = client.post(url, json=payload)
-            r.raise_for_status()
-            data = r.json()
+        # V2.26 — shared keep-alive pool instead of a client per call
+        r = get_sync_client("ollama").post(url, json=payload, timeout=self.timeout_s)
+        r.raise_for_status()
+        data = r.json()
 
         # Ollama returns {"response": "...", ...}
         text = (data.get("response") or "").strip()
@@ -0,0 +1,63 @@
+# apps/api/app/services/pagination.py
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Query, Session
+
+
+# -----------------------------
+# V2.17 — Keyset pagination helpers
+#
+# Cursors are opaque to clients: urlsafe base64 of a small JSON object holding
+# the sort key of the last row served (+ a kind tag so a cursor from one
+# listing can't be replayed against another).
+# -----------------------------
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATE = "estimate"
+COUNT_NONE = "none"
+
+
+def encode_cursor(kind: str, key: Dict[str, Any]) -> str:
+    raw = json.dumps({"k": kind, **key}, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str) -> Dict[str, Any]:
+    """Raises ValueError for malformed cursors or cursors of another kind."""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + pad).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if not isinstance(data, dict) or data.pop("k", None) != kind:
+        raise ValueError("Invalid cursor")
+    return data
+
+
+def planner_row_estimate(db: Session, query: Query) -> int:
+    """
+    Planner's row estimate for `query` (EXPLAIN, nothing executed). Cheap and
+    good enough for "about N results"; exact after ANALYZE on unfiltered tables.
+    """
+    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+    plan = (
+        db.connection()
+        .exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params)
+        .scalar()
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(db: Session, query: Query, mode: str) -> Optional[int]:
+    """exact -> COUNT(*); estimate -> planner estimate; none -> None."""
+    if mode == COUNT_NONE:
+        return None
+    if mode == COUNT_ESTIMATE:
+        return planner_row_estimate(db, query.order_by(None))
+    return query.order_by(None).count()
@@ -563,6 +563,27 @@ def validate_payload(
 # DB upsert
 # ----------------------------
 
+def _finite(obj: Any) -> Any:
+    if isinstance(obj, float) and (obj != obj or obj in (float("inf"), float("-inf"))):
+        return None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _dumps_finite(obj: Any) -> str:
+    """
+    V2.24 — content_json is spliced into responses as-is, so it must be strict
+    JSON: NaN / Infinity (json.dumps' default) are written as null.
+    """
+    try:
+        return json.dumps(obj, allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(obj), allow_nan=False)
+
+
 def upsert_material(
     db: Session,
     study_pack_id: int,
@@ -582,7 +603,7 @@ def upsert_material(
         db.add(m)
 
     m.status = status
-    m.content_json = json.dumps(content_json_obj) if content_json_obj is not None else None
+    m.content_json = _dumps_finite(content_json_obj) if content_json_obj is not None else None
     m.content_text = content_text
     m.error = error
     db.commit()
@@ -1,7 +1,36 @@
 import json
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, defer
 
 from app.models.study_pack import StudyPack
+from app.services.transcript_codec import encode_segments
+
+
+# V2.19 — meta_json / transcript_json / transcript_text can be megabytes per row.
+# Endpoints that don't return them load packs with these deferred.
+def light_pack_options() -> list:
+    return [
+        defer(StudyPack.meta_json),
+        defer(StudyPack.transcript_json),
+        defer(StudyPack.transcript_text),
+        defer(StudyPack.transcript_bin),
+    ]
+
+
+def study_pack_exists(db: Session, study_pack_id: int) -> bool:
+    """PK-only existence check (index-only scan, no row payload transferred)."""
+    return db.query(StudyPack.id).filter(StudyPack.id == study_pack_id).first() is not None
+
+
+def get_study_pack_light(db: Session, study_pack_id: int) -> StudyPack | None:
+    """The pack without its heavy text columns (they lazy-load if touched)."""
+    return db.query(StudyPack).options(*light_pack_options()).filter(StudyPack.id == study_pack_id).first()
+
+
+async def get_study_pack_light_async(db, study_pack_id: int) -> StudyPack | None:
+    """V2.27 — get_study_pack_light on an AsyncSession (heavy columns must not be touched)."""
+    res = await db.execute(select(StudyPack).options(*light_pack_options()).where(StudyPack.id == study_pack_id))
+    return res.scalars().first()
 
 
 def create_study_pack(db: Session, source_type: str, source_url: str, source_id: str | None, language: str | None) -> StudyPack:
@@ -32,6 +61,7 @@ def set_ingested(
     sp.title = title or sp.title
     sp.meta_json = json.dumps(meta or {}, ensure_ascii=False)
     sp.transcript_json = json.dumps(transcript_segments, ensure_ascii=False)
+    sp.transcript_bin = encode_segments(transcript_segments)  # V2.21
     sp.transcript_text = transcript_text
     sp.language = language or sp.language
     sp.status = "ingested"
@@ -41,6 +71,18 @@ def set_ingested(
     return sp
 
 
+def bump_embedding_version(db: Session, study_pack_id: int) -> None:
+    """
+    V2.9 — Invalidate in-process vector indexes for this pack.
+    V2.12 — Also the pack's content version for the KB result cache (kb_cache).
+    Does not commit: call inside the same transaction as the embedding write.
+    """
+    db.query(StudyPack).filter(StudyPack.id == study_pack_id).update(
+        {StudyPack.embedding_version: StudyPack.embedding_version + 1},
+        synchronize_session=False,
+    )
+
+
 def set_failed(db: Session, study_pack_id: int, error: str) -> StudyPack:
     sp = db.query(StudyPack).filter(StudyPack.id == study_pack_id).one()
     sp.status = "failed"
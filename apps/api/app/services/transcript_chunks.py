@@ -5,6 +5,7 @@ from typing import Any
 from sqlalchemy.orm import Session
 
 from app.models.transcript_chunk import TranscriptChunk
+from app.services.study_packs import bump_embedding_version
 
 
 def segments_to_chunks(segments: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -56,8 +57,9 @@ def replace_chunks(db: Session, study_pack_id: int, chunks: list[dict[str, Any]]
     """
     Deletes old chunks for pack and inserts new ones, then commits.
     """
-    # Clear existing
+    # Clear existing (embeddings cascade)
     db.query(TranscriptChunk).filter(TranscriptChunk.study_pack_id == study_pack_id).delete()
+    bump_embedding_version(db, study_pack_id)
 
     if chunks:
         rows = [
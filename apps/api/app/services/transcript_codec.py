@@ -0,0 +1,141 @@
+# apps/api/app/services/transcript_codec.py
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import zstandard as zstd  # type: ignore
+except Exception:  # optional: zlib is always available
+    zstd = None
+
+
+# -----------------------------
+# V2.21 — Compact columnar transcript (study_packs.transcript_bin)
+#
+# transcript_json repeats {"text", "start", "duration"} keys and float reprs for
+# every segment and must be fully parsed to read anything. The binary form:
+#
+#   header   b"YLT1" | u8 codec (0 raw, 1 zlib, 2 zstd)
+#   payload  (compressed as a whole, little-endian)
+#     u32        n
+#     f32[n]     start (sec)
+#     f32[n]     duration (sec)
+#     u32[n+1]   byte offsets of each segment's text in the blob
+#     u8[...]    UTF-8 text blob (segments concatenated)
+#
+# Decoding is one decompress; the arrays are np.frombuffer views over the
+# payload (no per-segment objects) and texts are sliced from the blob lazily.
+# float32 spacing is ~0.24 ms at 1 h, ~2 ms at 4.6 h and ~4 ms at 10 h of
+# audio; caption timestamps are 10 ms granular, so that's plenty.
+# -----------------------------
+
+MAGIC = b"YLT1"
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+_ZSTD_LEVEL = 9
+_ZLIB_LEVEL = 6
+
+
+def _segment_fields(seg: Dict[str, Any]) -> tuple:
+    """(start, duration, text) for both youtube_transcript_api and start_sec/end_sec shapes."""
+    txt = str(seg.get("text") or "")
+    if "start_sec" in seg and "end_sec" in seg:
+        start = float(seg.get("start_sec") or 0.0)
+        dur = max(float(seg.get("end_sec") or start) - start, 0.0)
+    else:
+        start = float(seg.get("start") or 0.0)
+        dur = max(float(seg.get("duration") or 0.0), 0.0)
+    return start, dur, txt
+
+
+def encode_segments(segments: List[Dict[str, Any]], *, codec: Optional[int] = None) -> bytes:
+    """Segments -> transcript_bin bytes. Default codec: zstd if installed, else zlib."""
+    if codec is None:
+        codec = CODEC_ZSTD if zstd is not None else CODEC_ZLIB
+
+    fields = [_segment_fields(s) for s in (segments or [])]
+    n = len(fields)
+    starts = np.fromiter((f[0] for f in fields), dtype="<f4", count=n)
+    durs = np.fromiter((f[1] for f in fields), dtype="<f4", count=n)
+
+    encoded = [f[2].encode("utf-8") for f in fields]
+    offsets = np.zeros(n + 1, dtype="<u4")
+    if n:
+        offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+
+    payload = b"".join([struct.pack("<I", n), starts.tobytes(), durs.tobytes(), offsets.tobytes(), *encoded])
+
+    if codec == CODEC_ZSTD:
+        if zstd is None:
+            raise ValueError("zstandard is not installed")
+        body = zstd.ZstdCompressor(level=_ZSTD_LEVEL).compress(payload)
+    elif codec == CODEC_ZLIB:
+        body = zlib.compress(payload, _ZLIB_LEVEL)
+    elif codec == CODEC_RAW:
+        body = payload
+    else:
+        raise ValueError(f"Unknown transcript codec {codec}")
+
+    return MAGIC + bytes([codec]) + body
+
+
+class DecodedTranscript:
+    """Read-only columnar view; `starts`/`durations`/`offsets` share the payload buffer."""
+
+    __slots__ = ("n", "starts", "durations", "offsets", "_blob")
+
+    def __init__(self, payload: bytes | memoryview) -> None:
+        mv = memoryview(payload)
+        (n,) = struct.unpack_from("<I", mv, 0)
+        pos = 4
+        self.n = int(n)
+        self.starts = np.frombuffer(mv, dtype="<f4", count=n, offset=pos)
+        pos += 4 * n
+        self.durations = np.frombuffer(mv, dtype="<f4", count=n, offset=pos)
+        pos += 4 * n
+        self.offsets = np.frombuffer(mv, dtype="<u4", count=n + 1, offset=pos)
+        pos += 4 * (n + 1)
+        self._blob = mv[pos:]
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def nbytes(self) -> int:
+        return 4 + 12 * self.n + 4 + len(self._blob)
+
+    def text(self, i: int) -> str:
+        return str(self._blob[int(self.offsets[i]) : int(self.offsets[i + 1])], "utf-8")
+
+    def segment(self, i: int) -> Dict[str, Any]:
+        return {"text": self.text(i), "start": float(self.starts[i]), "duration": float(self.durations[i])}
+
+    def segments(self, lo: int = 0, hi: Optional[int] = None) -> List[Dict[str, Any]]:
+        hi = self.n if hi is None else min(int(hi), self.n)
+        return [self.segment(i) for i in range(max(int(lo), 0), hi)]
+
+
+def decode_transcript(data: bytes | memoryview) -> DecodedTranscript:
+    """transcript_bin bytes -> DecodedTranscript. Raises ValueError on bad data."""
+    mv = memoryview(data)
+    if len(mv) < 5 or bytes(mv[:4]) != MAGIC:
+        raise ValueError("Not a transcript_bin blob")
+    codec = mv[4]
+    body = mv[5:]
+    if codec == CODEC_ZSTD:
+        if zstd is None:
+            raise ValueError("transcript_bin is zstd-compressed but zstandard is not installed")
+        payload = zstd.ZstdDecompressor().decompress(body)
+    elif codec == CODEC_ZLIB:
+        payload = zlib.decompress(body)
+    elif codec == CODEC_RAW:
+        payload = body
+    else:
+        raise ValueError(f"Unknown transcript codec {codec}")
+    return DecodedTranscript(payload)
@@ -0,0 +1,250 @@
+# apps/api/app/services/transcript_segments.py
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.transcript_codec import CODEC_RAW, DecodedTranscript, decode_transcript, encode_segments
+
+
+# -----------------------------
+# V2.20 — Segment streaming
+#
+# transcript_json is either a JSON array of segments (set_ingested) or
+# {"segments": [...]} (older rows / fixtures). Postgres splits it with
+# json_array_elements and a server-side cursor hands rows over in batches, so
+# the API process never holds the whole transcript string, let alone a parsed
+# list of it.
+# -----------------------------
+
+_SEGMENTS_SQL = """
+    SELECT s.seg::text
+    FROM study_packs sp
+    CROSS JOIN LATERAL json_array_elements(
+        CASE json_typeof(sp.transcript_json::json)
+            WHEN 'array' THEN sp.transcript_json::json
+            ELSE COALESCE(sp.transcript_json::json -> 'segments', '[]'::json)
+        END
+    ) WITH ORDINALITY AS s(seg, n)
+    WHERE sp.id = :study_pack_id
+      AND sp.transcript_json IS NOT NULL
+    ORDER BY s.n
+"""
+
+
+def iter_segment_json(study_pack_id: int, *, batch_size: int = 500) -> Iterator[str]:
+    """
+    Yield each transcript segment as its JSON text, in order.
+
+    Uses its own session: a StreamingResponse body runs after the request's
+    get_db session has been closed.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(_SEGMENTS_SQL),
+            {"study_pack_id": study_pack_id},
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        for (seg,) in result:
+            yield seg
+    finally:
+        db.close()
+
+
+def load_transcript(db: Session, study_pack_id: int) -> Optional[DecodedTranscript]:
+    """
+    V2.21 — Columnar transcript for a pack: transcript_bin when present, else
+    built from transcript_json (rows not yet backfilled). None if neither exists.
+    """
+    row = db.execute(
+        text(
+            "SELECT transcript_bin, CASE WHEN transcript_bin IS NULL THEN transcript_json END "
+            "FROM study_packs WHERE id = :id"
+        ),
+        {"id": study_pack_id},
+    ).first()
+    if row is None:
+        return None
+    blob, raw = row
+    if blob is not None:
+        return decode_transcript(blob)
+    if not raw:
+        return None
+    segs = json.loads(raw)
+    if isinstance(segs, dict):
+        segs = segs.get("segments") or []
+    return decode_transcript(encode_segments(segs, codec=CODEC_RAW))
+
+
+# -----------------------------
+# V2.22 — Time-window lookups
+#
+# "Segments around t=1234s" for the study page and citation jumps. Each pack's
+# decoded transcript is kept per process with sorted start times and a running
+# max of end times, so a window [from, to] is two np.searchsorted calls plus a
+# slice. Entries are LRU-by-bytes and validated against study_packs.updated_at
+# (set_ingested rewrites the row on re-ingest), so a re-ingested pack is
+# reloaded on its next request.
+# -----------------------------
+@dataclass
+class _TranscriptWindowIndex:
+    version: str
+    transcript: DecodedTranscript
+    order: Optional[np.ndarray]  # None when segments are already sorted by start
+    starts: np.ndarray  # (n,) float64, ascending
+    ends: np.ndarray  # (n,) float64, in `starts` order
+    max_ends: np.ndarray  # (n,) float64, running max of `ends` (non-decreasing)
+
+    @property
+    def nbytes(self) -> int:
+        extra = self.starts.nbytes + self.ends.nbytes + self.max_ends.nbytes
+        if self.order is not None:
+            extra += self.order.nbytes
+        return int(self.transcript.nbytes + extra)
+
+
+def _build_window_index(version: str, tr: DecodedTranscript) -> _TranscriptWindowIndex:
+    starts = tr.starts.astype(np.float64)
+    ends = starts + tr.durations.astype(np.float64)
+    order = None
+    if tr.n > 1 and bool(np.any(np.diff(starts) < 0)):
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        ends = ends[order]
+    max_ends = np.maximum.accumulate(ends) if tr.n else ends
+    return _TranscriptWindowIndex(
+        version=version, transcript=tr, order=order, starts=starts, ends=ends, max_ends=max_ends
+    )
+
+
+class _TranscriptCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self._items: "OrderedDict[int, _TranscriptWindowIndex]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, study_pack_id: int, version: str) -> Optional[_TranscriptWindowIndex]:
+        with self._lock:
+            ix = self._items.get(study_pack_id)
+            if ix is None:
+                return None
+            if ix.version != version:
+                self._drop(study_pack_id)
+                return None
+            self._items.move_to_end(study_pack_id)
+            return ix
+
+    def put(self, study_pack_id: int, ix: _TranscriptWindowIndex) -> None:
+        size = ix.nbytes
+        with self._lock:
+            if study_pack_id in self._items:
+                self._drop(study_pack_id)
+            if size > self.max_bytes:
+                return
+            self._items[study_pack_id] = ix
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                self._drop(next(iter(self._items)))
+
+    def invalidate(self, study_pack_id: int) -> None:
+        with self._lock:
+            self._drop(study_pack_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"packs": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def _drop(self, study_pack_id: int) -> None:
+        ix = self._items.pop(study_pack_id, None)
+        if ix is not None:
+            self._bytes -= ix.nbytes
+
+
+_TRANSCRIPT_CACHE = _TranscriptCache(settings.transcript_cache_max_bytes)
+
+
+def _transcript_version(db: Session, study_pack_id: int) -> Optional[str]:
+    v = db.execute(
+        text("SELECT updated_at FROM study_packs WHERE id = :id"),
+        {"id": study_pack_id},
+    ).first()
+    if v is None:
+        return None
+    return v[0].isoformat() if v[0] is not None else ""
+
+
+def _get_window_index(db: Session, study_pack_id: int) -> Tuple[bool, Optional[_TranscriptWindowIndex]]:
+    """(pack exists, index or None when the pack has no transcript)."""
+    version = _transcript_version(db, study_pack_id)
+    if version is None:
+        return False, None
+    ix = _TRANSCRIPT_CACHE.get(int(study_pack_id), version)
+    if ix is None:
+        tr = load_transcript(db, study_pack_id)
+        if tr is None:
+            return True, None
+        ix = _build_window_index(version, tr)
+        _TRANSCRIPT_CACHE.put(int(study_pack_id), ix)
+    return True, ix
+
+
+def segments_in_window(
+    db: Session,
+    study_pack_id: int,
+    *,
+    from_sec: Optional[float],
+    to_sec: Optional[float],
+    limit: int,
+) -> Optional[Dict[str, Any]]:
+    """
+    Segments overlapping [from_sec, to_sec] (start <= to and end >= from), in
+    time order, at most `limit`. Open bounds mean the start / end of the video.
+
+    Returns None if the pack doesn't exist; {"available": False} if it has no
+    transcript.
+    """
+    exists, ix = _get_window_index(db, study_pack_id)
+    if not exists:
+        return None
+    if ix is None:
+        return {"available": False}
+
+    lo_t = float("-inf") if from_sec is None else float(from_sec)
+    hi_t = float("inf") if to_sec is None else float(to_sec)
+
+    # First candidate: nothing before it ends at/after lo_t (max_ends is sorted).
+    lo = int(np.searchsorted(ix.max_ends, lo_t, side="left"))
+    hi = int(np.searchsorted(ix.starts, hi_t, side="right"))
+
+    rows = np.arange(lo, max(hi, lo))
+    if rows.size:
+        # Overlapping captions: a few rows past `lo` may still end before lo_t.
+        rows = rows[ix.ends[lo:hi] >= lo_t]
+    total = int(rows.size)
+    rows = rows[: max(int(limit), 0)]
+
+    src = rows if ix.order is None else ix.order[rows]
+    segments: List[Dict[str, Any]] = []
+    for i in src.tolist():
+        seg = ix.transcript.segment(int(i))
+        seg["i"] = int(i)
+        segments.append(seg)
+
+    return {
+        "available": True,
+        "segment_count": ix.transcript.n,
+        "total": total,
+        "truncated": total > len(segments),
+        "segments": segments,
+    }
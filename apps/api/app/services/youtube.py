@@ -167,4 +167,27 @@ def build_video_url(video_id: str, *, playlist_id: str | None = None, playlist_i
         base += f"&list={playlist_id}"
     if playlist_index is not None:
         base += f"&index={playlist_index}"
-    return base
\ No newline at end of file
+    return base
+
+
+def with_timestamp(url: str, sec: float) -> str:
+    """
+    Returns a YouTube URL with a timestamp parameter.
+    Works for:
+      - ...watch?v=...&list=...
+      - ...watch?v=...
+    Uses 't=' in seconds.
+    """
+    base = (url or "").strip()
+    if not base:
+        return base
+    try:
+        t = int(max(0.0, float(sec)))
+    except Exception:
+        t = 0
+
+    sep = "&" if "?" in base else "?"
+    # avoid duplicate t=
+    if "t=" in base:
+        return base
+    return f"{base}{sep}t={t}"
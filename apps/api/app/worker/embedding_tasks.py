@@ -15,7 +15,9 @@ from app.models.job import Job
 from app.models.study_pack import StudyPack
 from app.models.transcript_chunk import TranscriptChunk
 from app.models.transcript_chunk_embedding import TranscriptChunkEmbedding
+from app.services.embedding_store import STORAGE_HALFVEC, ensure_ann_index, resolve_model_spec
 from app.services.embeddings import DEFAULT_EMBED_MODEL, embed_texts
+from app.services.study_packs import bump_embedding_version
 
 
 def _db() -> Session:
@@ -88,11 +90,14 @@ def embed_transcript_chunks(job_id: int, study_pack_id: int, model_name: Optiona
         texts = [c.text for c in chunks]
         vecs = embed_texts(texts, model_name=model, normalize=True)
 
-        # basic sanity on dims
+        # V2.6 — dim + storage (vector/halfvec) come from the model registry
         dim = len(vecs[0]) if vecs else 0
-        if dim != 384:
-            _set_job_failed(db, job_id, f"Unexpected embedding dim={dim} (expected 384) for model={model}")
-            return {"ok": False, "error": f"Unexpected embedding dim={dim} (expected 384)"}
+        try:
+            spec = resolve_model_spec(model, dim)
+        except ValueError as e:
+            _set_job_failed(db, job_id, str(e))
+            return {"ok": False, "error": str(e)}
+        half = spec.storage == STORAGE_HALFVEC
 
         # Upsert rows
         # Use PostgreSQL INSERT ... ON CONFLICT for speed and idempotency.
@@ -105,7 +110,8 @@ def embed_transcript_chunks(job_id: int, study_pack_id: int, model_name: Optiona
                     "chunk_id": int(c.id),
                     "model": model,
                     "dim": int(dim),
-                    "embedding": v,
+                    "embedding": None if half else v,
+                    "embedding_half": v if half else None,
                 }
             )
 
@@ -117,12 +123,17 @@ def embed_transcript_chunks(job_id: int, study_pack_id: int, model_name: Optiona
                     "study_pack_id": stmt.excluded.study_pack_id,
                     "dim": stmt.excluded.dim,
                     "embedding": stmt.excluded.embedding,
+                    "embedding_half": stmt.excluded.embedding_half,
                     "updated_at": func.now(),
                 },
             )
             db.execute(stmt)
+            bump_embedding_version(db, study_pack_id)  # same txn as the upsert
             db.commit()
 
+        # No-op once the (storage, dim) index exists; session has no open txn here.
+        ensure_ann_index(db, spec)
+
         elapsed_ms = int((time.time() - t0) * 1000)
 
         # Compute counts
@@ -142,6 +153,7 @@ def embed_transcript_chunks(job_id: int, study_pack_id: int, model_name: Optiona
             "study_pack_id": study_pack_id,
             "model": model,
             "dim": dim,
+            "storage": spec.storage,
             "total_chunks": total_chunks,
             "embedded": int(embedded or 0),
             "elapsed_ms": elapsed_ms,
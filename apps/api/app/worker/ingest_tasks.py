@@ -10,7 +10,7 @@ from app.db.session import SessionLocal
 from app.models.study_pack import StudyPack
 from app.models.transcript_chunk import TranscriptChunk
 from app.services.jobs import merge_job_payload, set_job_status
-from app.services.study_packs import set_failed, set_ingested
+from app.services.study_packs import bump_embedding_version, set_failed, set_ingested
 import app.services.transcript as transcript
 from app.worker.celery_app import celery_app
 
@@ -198,8 +198,10 @@ def _segments_to_smart_chunks(segments: list[dict[str, Any]]) -> list[dict[str,
 def _replace_transcript_chunks(db: Session, study_pack_id: int, chunks: list[dict[str, Any]]) -> int:
     """
     Replace all chunks for a pack (idempotent).
+    Embeddings go with them (FK ON DELETE CASCADE), hence the version bump.
     """
     db.query(TranscriptChunk).filter(TranscriptChunk.study_pack_id == study_pack_id).delete()
+    bump_embedding_version(db, study_pack_id)
 
     if not chunks:
         db.commit()
@@ -0,0 +1,155 @@
+# apps/api/scripts/bench_ann_recall.py
+"""
+V2.5 — Recall vs latency: HNSW (pgvector) vs exact scan.
+
+Builds a synthetic corpus of unit vectors in a scratch table, creates the same
+HNSW index as migration a3f1c9e27b40 and compares top-k results for a sweep of
+hnsw.ef_search values against exact search (index scans disabled).
+
+Synthetic data is clustered (gaussian blobs around random centroids) so the
+neighbourhood structure looks like real transcript embeddings rather than
+uniform noise, which would make ANN look unrealistically bad.
+
+Usage (from apps/api):
+  python -m scripts.bench_ann_recall --n 1000000 --queries 200 --k 8
+  python -m scripts.bench_ann_recall --n 50000 --keep   # keep the table around
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # apps/api
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.config import settings  # noqa: E402
+
+TABLE = "bench_ann_chunk_embeddings"
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _synthetic(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = _unit(rng.standard_normal((clusters, dim)))
+    assign = rng.integers(0, clusters, size=n)
+    return _unit(centroids[assign] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32))
+
+
+def _lit(v: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in v) + "]"
+
+
+def _load(conn, vecs: np.ndarray, packs: int, batch: int = 20000) -> None:
+    raw = conn.connection.driver_connection  # psycopg3 connection
+    with raw.cursor() as cur:
+        for lo in range(0, len(vecs), batch):
+            with cur.copy(f"COPY {TABLE} (study_pack_id, embedding) FROM STDIN") as cp:
+                for i in range(lo, min(lo + batch, len(vecs))):
+                    cp.write_row((i % packs, _lit(vecs[i])))
+            print(f"  loaded {min(lo + batch, len(vecs))}/{len(vecs)}", flush=True)
+    raw.commit()
+
+
+def _topk(conn, qlit: str, k: int) -> List[int]:
+    rows = conn.execute(
+        text(f"SELECT id FROM {TABLE} ORDER BY embedding <=> (:q)::vector LIMIT :k"),
+        {"q": qlit, "k": k},
+    ).all()
+    return [int(r[0]) for r in rows]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--packs", type=int, default=5000)
+    ap.add_argument("--clusters", type=int, default=2000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--ef", type=str, default="16,40,64,100,200,400")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--keep", action="store_true", help="keep the scratch table and index")
+    ap.add_argument("--reuse", action="store_true", help="reuse an existing scratch table")
+    args = ap.parse_args()
+
+    engine = create_engine(settings.database_url)
+    rng = np.random.default_rng(args.seed + 1)
+
+    with engine.connect() as conn:
+        if not args.reuse:
+            print(f"[setup] generating {args.n} x {args.dim} vectors")
+            vecs = _synthetic(args.n, args.dim, args.clusters, args.seed)
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            conn.execute(
+                text(
+                    f"CREATE TABLE {TABLE} (id bigserial PRIMARY KEY, study_pack_id int NOT NULL, "
+                    f"embedding vector({args.dim}) NOT NULL)"
+                )
+            )
+            conn.commit()
+            _load(conn, vecs, args.packs)
+
+            print("[setup] building HNSW index (m=16, ef_construction=64)")
+            t0 = time.perf_counter()
+            conn.execute(text("SET maintenance_work_mem = '2GB'"))
+            conn.execute(
+                text(
+                    f"CREATE INDEX ON {TABLE} USING hnsw (embedding vector_cosine_ops) "
+                    "WITH (m = 16, ef_construction = 64)"
+                )
+            )
+            conn.commit()
+            print(f"[setup] index built in {time.perf_counter() - t0:.1f}s")
+            qsrc = vecs[rng.integers(0, len(vecs), size=args.queries)]
+        else:
+            qsrc = _synthetic(args.queries, args.dim, args.clusters, args.seed)
+
+        queries = _unit(qsrc + 0.1 * rng.standard_normal(qsrc.shape).astype(np.float32))
+        qlits = [_lit(q) for q in queries]
+
+        # Ground truth: exact scan (planner cannot use the ANN index).
+        conn.execute(text("SET enable_indexscan = off"))
+        exact: List[List[int]] = []
+        lat: List[float] = []
+        for ql in qlits:
+            t0 = time.perf_counter()
+            exact.append(_topk(conn, ql, args.k))
+            lat.append((time.perf_counter() - t0) * 1000)
+        conn.execute(text("RESET enable_indexscan"))
+        conn.commit()
+
+        print()
+        print(f"{'mode':<14}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+        print(f"{'exact':<14}{1.0:>10.4f}{np.percentile(lat, 50):>10.2f}{np.percentile(lat, 95):>10.2f}")
+
+        for ef in [int(x) for x in args.ef.split(",") if x.strip()]:
+            conn.execute(text("SELECT set_config('hnsw.ef_search', :v, false)"), {"v": str(ef)})
+            hits = 0
+            lat = []
+            for ql, truth in zip(qlits, exact):
+                t0 = time.perf_counter()
+                got = _topk(conn, ql, args.k)
+                lat.append((time.perf_counter() - t0) * 1000)
+                hits += len(set(got) & set(truth))
+            recall = hits / float(args.k * len(qlits))
+            print(f"{'ef=' + str(ef):<14}{recall:>10.4f}{np.percentile(lat, 50):>10.2f}{np.percentile(lat, 95):>10.2f}")
+        conn.commit()
+
+        if not args.keep:
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
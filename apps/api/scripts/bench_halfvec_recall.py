@@ -0,0 +1,139 @@
+# apps/api/scripts/bench_halfvec_recall.py
+"""
+V2.6 — halfvec (float16) vs vector (float32): recall + footprint.
+
+Recall: exact cosine top-k over float16-rounded corpus/queries vs the float32
+ground truth (this isolates quantisation loss from ANN approximation; run
+bench_ann_recall.py for the latter).
+
+Footprint: per-row vector bytes (pgvector stores 8-byte header + dim * 4|2)
+and, with --db, the live table/index sizes of transcript_chunk_embeddings.
+
+Usage (from apps/api):
+  python -m scripts.bench_halfvec_recall --n 200000 --k 8
+  python -m scripts.bench_halfvec_recall --from-db --model sentence-transformers/all-MiniLM-L6-v2 --db
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # apps/api
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.config import settings  # noqa: E402
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _synthetic(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centroids = _unit(rng.standard_normal((clusters, dim)))
+    assign = rng.integers(0, clusters, size=n)
+    return _unit(centroids[assign] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32))
+
+
+def _topk(corpus: np.ndarray, queries: np.ndarray, k: int, block: int = 256) -> np.ndarray:
+    out = np.empty((len(queries), k), dtype=np.int64)
+    for lo in range(0, len(queries), block):
+        sims = queries[lo : lo + block] @ corpus.T
+        part = np.argpartition(-sims, k, axis=1)[:, :k]
+        order = np.take_along_axis(sims, part, axis=1).argsort(axis=1)[:, ::-1]
+        out[lo : lo + block] = np.take_along_axis(part, order, axis=1)
+    return out
+
+
+def _load_from_db(engine, model: str, limit: int) -> np.ndarray:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT COALESCE(embedding::text, embedding_half::text) FROM transcript_chunk_embeddings "
+                "WHERE model = :m LIMIT :n"
+            ),
+            {"m": model, "n": limit},
+        ).all()
+    if not rows:
+        raise SystemExit(f"No embeddings stored for model={model}")
+    return _unit(np.array([json.loads(r[0]) for r in rows], dtype=np.float32))
+
+
+def _db_sizes(engine) -> None:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT c.relname, pg_total_relation_size(c.oid)
+                FROM pg_class c
+                WHERE c.relname = 'transcript_chunk_embeddings'
+                   OR c.relname LIKE 'idx_chunk_embeddings_hnsw_%'
+                ORDER BY 1
+                """
+            )
+        ).all()
+        avg = conn.execute(
+            text(
+                "SELECT avg(pg_column_size(embedding)), avg(pg_column_size(embedding_half)) "
+                "FROM transcript_chunk_embeddings"
+            )
+        ).one()
+    print("\n[db] relation sizes")
+    for name, size in rows:
+        print(f"  {name:<48}{size / 1e6:>10.2f} MB")
+    print(f"[db] avg bytes/row  vector={avg[0]}  halfvec={avg[1]}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--clusters", type=int, default=1000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--from-db", action="store_true", help="use stored embeddings instead of synthetic")
+    ap.add_argument("--model", type=str, default=settings.kb_default_embed_model)
+    ap.add_argument("--db", action="store_true", help="also report live table/index sizes")
+    args = ap.parse_args()
+
+    engine = create_engine(settings.database_url) if (args.from_db or args.db) else None
+
+    if args.from_db:
+        corpus = _load_from_db(engine, args.model, args.n)
+    else:
+        corpus = _synthetic(args.n, args.dim, args.clusters, args.seed)
+    dim = corpus.shape[1]
+
+    rng = np.random.default_rng(args.seed + 1)
+    picks = corpus[rng.integers(0, len(corpus), size=args.queries)]
+    queries = _unit(picks + 0.1 * rng.standard_normal(picks.shape).astype(np.float32))
+
+    truth = _topk(corpus, queries, args.k)
+
+    # float16 round-trip == what halfvec stores; math stays in float32 like pgvector.
+    corpus16 = corpus.astype(np.float16).astype(np.float32)
+    queries16 = queries.astype(np.float16).astype(np.float32)
+    got = _topk(corpus16, queries16, args.k)
+
+    hits = sum(len(set(a) & set(b)) for a, b in zip(truth, got))
+    recall = hits / float(args.k * len(queries))
+    max_err = float(np.abs(corpus16 - corpus).max())
+
+    print(f"corpus={len(corpus)} dim={dim} queries={len(queries)} k={args.k}")
+    print(f"recall@{args.k} halfvec vs vector: {recall:.4f}   (max |x16 - x32| = {max_err:.2e})")
+    b32, b16 = 8 + 4 * dim, 8 + 2 * dim
+    print(f"bytes/vector: vector={b32} halfvec={b16} ({b32 / b16:.2f}x smaller)")
+
+    if args.db and engine is not None:
+        _db_sizes(engine)
+
+
+if __name__ == "__main__":
+    main()
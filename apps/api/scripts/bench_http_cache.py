@@ -0,0 +1,79 @@
+# apps/api/scripts/bench_http_cache.py
+"""
+V2.23 — Repeat-visit cost of the heavy pack endpoints against a running API.
+
+For each endpoint, three scenarios of --repeat requests each:
+  cold/identity   no validator, Accept-Encoding: identity  (pre-V2.23 behaviour)
+  cold/compressed no validator, Accept-Encoding: br, gzip
+  revisit         If-None-Match with the ETag from the first response (304)
+
+Reports wire bytes per request (body as received, before decompression) and
+p50/p95 latency.
+
+Usage (from apps/api, API running):
+  python -m scripts.bench_http_cache --base http://localhost:8000 --pack 12 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+_ENDPOINTS = (
+    "/study-packs/{id}",
+    "/study-packs/{id}?fields=all",
+    "/study-packs/{id}/transcript",
+    "/study-packs/{id}/transcript/chunks?limit=200",
+    "/study-packs/{id}/materials",
+)
+
+
+def _p(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def _run(client: httpx.Client, url: str, headers: Dict[str, str], repeat: int) -> Tuple[int, float, float, int]:
+    lat: List[float] = []
+    wire = 0
+    status = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = client.get(url, headers=headers)
+        lat.append((time.perf_counter() - t0) * 1000)
+        wire += r.num_bytes_downloaded
+        status = r.status_code
+    return wire // max(repeat, 1), _p(lat, 0.5), _p(lat, 0.95), status
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--pack", type=int, required=True)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"pack={args.pack} repeat={args.repeat}")
+    print(f"{'endpoint':<48}{'scenario':<18}{'status':>7}{'bytes/req':>12}{'p50 ms':>9}{'p95 ms':>9}")
+    with httpx.Client(base_url=args.base, timeout=60.0) as client:
+        for tmpl in _ENDPOINTS:
+            url = tmpl.format(id=args.pack)
+            first = client.get(url, headers={"Accept-Encoding": "br, gzip"})
+            etag = first.headers.get("etag")
+            scenarios = [
+                ("cold/identity", {"Accept-Encoding": "identity"}),
+                ("cold/compressed", {"Accept-Encoding": "br, gzip"}),
+            ]
+            if etag:
+                scenarios.append(("revisit", {"Accept-Encoding": "br, gzip", "If-None-Match": etag}))
+            for name, headers in scenarios:
+                size, p50, p95, status = _run(client, url, headers, args.repeat)
+                print(f"{url:<48}{name:<18}{status:>7}{size:>12,}{p50:>9.2f}{p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# apps/api/scripts/bench_json_render.py
+"""
+V2.24 — Serialisation time for a 200-chunk listing and a 5-material pack.
+
+  before: json.loads(content_json) per material, FastAPI's jsonable_encoder
+          over the payload, then json.dumps (JSONResponse.render)
+  after:  FastJSONResponse.render (orjson) with content_json spliced in via
+          json_fragment(), returned directly (no jsonable_encoder pass)
+
+Synthetic data sized like a ~1 h video; no DB needed.
+
+Usage (from apps/api):
+  python -m scripts.bench_json_render --chunks 200 --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # apps/api
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from app.core.responses import FastJSONResponse, json_fragment, orjson  # noqa: E402
+
+_WORDS = "the a model vector index query we so then this that data learn train loss step layer".split()
+
+
+def _sentence(rnd: random.Random, n: int) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(n))
+
+
+def _chunks(n: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(1)
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": 1000 + i,
+            "idx": i,
+            "start_sec": i * 18.0,
+            "end_sec": i * 18.0 + 18.0,
+            "text": _sentence(rnd, 120),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def _material_rows() -> List[Dict[str, Any]]:
+    rnd = random.Random(2)
+    contents = {
+        "summary": {"summary": _sentence(rnd, 400), "bullets": [_sentence(rnd, 20) for _ in range(10)]},
+        "key_takeaways": {"items": [_sentence(rnd, 25) for _ in range(12)]},
+        "chapters": {"items": [{"title": _sentence(rnd, 5), "start_sec": i * 300.0, "summary": _sentence(rnd, 60)} for i in range(12)]},
+        "flashcards": {"items": [{"front": _sentence(rnd, 12), "back": _sentence(rnd, 30)} for _ in range(40)]},
+        "quiz": {
+            "items": [
+                {"question": _sentence(rnd, 15), "options": [_sentence(rnd, 6) for _ in range(4)], "answer_index": 1}
+                for _ in range(20)
+            ]
+        },
+    }
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "id": i + 1,
+            "kind": kind,
+            "status": "generated",
+            "content_json": json.dumps(c),
+            "content_text": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i, (kind, c) in enumerate(contents.items())
+    ]
+
+
+def _materials_payload(rows: List[Dict[str, Any]], fast: bool) -> Dict[str, Any]:
+    conv = json_fragment if fast else json.loads
+    return {"ok": True, "study_pack_id": 1, "materials": [{**r, "content_json": conv(r["content_json"])} for r in rows]}
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> tuple:
+    size = len(fn())
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return size, (time.perf_counter() - t0) * 1000 / repeat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    chunk_payload = {"ok": True, "study_pack_id": 1, "total": args.chunks, "items": _chunks(args.chunks)}
+    rows = _material_rows()
+
+    old = JSONResponse.render
+    new = FastJSONResponse.render
+    cases = [
+        ("chunks: before", lambda: old(None, jsonable_encoder(chunk_payload))),
+        ("chunks: after", lambda: new(None, chunk_payload)),
+        ("materials: before", lambda: old(None, jsonable_encoder(_materials_payload(rows, fast=False)))),
+        ("materials: after", lambda: new(None, _materials_payload(rows, fast=True))),
+    ]
+
+    print(f"orjson={'yes' if orjson is not None else 'no (stdlib fallback)'} chunks={args.chunks} repeat={args.repeat}")
+    print(f"{'case':<20}{'bytes':>12}{'ms/resp':>10}")
+    for name, fn in cases:
+        size, ms = _time(fn, args.repeat)
+        print(f"{name:<20}{size:>12,}{ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
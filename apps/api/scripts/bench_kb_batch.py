@@ -0,0 +1,77 @@
+# apps/api/scripts/bench_kb_batch.py
+"""
+V2.11 — N single kb searches vs one kb_search_batch call against the same pack.
+
+Uses the pack's own chunk texts (first few words) as queries so every query has
+real hits. Single calls are forced onto the pgvector backend so both sides pay
+for Postgres candidate generation.
+
+Usage (from apps/api):
+  python -m scripts.bench_kb_batch --pack 12 --n 50
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # apps/api
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.config import settings  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.kb_search import BACKEND_PGVECTOR, kb_search_batch, kb_search_chunks  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pack", type=int, required=True)
+    ap.add_argument("--n", type=int, default=50)
+    ap.add_argument("--limit", type=int, default=8)
+    ap.add_argument("--words", type=int, default=6)
+    ap.add_argument("--model", type=str, default=settings.kb_default_embed_model)
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("SELECT text FROM transcript_chunks WHERE study_pack_id = :sp ORDER BY idx LIMIT :n"),
+            {"sp": args.pack, "n": args.n},
+        ).all()
+        queries = [" ".join((r[0] or "").split()[: args.words]) for r in rows]
+        queries = [q for q in queries if q]
+        if not queries:
+            raise SystemExit(f"No chunks for study_pack_id={args.pack}")
+
+        # warm-up (model load, plan cache)
+        kb_search_batch(db, args.pack, queries=queries[:2], limit=args.limit, model=args.model)
+
+        t0 = time.perf_counter()
+        single = [
+            kb_search_chunks(db, args.pack, q=q, limit=args.limit, model=args.model, backend=BACKEND_PGVECTOR)
+            for q in queries
+        ]
+        t_single = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = kb_search_batch(db, args.pack, queries=queries, limit=args.limit, model=args.model)
+        t_batch = time.perf_counter() - t0
+    finally:
+        db.close()
+
+    same = sum(
+        [x["chunk_id"] for x in a] == [x["chunk_id"] for x in b] for a, b in zip(single, batch)
+    )
+    n = len(queries)
+    print(f"queries={n} limit={args.limit} model={args.model}")
+    print(f"single: {t_single * 1000:>9.1f} ms total  {t_single * 1000 / n:>7.2f} ms/query")
+    print(f"batch:  {t_batch * 1000:>9.1f} ms total  {t_batch * 1000 / n:>7.2f} ms/query")
+    print(f"speedup: {t_single / max(t_batch, 1e-9):.1f}x   identical rankings: {same}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# apps/api/scripts/bench_pack_bytes.py
+"""
+V2.19 — DB -> API bytes per request: full StudyPack rows vs deferred columns.
+
+Runs the ORM statements the endpoints used before/after V2.19 and sums the
+size of every value psycopg returns (text protocol, so close to wire bytes),
+plus wall time. Cases:
+  list:   GET /study-packs?limit=N        full rows vs light_pack_options()
+  exists: 404 check on chunk/kb endpoints full row vs PK-only
+
+Usage (from apps/api):
+  python -m scripts.bench_pack_bytes --limit 100 --pack 12 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List, Tuple
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # apps/api
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.db.session import SessionLocal  # noqa: E402
+from app.models.study_pack import StudyPack  # noqa: E402
+from app.services.study_packs import light_pack_options  # noqa: E402
+
+
+def _payload_bytes(db, query) -> int:
+    """Execute the query's SQL directly and size the raw column values."""
+    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+    rows = db.connection().exec_driver_sql(compiled.string, compiled.params).all()
+    total = 0
+    for r in rows:
+        for v in r:
+            if v is None:
+                continue
+            total += len(v.encode("utf-8")) if isinstance(v, str) else len(str(v))
+    return total
+
+
+def _run(db, name: str, make: Callable[[], object], repeat: int) -> Tuple[str, int, float]:
+    size = _payload_bytes(db, make())
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        make().all()
+        db.expunge_all()
+    ms = (time.perf_counter() - t0) * 1000 / repeat
+    return name, size, ms
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--limit", type=int, default=100)
+    ap.add_argument("--pack", type=int, default=None, help="pack id for the existence check (default: newest)")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        pack_id = args.pack
+        if pack_id is None:
+            newest = db.query(StudyPack.id).order_by(StudyPack.id.desc()).first()
+            if newest is None:
+                raise SystemExit("No study packs in the database")
+            pack_id = int(newest[0])
+
+        order = (StudyPack.created_at.desc(), StudyPack.id.desc())
+        results: List[Tuple[str, int, float]] = [
+            _run(db, "list: full rows", lambda: db.query(StudyPack).order_by(*order).limit(args.limit), args.repeat),
+            _run(
+                db,
+                "list: deferred",
+                lambda: db.query(StudyPack).options(*light_pack_options()).order_by(*order).limit(args.limit),
+                args.repeat,
+            ),
+            _run(db, "exists: full row", lambda: db.query(StudyPack).filter(StudyPack.id == pack_id), args.repeat),
+            _run(db, "exists: pk only", lambda: db.query(StudyPack.id).filter(StudyPack.id == pack_id), args.repeat),
+        ]
+    finally:
+        db.close()
+
+    print(f"limit={args.limit} pack={pack_id} repeat={args.repeat}")
+    print(f"{'case':<22}{'bytes':>14}{'ms/req':>10}")
+    for name, size, ms in results:
+        print(f"{name:<22}{size:>14,}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
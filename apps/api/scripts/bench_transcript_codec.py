@@ -0,0 +1,112 @@
+# apps/api/scripts/bench_transcript_codec.py
+"""
+V2.21 — transcript_json vs transcript_bin: stored size and decode time.
+
+Uses real packs from the DB (--packs) or a synthetic transcript (--synthetic N
+segments). For each codec available (raw / zlib / zstd) reports bytes and the
+time to go from stored bytes to something indexable:
+  json:  json.loads -> list of dicts
+  bin:   decode_transcript -> DecodedTranscript (arrays + lazy text)
+
+Usage (from apps/api):
+  python -m scripts.bench_transcript_codec --synthetic 3000 --repeat 50
+  python -m scripts.bench_transcript_codec --packs 12 15 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))  # apps/api
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.services.transcript_codec import (  # noqa: E402
+    CODEC_RAW,
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    decode_transcript,
+    encode_segments,
+    zstd,
+)
+
+_WORDS = "the a model vector index query we so then this that data learn train loss step layer".split()
+
+
+def _synthetic(n: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(7)
+    t = 0.0
+    out = []
+    for _ in range(n):
+        dur = round(rnd.uniform(1.5, 6.0), 3)
+        out.append({"text": " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(4, 14))), "start": t, "duration": dur})
+        t = round(t + dur, 3)
+    return out
+
+
+def _from_db(ids: List[int]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    from app.db.session import SessionLocal
+    from app.models.study_pack import StudyPack
+
+    db = SessionLocal()
+    try:
+        out = []
+        for sp_id in ids:
+            raw = db.query(StudyPack.transcript_json).filter(StudyPack.id == sp_id).scalar()
+            if not raw:
+                print(f"pack {sp_id}: no transcript_json, skipped")
+                continue
+            segs = json.loads(raw)
+            if isinstance(segs, dict):
+                segs = segs.get("segments") or []
+            out.append((f"pack {sp_id}", segs))
+        return out
+    finally:
+        db.close()
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+def _bench(label: str, segs: List[Dict[str, Any]], repeat: int) -> None:
+    raw_json = json.dumps(segs, ensure_ascii=False).encode("utf-8")
+    rows = [("json", len(raw_json), _time(lambda: json.loads(raw_json), repeat))]
+
+    codecs = [("bin raw", CODEC_RAW), ("bin zlib", CODEC_ZLIB)]
+    if zstd is not None:
+        codecs.append(("bin zstd", CODEC_ZSTD))
+    for name, codec in codecs:
+        blob = encode_segments(segs, codec=codec)
+        rows.append((name, len(blob), _time(lambda: decode_transcript(blob), repeat)))
+
+    print(f"\n{label}: {len(segs)} segments")
+    print(f"{'format':<12}{'bytes':>12}{'ratio':>8}{'decode ms':>12}")
+    for name, size, ms in rows:
+        print(f"{name:<12}{size:>12,}{size / len(raw_json):>8.2f}{ms:>12.3f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--packs", type=int, nargs="*", default=None)
+    ap.add_argument("--synthetic", type=int, default=3000, help="segment count when --packs is not given")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    cases = _from_db(args.packs) if args.packs else [("synthetic", _synthetic(args.synthetic))]
+    if zstd is None:
+        print("zstandard not installed: zstd row skipped")
+    for label, segs in cases:
+        _bench(label, segs, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# apps/api/scripts/load_kb_ask.py
+"""
+V2.27 — Load test: N concurrent kb/ask calls vs. responsiveness of other endpoints.
+
+Fires --concurrency POST /study-packs/{id}/kb/ask requests at once and, while
+they are in flight, probes cheap sync endpoints (GET /health and
+GET /study-packs/{id}) every --probe-ms. With the old sync kb_ask the probes
+queue behind ~40 busy threadpool slots; with the async path they should stay
+at their idle latency.
+
+Reports ask latency (p50/p95/max, errors) and probe latency during the burst
+vs. a short idle baseline.
+
+Usage (from apps/api, API + Ollama running):
+  python -m scripts.load_kb_ask --base http://localhost:8000 --pack 12 --concurrency 100
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+import httpx
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def _fmt(name: str, values: List[float], errors: int = 0) -> str:
+    return (
+        f"{name:<22} n={len(values):<5} p50={_pct(values, 0.5):>8.1f}ms "
+        f"p95={_pct(values, 0.95):>8.1f}ms max={max(values, default=0.0):>8.1f}ms errors={errors}"
+    )
+
+
+async def _ask(client: httpx.AsyncClient, pack: int, question: str, stream: bool) -> Tuple[float, bool]:
+    t0 = time.perf_counter()
+    try:
+        r = await client.post(
+            f"/study-packs/{pack}/kb/ask",
+            params={"stream": "true"} if stream else None,
+            json={"question": question},
+        )
+        ok = r.status_code == 200
+    except Exception:
+        ok = False
+    return (time.perf_counter() - t0) * 1000, ok
+
+
+async def _probe(client: httpx.AsyncClient, paths: List[str], interval: float, stop: asyncio.Event) -> List[float]:
+    out: List[float] = []
+    i = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            await client.get(paths[i % len(paths)])
+            out.append((time.perf_counter() - t0) * 1000)
+        except Exception:
+            pass
+        i += 1
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+    return out
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency + 10, max_keepalive_connections=args.concurrency + 10)
+    probe_paths = ["/health", f"/study-packs/{args.pack}"]
+
+    async with httpx.AsyncClient(base_url=args.base, timeout=args.timeout, limits=limits) as client:
+        # idle baseline
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(_probe(client, probe_paths, args.probe_ms / 1000, stop))
+        await asyncio.sleep(args.baseline_sec)
+        stop.set()
+        baseline = await probe_task
+
+        # burst
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(_probe(client, probe_paths, args.probe_ms / 1000, stop))
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            *[_ask(client, args.pack, args.question, args.stream) for _ in range(args.concurrency)]
+        )
+        wall = time.perf_counter() - t0
+        stop.set()
+        during = await probe_task
+
+    ask_ms = [ms for ms, _ in results]
+    errors = sum(1 for _, ok in results if not ok)
+    print(f"concurrency={args.concurrency} stream={args.stream} wall={wall:.1f}s")
+    print(_fmt("kb/ask", ask_ms, errors))
+    print(_fmt("probes (idle)", baseline))
+    print(_fmt("probes (during asks)", during))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--pack", type=int, required=True)
+    ap.add_argument("--question", default="What is the main idea of this lecture?")
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--stream", action="store_true")
+    ap.add_argument("--probe-ms", type=float, default=100.0)
+    ap.add_argument("--baseline-sec", type=float, default=3.0)
+    ap.add_argument("--timeout", type=float, default=600.0)
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware
+
+BIG = "transcript " * 500
+
+
+def _app() -> Starlette:
+    app = Starlette(
+        routes=[
+            Route("/big", lambda r: PlainTextResponse(BIG, headers={"Vary": "Origin"})),
+            Route("/small", lambda r: PlainTextResponse("ok")),
+            Route("/events", lambda r: PlainTextResponse("data: x\n\n", media_type="text/event-stream")),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return app
+
+
+client = TestClient(_app())
+
+
+def _vary(r) -> list:
+    return [v.strip().lower() for v in r.headers.get("vary", "").split(",") if v.strip()]
+
+
+def test_compressed_response_varies_on_accept_encoding():
+    r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BIG
+    assert _vary(r) == ["origin", "accept-encoding"]  # merged with the existing Vary
+
+
+def test_identity_responses_still_vary():
+    r = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert _vary(r) == ["origin", "accept-encoding"]
+
+    r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert _vary(r) == ["accept-encoding"]
+
+
+def test_event_stream_is_left_alone():
+    r = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert "vary" not in r.headers
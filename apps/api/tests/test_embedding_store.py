@@ -0,0 +1,50 @@
+import contextlib
+import importlib.util
+import pathlib
+
+from app.services.embedding_store import DEFAULT_EMBED_STORAGE, STORAGE_HALFVEC, resolve_model_spec
+
+
+def _migration(name: str):
+    path = next((pathlib.Path(__file__).parents[1] / "alembic" / "versions").glob(f"{name}_*.py"))
+    spec = importlib.util.spec_from_file_location(f"_mig_{name}", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class _RecordingOp:
+    def __init__(self):
+        self.sql = []
+
+    def execute(self, sql):
+        self.sql.append(" ".join(str(sql).split()))
+
+    def get_context(self):
+        return self
+
+    def autocommit_block(self):
+        return contextlib.nullcontext()
+
+
+def test_unlisted_model_reads_from_default_storage():
+    spec = resolve_model_spec("intfloat/e5-small-v2", 384)
+    assert spec.storage == DEFAULT_EMBED_STORAGE
+    assert spec.column == ("embedding_half" if DEFAULT_EMBED_STORAGE == STORAGE_HALFVEC else "embedding")
+
+
+def test_halfvec_backfill_covers_unlisted_models(monkeypatch):
+    mig = _migration("b7d2e4f81c95")
+    rec = _RecordingOp()
+    monkeypatch.setattr(mig, "op", rec)
+
+    monkeypatch.delenv("YLC_EMBED_STORAGE", raising=False)
+    mig.upgrade()
+    backfill = next(s for s in rec.sql if s.startswith("UPDATE transcript_chunk_embeddings SET embedding_half"))
+    assert "model IN" not in backfill  # every float32 row moves, listed or not
+
+    rec.sql.clear()
+    monkeypatch.setenv("YLC_EMBED_STORAGE", "vector")
+    mig.upgrade()
+    backfill = next(s for s in rec.sql if s.startswith("UPDATE transcript_chunk_embeddings SET embedding_half"))
+    assert "model IN ('sentence-transformers/all-MiniLM-L6-v2'" in backfill
@@ -0,0 +1,70 @@
+import numpy as np
+
+import app.services.kb_answer_cache as answer_cache
+from app.services.kb_cache import KBResultCache, _MemoryBackend
+
+
+class _Cit:
+    def __init__(self, chunk_id, chunk_ids=None):
+        self.chunk_id = chunk_id
+        self.chunk_ids = chunk_ids
+
+
+CITS = [_Cit(11, [11, 12]), _Cit(40)]
+VERSION = {"v": 1}
+
+
+def _setup(monkeypatch):
+    cache = KBResultCache(_MemoryBackend(100, 60))
+    monkeypatch.setattr(answer_cache, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(answer_cache, "_pack_version", lambda db, pid: VERSION["v"])
+
+    def no_embed(*a, **kw):
+        raise AssertionError("the retrieval query vector should be reused")
+
+    monkeypatch.setattr(answer_cache, "embed_texts", no_embed)
+
+
+def _unit(*xs):
+    v = np.asarray(xs, dtype=np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def _lookup(question, vec):
+    return answer_cache.lookup_answer(
+        None, study_pack_id=7, question=question, llm_model="llm", embed_model="emb", citations=CITS, q_vec=vec
+    )
+
+
+def test_normalize_question_key():
+    assert answer_cache.normalize_question_key("  What IS  a Loss?? ") == "what is a loss"
+    assert answer_cache.evidence_ids(CITS) == [11, 12, 40]
+
+
+def test_exact_and_semantic_hits_and_threshold(monkeypatch):
+    _setup(monkeypatch)
+    VERSION["v"] = 1
+    keys, hit = _lookup("What is a loss?", _unit(1, 0, 0))
+    assert hit is None
+    answer_cache.store_answer(keys, "A loss measures error [1].")
+
+    _, hit = _lookup("what is a LOSS", _unit(1, 0, 0))
+    assert hit == {"answer": "A loss measures error [1].", "tier": "exact"}
+
+    _, hit = _lookup("Define the loss", _unit(1, 0.1, 0))  # cosine ~0.995
+    assert hit["tier"] == "semantic"
+    assert hit["matched_question"] == "what is a loss"
+
+    _, hit = _lookup("Who is the speaker?", _unit(0, 1, 0))  # cosine 0
+    assert hit is None
+
+
+def test_version_bump_invalidates(monkeypatch):
+    _setup(monkeypatch)
+    VERSION["v"] = 1
+    keys, _ = _lookup("What is a loss?", _unit(1, 0, 0))
+    answer_cache.store_answer(keys, "old answer")
+
+    VERSION["v"] = 2  # re-ingest / re-embed
+    _, hit = _lookup("What is a loss?", _unit(1, 0, 0))
+    assert hit is None
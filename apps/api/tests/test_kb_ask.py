@@ -0,0 +1,139 @@
+import json
+import os
+
+from starlette.testclient import TestClient
+
+import app.db.session as db_session
+import app.services.kb_qa as kb_qa
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.study_pack import StudyPack
+
+_ITEMS = [
+    {
+        "chunk_id": 11,
+        "idx": 0,
+        "start_sec": 0.0,
+        "end_sec": 12.0,
+        "text": "gradient descent moves the weights against the gradient of the loss",
+        "score": 0.81,
+    },
+    {
+        "chunk_id": 12,
+        "idx": 1,
+        "start_sec": 12.0,
+        "end_sec": 24.0,
+        "text": "the learning rate sets the size of every step",
+        "score": 0.74,
+    },
+]
+
+
+def _make_pack() -> int:
+    os.environ["ENV"] = "test"
+    db = SessionLocal()
+    sp = StudyPack(
+        source_type="youtube",
+        source_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        title="Test",
+        status="ingested",
+        source_id="dQw4w9WgXcQ",
+        language="en",
+    )
+    db.add(sp)
+    db.commit()
+    db.refresh(sp)
+    db.close()
+    return sp.id
+
+
+def _stub_retrieval(monkeypatch):
+    monkeypatch.setattr(kb_qa, "kb_search_chunks", lambda **kw: [dict(it) for it in _ITEMS])
+
+
+def _sse_events(body: str) -> list:
+    out = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def test_kb_ask_async(monkeypatch):
+    pack_id = _make_pack()
+    _stub_retrieval(monkeypatch)
+    prompts = []
+
+    async def fake_generate(*, base_url, model, prompt):
+        prompts.append(prompt)
+        return "Weights move against the gradient [1]."
+
+    monkeypatch.setattr(kb_qa, "_ollama_generate_async", fake_generate)
+
+    # one event loop for the whole test; shutdown disposes the async engine
+    with TestClient(app) as client:
+        r = client.post(
+            f"/study-packs/{pack_id}/kb/ask",
+            json={"question": "What does gradient descent do?", "context_window": 0, "cache": False},
+        )
+        assert client.post("/study-packs/99999999/kb/ask", json={"question": "x"}).status_code == 404
+    assert r.status_code == 200
+    body = r.json()
+    assert body["refused"] is False
+    assert body["answer"] == "Weights move against the gradient [1]."
+    assert [c["chunk_id"] for c in body["citations"]] == [11, 12]
+    assert body["retrieval"]["prompt_tokens"] > 0
+    assert "gradient descent moves the weights" in prompts[0]
+
+
+def test_kb_ask_stream(monkeypatch):
+    pack_id = _make_pack()
+    _stub_retrieval(monkeypatch)
+
+    async def fake_stream(*, base_url, model, prompt):
+        for part in ["Weights move ", "against the gradient [1]."]:
+            yield part
+
+    monkeypatch.setattr(kb_qa, "_ollama_generate_stream_async", fake_stream)
+
+    with TestClient(app) as client:
+        r = client.post(
+            f"/study-packs/{pack_id}/kb/ask",
+            params={"stream": "true"},
+            json={"question": "What does gradient descent do?", "context_window": 0, "cache": False},
+        )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(r.text)
+    assert [e for e, _ in events] == ["citations", "delta", "delta", "done"]
+    assert [c["chunk_id"] for c in events[0][1]["citations"]] == [11, 12]
+    assert events[-1][1]["answer"] == "Weights move against the gradient [1]."
+    assert events[-1][1]["refused"] is False
+
+
+def test_kb_ask_validates_fusion_and_lambda():
+    with TestClient(app) as client:
+        r = client.post("/study-packs/1/kb/ask", json={"question": "x", "fusion": "nope"})
+        assert r.status_code == 422
+        r = client.post("/study-packs/1/kb/ask", json={"question": "x", "mmr_lambda": 1.5})
+        assert r.status_code == 422
+
+
+def test_kb_ask_releases_db_connection_before_generation(monkeypatch):
+    pack_id = _make_pack()
+    _stub_retrieval(monkeypatch)
+    checked_out = []
+
+    async def fake_generate(*, base_url, model, prompt):
+        checked_out.append(db_session._async_engine.pool.checkedout())
+        return "ok [1]"
+
+    monkeypatch.setattr(kb_qa, "_ollama_generate_async", fake_generate)
+
+    with TestClient(app) as client:
+        r = client.post(
+            f"/study-packs/{pack_id}/kb/ask",
+            json={"question": "What does gradient descent do?", "context_window": 0, "cache": False},
+        )
+    assert r.status_code == 200
+    assert checked_out == [0]  # the pack lookup's connection went back to the pool
@@ -0,0 +1,53 @@
+from app.services.kb_context import TokenCounter, _dedupe, pack_context
+
+counter = TokenCounter()
+
+
+def _words(prefix: str, n: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def test_dedupe_cuts_repeated_ngrams():
+    seen = set()
+    first = "the model learns a vector for every word in the input".split()
+    for i in range(len(first) - 3):
+        seen.add(tuple(first[i : i + 4]))
+    runs = _dedupe("so the model learns a vector for every token now".split(), seen, 4)
+    assert runs == [["so"], ["token", "now"]]
+
+
+def test_pack_context_drops_overlapping_candidate():
+    a = _words("a", 40)
+    b = _words("a", 40)  # same text, e.g. two spans over the same chunks
+    c = _words("c", 20)
+    packed = pack_context([a, b, c], budget_tokens=1000, counter=counter, dedupe_ngram=8)
+    assert [i for i, _ in packed.selected] == [0, 2]
+    assert packed.stats["duplicates_dropped"] == 1
+    assert packed.stats["deduped_words"] == 40
+
+
+def test_pack_context_skips_then_truncates():
+    big = _words("b", 200)
+    small = _words("s", 20)
+    budget = counter.count(small) + 60
+    packed = pack_context([big, small], budget_tokens=budget, counter=counter, min_tail_tokens=48)
+    assert [i for i, _ in packed.selected] == [0, 1]
+    text0 = dict(packed.selected)[0]
+    assert text0.endswith("...")
+    assert packed.stats["truncated"] is True
+    assert packed.tokens <= budget
+
+
+def test_pack_context_zero_budget_selects_nothing():
+    packed = pack_context([_words("x", 10)], budget_tokens=0, counter=counter)
+    assert packed.selected == []
+    assert packed.tokens == 0
+
+
+def test_token_counter_truncate():
+    s = _words("w", 50)
+    cut = counter.truncate(s, 10)
+    assert cut.endswith("...")
+    assert counter.count(cut) <= 10
+    assert counter.truncate(s, 1000) == s
+    assert counter.truncate(s, 0) == ""
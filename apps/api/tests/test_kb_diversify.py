@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.kb_diversify import mmr_select
+
+
+def _vec(*xs):
+    v = np.asarray(xs, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_mmr_relevance_follows_fused_score():
+    # RRF put the keyword hit (low cosine) first; MMR must not undo that
+    items = [
+        {"chunk_id": 1, "score": 0.31, "fused_score": 0.032},
+        {"chunk_id": 2, "score": 0.74, "fused_score": 0.030},
+        {"chunk_id": 3, "score": 0.72, "fused_score": 0.016},
+    ]
+    vecs = [_vec(0, 1), _vec(1, 0), _vec(1, 0.05)]
+    picked = mmr_select(items, vecs, k=2, lam=0.7)
+    assert [it["chunk_id"] for it in picked] == [1, 2]
+
+
+def test_mmr_relevance_prefers_rerank_then_cosine():
+    items = [
+        {"chunk_id": 1, "score": 0.9, "fused_score": 0.03, "rerank_score": 0.1},
+        {"chunk_id": 2, "score": 0.2, "fused_score": 0.01, "rerank_score": 0.8},
+    ]
+    picked = mmr_select(items, [_vec(1, 0), _vec(0, 1)], k=1, lam=1.0)
+    assert picked[0]["chunk_id"] == 2
+
+    plain = [{"chunk_id": 1, "score": 0.4}, {"chunk_id": 2, "score": 0.6}]
+    picked = mmr_select(plain, [_vec(1, 0), _vec(0, 1)], k=1, lam=1.0)
+    assert picked[0]["chunk_id"] == 2
@@ -0,0 +1,60 @@
+import app.services.kb_qa as kb_qa
+from app.services.kb_qa import KBAskResult, KBCitation, PreparedAsk, ask_grounded_stream
+
+
+def _prep() -> PreparedAsk:
+    cit = KBCitation(chunk_id=11, idx=0, start_sec=0.0, end_sec=12.0, text="loss measures error", score=0.8)
+    return PreparedAsk(
+        llm_model="llm",
+        base_url="http://ollama",
+        prompt="...",
+        citations=[cit],
+        retrieval={
+            "study_pack_id": 1,
+            "query": "what is a loss",
+            "limit": 6,
+            "hybrid": True,
+            "min_best_score": 0.52,
+            "best_score": 0.8,
+            "retrieved": 1,
+            "used": 1,
+            "embed_model": "emb",
+            "llm_model": "llm",
+        },
+    )
+
+
+def test_stream_event_order(monkeypatch):
+    def fake_stream(*, base_url, model, prompt):
+        yield "A loss "
+        yield "measures error [1]."
+
+    monkeypatch.setattr(kb_qa, "_ollama_generate_stream", fake_stream)
+    events = list(ask_grounded_stream(_prep()))
+    assert [e for e, _ in events] == ["citations", "delta", "delta", "done"]
+    assert events[0][1]["citations"][0].chunk_id == 11
+    done = events[-1][1]
+    assert done["refused"] is False
+    assert done["answer"] == "A loss measures error [1]."
+    assert done["retrieval"]["ttft_ms"] is not None
+
+
+def test_stream_llm_error_ends_with_done(monkeypatch):
+    def failing_stream(*, base_url, model, prompt):
+        yield "A loss "
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(kb_qa, "_ollama_generate_stream", failing_stream)
+    events = list(ask_grounded_stream(_prep()))
+    assert [e for e, _ in events] == ["citations", "delta", "done"]
+    done = events[-1][1]
+    assert done["refused"] is True
+    assert done["retrieval"]["reason"] == "ollama_error"
+    assert "connection reset" in done["answer"]
+
+
+def test_stream_refusal_skips_llm():
+    res = KBAskResult(refused=True, answer="no", model="llm", citations=[], retrieval={"reason": "empty_question"})
+    events = list(ask_grounded_stream(res))
+    assert [e for e, _ in events] == ["citations", "done"]
+    assert events[-1][1]["refused"] is True
@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+
+import app.services.kb_rerank as kb_rerank
+
+
+class _FakeEncoder:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = 0
+
+    def predict(self, pairs):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        # longer text = more relevant
+        return np.asarray([float(len(t)) for _, t in pairs], dtype=np.float32)
+
+
+def _items(prefix):
+    return [{"chunk_id": i, "text": f"{prefix} " + "x" * i} for i in (1, 5, 3)]
+
+
+def _use(monkeypatch, enc):
+    monkeypatch.setattr(kb_rerank, "_load_cross_encoder", lambda model_name, onnx_path: enc)
+    monkeypatch.setattr(kb_rerank, "_SCORE_CACHE", kb_rerank._ScoreCache(100))
+
+
+def test_rerank_orders_by_cross_encoder_score(monkeypatch):
+    _use(monkeypatch, _FakeEncoder())
+    items, info = kb_rerank.rerank_items("q-order", _items("a"), top_n=3, budget_ms=2000)
+    assert info["applied"] is True
+    assert [it["chunk_id"] for it in items] == [5, 3, 1]
+    assert all(0.0 <= it["rerank_score"] <= 1.0 for it in items)
+
+
+def test_rerank_timeout_cancels_queued_and_skips_when_busy(monkeypatch):
+    gate = threading.Event()
+    enc = _FakeEncoder(gate)
+    _use(monkeypatch, enc)
+    try:
+        # first pass holds the single worker past its budget; the fused order is kept
+        items, info = kb_rerank.rerank_items("q1", _items("a"), top_n=3, budget_ms=20)
+        assert info["applied"] is False and info["reason"] == "timeout"
+        assert [it["chunk_id"] for it in items] == [1, 5, 3]
+
+        # second waits in the queue, times out and is cancelled (its slot is freed)
+        _, info = kb_rerank.rerank_items("q2", _items("b"), top_n=3, budget_ms=20)
+        assert info["reason"] == "timeout"
+        assert kb_rerank._pending == 1
+
+        # with KB_RERANK_MAX_PENDING (2) passes outstanding, new work is turned away
+        assert kb_rerank._try_reserve()
+        _, info = kb_rerank.rerank_items("q3", _items("c"), top_n=3, budget_ms=20)
+        assert info["reason"] == "busy"
+        kb_rerank._release()
+    finally:
+        gate.set()
+    kb_rerank._EXECUTOR.submit(lambda: None).result(5)
+    assert enc.calls == 1  # q2 never ran
+    assert kb_rerank._pending == 0
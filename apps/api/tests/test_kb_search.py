@@ -0,0 +1,115 @@
+import numpy as np
+
+import app.services.kb_search as kb_search
+from app.services.kb_search import FUSION_RRF, _memory_candidates, _PackIndex, _rank, _row_to_candidate
+
+CHUNKS = {
+    1: (0, 0.0, 10.0, "gradient descent on the loss"),
+    2: (1, 10.0, 20.0, "the learning rate sets the step"),
+    3: (2, 20.0, 30.0, "momentum smooths the updates"),  # not embedded yet
+}
+EMBEDDED = {1: [1.0, 0.0], 2: [0.6, 0.8]}
+Q_VEC = np.asarray([1.0, 0.0], dtype=np.float32)
+LEX = [(3, 0.9), (2, 0.4)]  # FTS hits: chunk 3 (unembedded) ranks first
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class _FakeDB:
+    def execute(self, *_a, **_kw):
+        return _Rows(
+            [
+                {
+                    "chunk_id": cid,
+                    "idx": CHUNKS[cid][0],
+                    "start_sec": CHUNKS[cid][1],
+                    "end_sec": CHUNKS[cid][2],
+                    "text": CHUNKS[cid][3],
+                    "lex_score": score,
+                    "lex_rank": rank,
+                }
+                for rank, (cid, score) in enumerate(LEX, start=1)
+            ]
+        )
+
+
+def _index(chunk_ids):
+    ids = list(chunk_ids)
+    return _PackIndex(
+        version=1,
+        matrix=np.asarray([EMBEDDED[c] for c in ids], dtype=np.float32).reshape(len(ids), 2),
+        chunk_ids=np.asarray(ids, dtype=np.int64),
+        idxs=np.asarray([CHUNKS[c][0] for c in ids], dtype=np.int32),
+        start_secs=np.asarray([CHUNKS[c][1] for c in ids], dtype=np.float64),
+        end_secs=np.asarray([CHUNKS[c][2] for c in ids], dtype=np.float64),
+        texts=[CHUNKS[c][3] for c in ids],
+        row_of={c: i for i, c in enumerate(ids)},
+    )
+
+
+def _sql_candidates():
+    """What _candidates_sql returns for the same data (distance NULL when not embedded)."""
+    sem = sorted(EMBEDDED, key=lambda c: -float(np.dot(EMBEDDED[c], Q_VEC)))
+    lex = {cid: (rank, score) for rank, (cid, score) in enumerate(LEX, start=1)}
+    rows = []
+    for cid in sorted(set(sem) | set(lex)):
+        rows.append(
+            {
+                "chunk_id": cid,
+                "idx": CHUNKS[cid][0],
+                "start_sec": CHUNKS[cid][1],
+                "end_sec": CHUNKS[cid][2],
+                "text": CHUNKS[cid][3],
+                "distance": 1.0 - float(np.dot(EMBEDDED[cid], Q_VEC)) if cid in EMBEDDED else None,
+                "sem_rank": sem.index(cid) + 1 if cid in EMBEDDED else None,
+                "lex_rank": lex[cid][0] if cid in lex else None,
+                "lex_score": lex[cid][1] if cid in lex else None,
+            }
+        )
+    return [_row_to_candidate(r) for r in rows]
+
+
+def _fused(cands):
+    ranked = _rank(cands, limit=10, hybrid=True, fusion=FUSION_RRF, rrf_k=60, w_sem=1.0, w_lex=1.0)
+    return [(c["chunk_id"], round(c["score"], 5), round(c["fused_score"], 6)) for c in ranked]
+
+
+def test_memory_backend_keeps_lexical_only_hits_like_pgvector():
+    mem = _memory_candidates(
+        _FakeDB(), _index(EMBEDDED), Q_VEC, study_pack_id=1, text_q="momentum", k_sem=10, k_lex=10
+    )
+    unembedded = next(c for c in mem if c["chunk_id"] == 3)
+    assert unembedded["score"] == 0.0 and unembedded["lex_rank"] == 1
+    assert _fused(mem) == _fused(_sql_candidates())
+
+
+def test_memory_backend_empty_index_still_returns_lexical_hits():
+    mem = _memory_candidates(_FakeDB(), _index([]), Q_VEC, study_pack_id=1, text_q="momentum", k_sem=10, k_lex=10)
+    assert sorted(c["chunk_id"] for c in mem) == [2, 3]
+    assert all(c["score"] == 0.0 for c in mem)
+
+
+def test_caller_ef_search_never_below_k_sem(monkeypatch):
+    applied = []
+    monkeypatch.setattr(kb_search, "embed_texts", lambda texts, **kw: [[1.0] + [0.0] * 383 for _ in texts])
+    monkeypatch.setattr(kb_search, "_apply_ann_settings", lambda db, **kw: applied.append(kw["ef_search"]))
+    monkeypatch.setattr(kb_search, "_run_candidates", lambda db, spec, **kw: [[] for _ in kw["q_vecs"]])
+    k_sem, _ = kb_search._pool_sizes(25, hybrid=True, fusion=FUSION_RRF)
+
+    kb_search.kb_search_library(None, q="loss", limit=25, ef_search=10)
+    kb_search.kb_search_chunks(None, 1, q="loss", limit=25, ef_search=10, backend="pgvector")
+    kb_search.kb_search_batch(None, 1, queries=["loss"], limit=25, ef_search=10)
+    assert applied == [k_sem, k_sem, k_sem]
+
+    applied.clear()
+    kb_search.kb_search_library(None, q="loss", limit=25, ef_search=500)
+    assert applied == [500]
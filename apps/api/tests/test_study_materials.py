@@ -1,6 +1,13 @@
+import json
+import os
+
 from fastapi.testclient import TestClient
 
+from app.core.responses import FastJSONResponse, json_fragment
+from app.db.session import SessionLocal
 from app.main import app
+from app.models.study_material import StudyMaterial
+from app.models.study_pack import StudyPack
 
 client = TestClient(app)
 
@@ -31,4 +38,44 @@ def test_generate_and_fetch_materials_flow(monkeypatch):
         body2 = r2.json()
         assert body2["ok"] is True
         assert body2["study_pack_id"] == study_pack_id
-        assert isinstance(body2["materials"], list)
\ No newline at end of file
+        assert isinstance(body2["materials"], list)
+
+
+def test_materials_render_survives_non_finite_rows():
+    payload = {
+        "materials": [
+            {"kind": "summary", "content_json": json_fragment('{"summary": "ok", "score": 0.5}')},
+            {"kind": "quiz", "content_json": json_fragment('{"score": NaN, "items": [Infinity]}')},
+        ]
+    }
+    body = json.loads(FastJSONResponse(payload).body)
+    assert [m["content_json"] for m in body["materials"]] == [
+        {"summary": "ok", "score": 0.5},
+        {"score": None, "items": [None]},
+    ]
+
+
+def test_get_materials_with_legacy_nan_row():
+    os.environ["ENV"] = "test"
+    db = SessionLocal()
+    sp = StudyPack(
+        source_type="youtube",
+        source_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        title="Test",
+        status="ingested",
+        source_id="dQw4w9WgXcQ",
+        language="en",
+    )
+    db.add(sp)
+    db.commit()
+    db.refresh(sp)
+    db.add(StudyMaterial(study_pack_id=sp.id, kind="summary", status="generated", content_json='{"summary": "hi"}'))
+    db.add(StudyMaterial(study_pack_id=sp.id, kind="quiz", status="generated", content_json='{"score": NaN}'))
+    db.commit()
+    db.close()
+
+    r = client.get(f"/study-packs/{sp.id}/materials")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/json")
+    by_kind = {m["kind"]: m["content_json"] for m in r.json()["materials"]}
+    assert by_kind == {"summary": {"summary": "hi"}, "quiz": {"score": None}}
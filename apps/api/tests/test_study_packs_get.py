@@ -1,3 +1,4 @@
+import json
 import os
 from starlette.testclient import TestClient
 
@@ -38,4 +39,118 @@ def test_get_study_pack_ok():
     body = r.json()
     assert body["ok"] is True
     assert body["study_pack"]["id"] == sp.id
-    assert body["study_pack"]["status"] == "ingested"
\ No newline at end of file
+    assert body["study_pack"]["status"] == "ingested"
+
+
+def test_get_study_pack_fields_and_transcript_stream():
+    os.environ["ENV"] = "test"
+
+    db = SessionLocal()
+    sp = StudyPack(
+        source_type="youtube",
+        source_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        title="Test",
+        status="ingested",
+        source_id="dQw4w9WgXcQ",
+        language="en",
+        meta_json='{"k":"v"}',
+        transcript_json='[{"text":"hello","start":0.0,"duration":1.0},{"text":"world","start":1.0,"duration":1.5}]',
+        transcript_text="hello world",
+        error=None,
+    )
+    db.add(sp)
+    db.commit()
+    db.refresh(sp)
+
+    # slim by default
+    body = client.get(f"/study-packs/{sp.id}").json()
+    assert body["study_pack"]["title"] == "Test"
+    assert "transcript_json" not in body["study_pack"]
+
+    body = client.get(f"/study-packs/{sp.id}", params={"fields": "title,transcript_text"}).json()
+    assert body["study_pack"] == {"id": sp.id, "title": "Test", "transcript_text": "hello world"}
+
+    assert client.get(f"/study-packs/{sp.id}", params={"fields": "nope"}).status_code == 400
+
+    r = client.get(f"/study-packs/{sp.id}/transcript/stream")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(x) for x in r.text.splitlines() if x.strip()]
+    assert [x["text"] for x in lines] == ["hello", "world"]
+
+
+def test_transcript_segments_window():
+    os.environ["ENV"] = "test"
+
+    db = SessionLocal()
+    sp = StudyPack(
+        source_type="youtube",
+        source_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        title="Test",
+        status="ingested",
+        source_id="dQw4w9WgXcQ",
+        language="en",
+        transcript_json=json.dumps(
+            [
+                {"text": "a", "start": 0.0, "duration": 2.0},
+                {"text": "b", "start": 2.0, "duration": 2.0},
+                {"text": "c", "start": 4.0, "duration": 2.0},
+                {"text": "d", "start": 6.0, "duration": 2.0},
+            ]
+        ),
+        transcript_text="a b c d",
+        error=None,
+    )
+    db.add(sp)
+    db.commit()
+    db.refresh(sp)
+
+    body = client.get(f"/study-packs/{sp.id}/transcript/segments", params={"from": 3, "to": 5}).json()
+    assert [s["text"] for s in body["segments"]] == ["b", "c"]
+    assert [s["i"] for s in body["segments"]] == [1, 2]
+    assert body["segment_count"] == 4
+
+    body = client.get(f"/study-packs/{sp.id}/transcript/segments", params={"from": 5, "limit": 1}).json()
+    assert [s["text"] for s in body["segments"]] == ["c"]
+    assert body["total"] == 2 and body["truncated"] is True
+
+    r = client.get(f"/study-packs/{sp.id}/transcript/segments", params={"from": 5, "to": 1})
+    assert r.status_code == 400
+
+
+def test_get_study_pack_etag_304():
+    os.environ["ENV"] = "test"
+
+    db = SessionLocal()
+    sp = StudyPack(
+        source_type="youtube",
+        source_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        title="Test",
+        status="ingested",
+        source_id="dQw4w9WgXcQ",
+        language="en",
+        transcript_json="[]",
+        transcript_text="",
+        error=None,
+    )
+    db.add(sp)
+    db.commit()
+    db.refresh(sp)
+
+    r = client.get(f"/study-packs/{sp.id}")
+    etag = r.headers["etag"]
+    assert etag
+
+    r = client.get(f"/study-packs/{sp.id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    # another representation of the same pack gets its own validator
+    r = client.get(f"/study-packs/{sp.id}", params={"fields": "all"}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+
+    sp.title = "Renamed"
+    db.commit()
+    r = client.get(f"/study-packs/{sp.id}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["study_pack"]["title"] == "Renamed"
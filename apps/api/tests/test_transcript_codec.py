@@ -0,0 +1,55 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+from app.services.transcript_codec import (
+    CODEC_RAW,
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    decode_transcript,
+    encode_segments,
+    zstd,
+)
+
+SEGMENTS = [
+    {"text": "hello", "start": 0.0, "duration": 1.5},
+    {"text": "wörld — ünïcode", "start": 1.5, "duration": 2.25},
+    {"text": "", "start": 3600.125, "duration": 0.5},
+]
+
+CODECS = [CODEC_RAW, CODEC_ZLIB, pytest.param(CODEC_ZSTD, marks=pytest.mark.skipif(zstd is None, reason="zstandard"))]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(codec):
+    blob = encode_segments(SEGMENTS, codec=codec)
+    assert blob[4] == codec
+    dec = decode_transcript(blob)
+    assert len(dec) == 3
+    out = dec.segments()
+    assert [s["text"] for s in out] == [s["text"] for s in SEGMENTS]
+    for got, want in zip(out, SEGMENTS):
+        assert got["start"] == pytest.approx(want["start"], abs=1e-3)
+        assert got["duration"] == pytest.approx(want["duration"], abs=1e-3)
+
+
+def test_empty_transcript():
+    dec = decode_transcript(encode_segments([]))
+    assert len(dec) == 0
+    assert dec.segments() == []
+
+
+def test_start_end_shape_and_bad_blob():
+    dec = decode_transcript(encode_segments([{"text": "x", "start_sec": 2.0, "end_sec": 5.0}]))
+    assert dec.segment(0) == {"text": "x", "start": 2.0, "duration": 3.0}
+    with pytest.raises(ValueError):
+        decode_transcript(b"nope")
+
+
+def test_migration_encoder_matches_codec():
+    path = next((pathlib.Path(__file__).parents[1] / "alembic" / "versions").glob("a6d2f9c04b18_*.py"))
+    spec = importlib.util.spec_from_file_location("_mig_a6d2f9c04b18", path)
+    mig = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mig)
+    assert mig._encode_segments(SEGMENTS) == encode_segments(SEGMENTS, codec=CODEC_ZLIB)
@@ -35,9 +35,10 @@ export type StudyPackResponse = {
     status: string;
     source_id: string | null;
     language: string | null;
-    meta_json: string | null;
-    transcript_json: string | null;
-    transcript_text: string | null;
+    // Only returned with ?fields=...,meta_json / transcript_json / transcript_text (or fields=all)
+    meta_json?: string | null;
+    transcript_json?: string | null;
+    transcript_text?: string | null;
     error: string | null;
     created_at: string | null;
     updated_at: string | null;
@@ -238,6 +239,7 @@ export type KBAskResponse = {
   ok: boolean;
   study_pack_id: number;
   refused: boolean;
+  cached?: boolean; // V2.28 — served from the answer cache
   answer: string;
   model: string;
 
@@ -439,4 +441,59 @@ export async function kbAsk(studyPackId: number, req: KBAskRequest): Promise<KBA
     method: "POST",
     body: JSON.stringify(req),
   });
-}
\ No newline at end of file
+}
+/** V2.25 — KB Ask over Server-Sent Events (citations → token deltas → done) */
+export type KBAskStreamHandlers = {
+  onCitations?: (data: { study_pack_id: number; study_pack: KBAskStudyPackInfo; citations: KBAskCitation[] }) => void;
+  onDelta?: (text: string) => void;
+  onDone?: (data: { refused: boolean; cached?: boolean; answer: string; model: string; retrieval: any }) => void;
+};
+
+export async function kbAskStream(
+  studyPackId: number,
+  req: KBAskRequest,
+  handlers: KBAskStreamHandlers,
+  signal?: AbortSignal
+): Promise<void> {
+  const res = await fetch(`${baseUrl()}/study-packs/${studyPackId}/kb/ask?stream=true`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+    body: JSON.stringify(req),
+    cache: "no-store",
+    signal,
+  });
+  if (!res.ok || !res.body) {
+    throw new Error(`HTTP ${res.status}: ${await res.text()}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+
+  const dispatch = (block: string) => {
+    let event = "message";
+    const dataLines: string[] = [];
+    for (const line of block.split("\n")) {
+      if (line.startsWith("event:")) event = line.slice(6).trim();
+      else if (line.startsWith("data:")) dataLines.push(line.slice(5).trimStart());
+    }
+    if (!dataLines.length) return;
+    const data = JSON.parse(dataLines.join("\n"));
+    if (event === "citations") handlers.onCitations?.(data);
+    else if (event === "delta") handlers.onDelta?.(data.text ?? "");
+    else if (event === "done") handlers.onDone?.(data);
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let sep = buf.indexOf("\n\n");
+    while (sep >= 0) {
+      dispatch(buf.slice(0, sep));
+      buf = buf.slice(sep + 2);
+      sep = buf.indexOf("\n\n");
+    }
+  }
+  if (buf.trim()) dispatch(buf);
+}